@@ -0,0 +1,183 @@
+# Vectorized batch simulator for stand-at-threshold strategies
+from game import GameStats
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the batch engine
+    np = None
+
+
+class BatchSimulator:
+    """Plays many independent flat-bet hands at once with NumPy
+    
+    Each lane owns one shoe (a row of card points, Ace = 1) and a cursor
+    into it; every step deals one hand in every lane, with the player and
+    dealer draw loops vectorized across lanes. Shoes are shuffled lazily: each
+    deal swaps a uniformly chosen card from the undealt part of the row into
+    the cursor position, one Fisher-Yates step, so a reshuffle only resets
+    the cursor and no card past the cut is ever shuffled. Lanes reshuffle at
+    the cut card exactly like Deck. The object-based Game remains the reference
+    implementation: results agree statistically, not card for card.
+    """
+    
+    def __init__(self, num_decks=6, num_lanes=16384, seed=None):
+        if np is None:
+            raise ImportError("The batch simulator requires NumPy (pip install numpy)")
+        
+        self.num_decks = num_decks
+        self.num_lanes = num_lanes
+        self.total_cards = num_decks * 52
+        self.rng = np.random.default_rng(seed)
+        
+        single_deck = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10] * 4
+        self.base_shoe = np.array(single_deck * num_decks, dtype=np.int8)
+        # Same 70-80% cut card range as Deck.place_cut_card
+        self.min_cut = int(self.total_cards * 0.70)
+        self.max_cut = int(self.total_cards * 0.80)
+        
+        self.lanes = np.arange(num_lanes)
+        # Any order of the cards works as the starting point of the lazy shuffle
+        self.shoes = np.tile(self.base_shoe, (num_lanes, 1))
+        self.flat_shoes = self.shoes.reshape(-1)  # A view of the same cards
+        self.cursors = np.zeros(num_lanes, dtype=np.int64)
+        self.cut_positions = np.zeros(num_lanes, dtype=np.int64)
+        self.reshuffle(self.lanes)
+    
+    def reshuffle(self, lanes):
+        """Start fresh shoes and place new cut cards for the given lanes
+        
+        The rows still hold every card of the shoe, so resetting the cursor
+        is enough: _draw shuffles as it deals.
+        """
+        count = len(lanes)
+        self.cursors[lanes] = 0
+        self.cut_positions[lanes] = self.rng.integers(self.min_cut, self.max_cut + 1, size=count)
+    
+    def _draw(self, lanes):
+        """Deal the next card in each of the given lanes"""
+        cursors = self.cursors[lanes]
+        empty = cursors >= self.total_cards
+        if empty.any():
+            self.reshuffle(lanes[empty])  # Emergency reshuffle, as in Deck.deal_card
+            cursors = self.cursors[lanes]
+        # Swap a random undealt card into the cursor position and deal it,
+        # indexing the flattened shoes (much cheaper than 2-D fancy indexing)
+        offsets = lanes * self.total_cards
+        dealt = offsets + cursors
+        picks = dealt + (self.rng.random(len(lanes)) * (self.total_cards - cursors)).astype(np.int64)
+        cards = self.flat_shoes[picks]
+        self.flat_shoes[picks] = self.flat_shoes[dealt]
+        self.flat_shoes[dealt] = cards
+        self.cursors[lanes] = cursors + 1
+        return cards
+    
+    def play_step(self, threshold):
+        """Play one hand in every lane and return per-lane outcome arrays"""
+        lanes = self.lanes
+        player_first = self._draw(lanes)
+        dealer_first = self._draw(lanes)
+        player_second = self._draw(lanes)
+        dealer_second = self._draw(lanes)
+        
+        player_hard = player_first + player_second
+        player_ace = (player_first == 1) | (player_second == 1)
+        dealer_hard = dealer_first + dealer_second
+        dealer_ace = (dealer_first == 1) | (dealer_second == 1)
+        player_value = _hand_values(player_hard, player_ace)
+        dealer_value = _hand_values(dealer_hard, dealer_ace)
+        player_blackjack = player_value == 21
+        dealer_blackjack = dealer_value == 21
+        
+        # Player hits until reaching the threshold (blackjacks never hit)
+        hitting = np.flatnonzero(~player_blackjack & (player_value < threshold))
+        while hitting.size:
+            cards = self._draw(hitting)
+            player_hard[hitting] += cards
+            player_ace[hitting] |= cards == 1
+            player_value[hitting] = _hand_values(player_hard[hitting], player_ace[hitting])
+            hitting = hitting[player_value[hitting] < threshold]
+        
+        # Dealer plays unless the player busted or has an unmatched blackjack
+        dealer_plays = (~player_blackjack | dealer_blackjack) & (player_value <= 21)
+        hitting = np.flatnonzero(dealer_plays & (dealer_value <= 16))
+        while hitting.size:
+            cards = self._draw(hitting)
+            dealer_hard[hitting] += cards
+            dealer_ace[hitting] |= cards == 1
+            dealer_value[hitting] = _hand_values(dealer_hard[hitting], dealer_ace[hitting])
+            hitting = hitting[dealer_value[hitting] <= 16]
+        
+        # Reshuffle lanes whose cut card came out during this hand
+        reshuffle = np.flatnonzero(self.cursors > self.cut_positions)
+        if reshuffle.size:
+            self.reshuffle(reshuffle)
+        
+        return _settle(player_value, dealer_value, player_blackjack, dealer_blackjack)
+    
+    def simulate(self, threshold, num_hands, bet_amount=10.0, starting_bankroll=1000.0):
+        """Play num_hands flat-bet hands standing at threshold and return a GameStats
+        
+        Only the aggregate counters of GameStats are filled in; there is no
+        bankroll stop and no hand records.
+        """
+        stats = GameStats(starting_bankroll)
+        net_units = 0.0
+        remaining = num_hands
+        
+        while remaining > 0:
+            outcome = self.play_step(threshold)
+            if remaining < self.num_lanes:
+                outcome = {key: values[:remaining] for key, values in outcome.items()}
+            
+            wins = int(outcome['win'].sum())
+            blackjacks = int(outcome['blackjack'].sum())
+            losses = int(outcome['loss'].sum())
+            stats.player_wins += wins + blackjacks
+            stats.player_blackjacks += blackjacks
+            stats.dealer_wins += losses
+            stats.draws += int(outcome['push'].sum())
+            stats.player_busts += int(outcome['player_bust'].sum())
+            stats.dealer_busts += int(outcome['dealer_bust'].sum())
+            stats.total_games += len(outcome['win'])
+            stats.total_winnings += (wins + 1.5 * blackjacks) * bet_amount
+            net_units += wins + 1.5 * blackjacks - losses
+            remaining -= self.num_lanes
+        
+        stats.total_bet = stats.total_games * bet_amount
+        stats.current_bankroll = starting_bankroll + net_units * bet_amount
+        if stats.player_wins:
+            stats.biggest_win = bet_amount * (1.5 if stats.player_blackjacks else 1.0)
+        if stats.dealer_wins:
+            stats.biggest_loss = bet_amount
+        return stats
+
+
+def _hand_values(hard, has_ace):
+    """Best blackjack value for arrays of hard totals and Ace flags"""
+    return np.where(has_ace & (hard <= 11), hard + 10, hard)
+
+
+def _settle(player_value, dealer_value, player_blackjack, dealer_blackjack):
+    """Vectorized Game.determine_winner returning boolean arrays per outcome"""
+    either_blackjack = player_blackjack | dealer_blackjack
+    player_bust = player_value > 21
+    dealer_bust = dealer_value > 21
+    normal = ~either_blackjack & ~player_bust
+    
+    win = normal & (dealer_bust | (player_value > dealer_value))
+    push = (player_blackjack & dealer_blackjack) | (normal & ~dealer_bust & (player_value == dealer_value))
+    return {
+        'win': win,
+        'blackjack': player_blackjack & ~dealer_blackjack,
+        'push': push,
+        'loss': ~(win | push | (player_blackjack & ~dealer_blackjack)),
+        'player_bust': player_bust,
+        'dealer_bust': dealer_bust,
+    }
+
+
+def simulate_threshold_batch(strategy, num_hands, num_decks=6, bet_amount=10.0, num_lanes=16384, seed=None):
+    """Batch-simulate a StandAtThresholdStrategy (or a bare threshold) and return a GameStats"""
+    threshold = getattr(strategy, 'threshold', strategy)
+    simulator = BatchSimulator(num_decks, num_lanes, seed)
+    return simulator.simulate(threshold, num_hands, bet_amount)
@@ -0,0 +1,213 @@
+# Benchmark suite for the simulation hot path
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import batch
+from betting import parse_betting_policy
+from deck import CompactDeck, Deck
+from game import Game, GameSimulator, GameStats
+from main import BlackjackSimulator
+from rng import RandomStream
+from sinks import CSVHandSink, NullSink
+from strategy import AlwaysStandAt16Strategy, get_available_strategies
+from utils import Hand, calculate_hand_value
+
+
+def bench_deal_card(num_decks, count, compact_shoe=True):
+    """Deal count cards, reshuffling at the cut card as the game does"""
+    deck_class = CompactDeck if compact_shoe else Deck
+    deck = deck_class(num_decks, RandomStream(1))
+    for _ in range(count):
+        deck.deal_card()
+        if deck.cut_card_reached:
+            deck.reset()
+    return count
+
+
+def bench_hand_value(num_decks, count):
+    """Evaluate count hands, half cached Hand objects and half plain card lists"""
+    deck = CompactDeck(num_decks, RandomStream(2))
+    hands = []
+    for _ in range(500):
+        cards = [deck.deal_card() for _ in range(3)]
+        hands.append(Hand(cards))
+        hands.append(cards)
+        deck.reshuffle_after_hand()
+    
+    for i in range(count):
+        calculate_hand_value(hands[i % len(hands)])
+    return count
+
+
+def bench_play_round(num_decks, rounds, record_hands):
+    """Play rounds flat-bet through Game.play_round, with or without hand records"""
+    game = Game(num_decks, rng=RandomStream(3))
+    strategy = AlwaysStandAt16Strategy()
+    stats = GameStats() if record_hands else None
+    sink = NullSink()
+    for round_num in range(rounds):
+        game.play_round(strategy, 10.0, round_num + 1, 1, stats, sink)
+    return rounds
+
+
+def bench_simulate(num_decks, rounds):
+    """Run one GameSimulator.simulate scenario per strategy, streaming records to a null sink"""
+    hands = 0
+    for strategy in get_available_strategies():
+        simulator = GameSimulator(num_decks)
+        # A huge bankroll keeps the progression from stopping the scenario early
+        stats = simulator.simulate(strategy, rounds, 1e12, 10.0, 1e12, 1, NullSink(), RandomStream(4))
+        hands += stats.total_games
+    return hands
+
+
+def bench_simulate_flat(num_decks, hands):
+    """Play hands of S16 flat-bet through GameSimulator.simulate, the baseline for bench_batch"""
+    stats = GameSimulator(num_decks).simulate(AlwaysStandAt16Strategy(), hands, 1e12, 10.0, 1e12, 1, NullSink(),
+                                              RandomStream(6), betting=parse_betting_policy('flat'))
+    return stats.total_games
+
+
+def bench_batch(num_decks, hands):
+    """Play hands of S16 with the NumPy batch engine on its default 16384 lanes"""
+    return batch.simulate_threshold_batch(AlwaysStandAt16Strategy(), hands, num_decks, seed=1).total_games
+
+
+def bench_export(num_decks, rounds, directory):
+    """Write hand records through CSVHandSink, then the combined CSV files"""
+    simulator = BlackjackSimulator()
+    simulator.results_dir = directory
+    simulator.timestamp = "benchmark"
+    simulator.num_decks = num_decks
+    
+    all_strategy_results = {}
+    hands = 0
+    for strategy in simulator.strategies:
+        stats = GameSimulator(num_decks).simulate(strategy, rounds, 1e12, 10.0, 1e12, 1, rng=RandomStream(5))
+        all_strategy_results[strategy.name] = [stats]
+        
+        path = os.path.join(directory, f"{strategy.short_name}_hands.csv")
+        with CSVHandSink(path, strategy.short_name) as sink:
+            for hand_record in stats.hand_records:
+                sink.write(hand_record)
+        hands += stats.total_games
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator.export_combined_csv(all_strategy_results, rounds, 1e12, 10.0, 1e12)
+    return hands
+
+
+def measure(func, *args, track_memory=True, repeat=3):
+    """Run a benchmark and return its best timing, throughput and peak traced memory"""
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        units = func(*args)
+        seconds = min(seconds, time.perf_counter() - start)
+    
+    result = {'units': units, 'seconds': seconds, 'per_second': units / seconds if seconds > 0 else 0.0}
+    if track_memory:
+        # Memory is traced in a second run, since tracing slows the code down
+        tracemalloc.start()
+        func(*args)
+        result['peak_memory_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(deck_counts, round_counts, track_memory=True, repeat=3):
+    """Run every benchmark for each deck count and round count and return the results"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for num_decks in deck_counts:
+            for rounds in round_counts:
+                cases = [
+                    ('deal_card', 'cards', bench_deal_card, (num_decks, rounds * 6)),
+                    ('deal_card_object_shoe', 'cards', bench_deal_card, (num_decks, rounds * 6, False)),
+                    ('calculate_hand_value', 'hands', bench_hand_value, (num_decks, rounds * 6)),
+                    ('play_round', 'hands', bench_play_round, (num_decks, rounds, False)),
+                    ('play_round_recorded', 'hands', bench_play_round, (num_decks, rounds, True)),
+                    ('simulate', 'hands', bench_simulate, (num_decks, rounds)),
+                    ('csv_export', 'hands', bench_export, (num_decks, rounds, directory)),
+                    ('simulate_flat', 'hands', bench_simulate_flat, (num_decks, rounds)),
+                ]
+                if batch.np is not None:
+                    # Lanes only fill up over many hands, so the batch engine plays 200 per round
+                    cases.append(('simulate_batch', 'hands', bench_batch, (num_decks, rounds * 200)))
+                for name, unit, func, args in cases:
+                    result = measure(func, *args, track_memory=track_memory, repeat=repeat)
+                    result.update({'benchmark': name, 'unit': unit, 'num_decks': num_decks, 'rounds': rounds})
+                    results.append(result)
+                    print(format_result(result), flush=True)
+    return results
+
+
+def format_result(result, baseline=None):
+    """Format one benchmark result as a table row"""
+    line = (f"{result['benchmark']:<24} {result['num_decks']:>5} {result['rounds']:>9} "
+            f"{result['per_second']:>14,.0f} {result['unit']}/s")
+    if 'peak_memory_kb' in result:
+        line += f" {result['peak_memory_kb']:>10,.0f} KB"
+    if baseline:
+        line += f" ({result['per_second'] / baseline['per_second']:.2f}x baseline)"
+    return line
+
+
+def compare_results(results, baseline_path):
+    """Print each result against a previous results file"""
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {(r['benchmark'], r['num_decks'], r['rounds']): r for r in baseline['results']}
+    
+    print(f"\nComparison with {baseline_path}:")
+    for result in results:
+        key = (result['benchmark'], result['num_decks'], result['rounds'])
+        print(format_result(result, previous.get(key)))
+
+
+def main(argv=None):
+    """Run the benchmark suite from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark the blackjack simulation hot path")
+    parser.add_argument('--decks', default="1,6,8", help="comma-separated deck counts (default 1,6,8)")
+    parser.add_argument('--rounds', default="1000,10000", help="comma-separated round counts (default 1000,10000)")
+    parser.add_argument('--repeat', type=int, default=3, help="timing runs per benchmark, best is kept (default 3)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory measurement runs")
+    parser.add_argument('--output', help="JSON results file (default results/BJ_benchmark_<timestamp>.json)")
+    parser.add_argument('--compare', help="previous JSON results file to compare against")
+    args = parser.parse_args(argv)
+    
+    deck_counts = [int(value) for value in args.decks.split(',')]
+    round_counts = [int(value) for value in args.rounds.split(',')]
+    
+    print(f"{'Benchmark':<24} {'Decks':>5} {'Rounds':>9} {'Throughput':>14}")
+    results = run_benchmarks(deck_counts, round_counts, not args.no_memory, args.repeat)
+    
+    output_path = args.output
+    if output_path is None:
+        results_dir = os.path.join(os.path.dirname(__file__), "..", "results")
+        os.makedirs(results_dir, exist_ok=True)
+        output_path = os.path.join(results_dir, f"BJ_benchmark_{datetime.now().strftime('%m%d_%H%M')}.json")
+    
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'results': results,
+        }, output_file, indent=2)
+    print(f"\nResults written to {os.path.abspath(output_path)}")
+    
+    if args.compare:
+        compare_results(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
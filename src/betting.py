@@ -0,0 +1,126 @@
+# Betting policies
+from deck import TRUE_COUNT_MAX, TRUE_COUNT_MIN
+
+# Default true-count spread: (lowest true count, bet in base units) steps
+DEFAULT_SPREAD = ((TRUE_COUNT_MIN, 1), (2, 2), (3, 4), (4, 6), (5, 8))
+
+
+class BettingPolicy:
+    """Bet sizing rules kept as plain data
+    
+    GameSimulator reads these fields once per run and applies them inline
+    every round, so no policy method is called per hand:
+    
+    - loss_multiplier: after a loss the bet is multiplied by this (capped
+      at max_units base bets); a win or draw resets it to the base bet.
+      1 gives flat betting.
+    - spread: bet in base units per true count bucket, indexed by
+      bucket - TRUE_COUNT_MIN; replaces the progression when set.
+    - kelly_fraction: bet this fraction of the Kelly bet for the edge
+      estimated from the true count (base_edge + edge_per_count * true
+      count, over variance), never less than the base bet; replaces the
+      progression when set.
+    """
+    
+    def __init__(self, name, loss_multiplier=1.0, max_units=None, spread=None, kelly_fraction=0.0,
+                 base_edge=-0.005, edge_per_count=0.005, variance=1.3):
+        self.name = name
+        self.loss_multiplier = loss_multiplier
+        self.max_units = max_units
+        self.spread = spread
+        self.kelly_fraction = kelly_fraction
+        self.base_edge = base_edge
+        self.edge_per_count = edge_per_count
+        self.variance = variance
+    
+    def uses_count(self):
+        """True when the bet depends on the true count before the deal"""
+        return self.spread is not None or self.kelly_fraction > 0
+    
+    def describe(self):
+        """Return a one-line description for console output"""
+        if self.spread is not None:
+            return f"{self.name}: true-count spread {min(self.spread):g}-{max(self.spread):g} units"
+        if self.kelly_fraction > 0:
+            return f"{self.name}: {self.kelly_fraction:g} Kelly on true-count edge"
+        if self.loss_multiplier == 1:
+            return f"{self.name}: flat base bet"
+        cap = f", capped at {self.max_units:g} units" if self.max_units else ""
+        return f"{self.name}: x{self.loss_multiplier:g} on loss, reset on win{cap}"
+
+
+def flat_policy():
+    """Always bet the base bet"""
+    return BettingPolicy('flat')
+
+
+def martingale_policy(multiplier=3, max_units=None):
+    """Multiply the bet after each loss and reset after a win or draw"""
+    name = f"martingale:{multiplier:g}" + (f":{max_units:g}" if max_units else "")
+    return BettingPolicy(name, loss_multiplier=multiplier, max_units=max_units)
+
+
+def spread_policy(steps=DEFAULT_SPREAD):
+    """Bet by true count, given (lowest true count, units) steps in increasing order"""
+    spread = []
+    for bucket in range(TRUE_COUNT_MIN, TRUE_COUNT_MAX + 1):
+        units = steps[0][1]
+        for lowest, step_units in steps:
+            if bucket >= lowest:
+                units = step_units
+        spread.append(units)
+    top_units = steps[-1][1]
+    return BettingPolicy(f"spread:1-{top_units:g}", spread=tuple(spread))
+
+
+def kelly_policy(fraction=0.5):
+    """Bet a fraction of the Kelly bet for the edge implied by the true count"""
+    return BettingPolicy(f"kelly:{fraction:g}", kelly_fraction=fraction)
+
+
+# The progression the simulator has always used
+DEFAULT_BETTING = 'martingale:3'
+
+
+def default_betting_policy():
+    """x3 on loss, reset on win or draw, no cap"""
+    return martingale_policy(3)
+
+
+def parse_betting_policy(spec):
+    """Build a policy from a spec such as 'flat', 'martingale:3:64', 'spread:12' or 'kelly:0.5'
+    
+    martingale takes the loss multiplier and an optional cap in base units,
+    spread the top of a 1-N spread over true counts +1 to +5, and kelly the
+    Kelly fraction.
+    """
+    kind, *params = spec.split(':')
+    try:
+        values = [float(param) for param in params]
+    except ValueError:
+        raise ValueError(f"Invalid betting policy {spec!r}") from None
+    
+    if kind == 'flat' and not values:
+        return flat_policy()
+    if kind == 'martingale' and len(values) <= 2:
+        multiplier = values[0] if values else 3
+        max_units = values[1] if len(values) > 1 else None
+        if multiplier < 1 or (max_units is not None and max_units < 1):
+            raise ValueError(f"Invalid betting policy {spec!r}")
+        return martingale_policy(multiplier, max_units)
+    if kind == 'spread' and len(values) <= 1:
+        if not values:
+            return spread_policy()
+        top = values[0]
+        if top < 1:
+            raise ValueError(f"Invalid betting policy {spec!r}")
+        # Ramp from 1 unit at true count +1 to the top at +5
+        steps = [(TRUE_COUNT_MIN, 1)] + [(count, 1 + (top - 1) * (count - 1) / 4) for count in range(2, 6)]
+        return spread_policy(tuple(steps))
+    if kind == 'kelly' and len(values) <= 1:
+        fraction = values[0] if values else 0.5
+        if not 0 < fraction <= 1:
+            raise ValueError(f"Invalid betting policy {spec!r}")
+        return kelly_policy(fraction)
+    raise ValueError(f"Unknown betting policy {spec!r}; use flat, martingale[:MULT[:CAP]], "
+                     f"spread[:TOP] or kelly[:FRACTION]")
@@ -0,0 +1,94 @@
+# On-disk cache of simulation results
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Part of every cache key; bump it whenever a change alters simulation results
+ENGINE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _canonical(value):
+    """Reduce a key part to plain, stably ordered values for repr()"""
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _canonical(item)) for key, item in value.items()))
+    # Strategies, betting policies and similar plain objects: their class and settings
+    return (type(value).__name__, _canonical(vars(value)))
+
+
+class ResultCache:
+    """Content-addressed store of pickled results in a directory
+    
+    Keys are SHA-256 digests of the engine version and everything that
+    determines a result. Reading an entry refreshes its modification time,
+    and writing one evicts the least recently used entries once the
+    directory holds more than max_bytes. Entries are written atomically, so
+    several worker processes can share one directory.
+    """
+    
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+    
+    def key(self, *parts):
+        """Return the hex digest identifying a result"""
+        text = repr((ENGINE_VERSION,) + _canonical(parts))
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+    
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                result = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return result
+    
+    def put(self, key, result):
+        """Store a result under key, then evict old entries if over the size bound"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as cache_file:
+                pickle.dump(result, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+    
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.pkl'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,82 @@
+# Checkpoints of long runs
+import os
+import pickle
+import tempfile
+from time import monotonic
+
+# Bump whenever the layout of the saved data changes
+CHECKPOINT_VERSION = 2
+
+# Seconds between periodic saves
+DEFAULT_INTERVAL = 60.0
+
+
+class Checkpoint:
+    """Settings and completed scenario results of a run, kept in one file
+    
+    For each parameter set the checkpoint holds the master seed and the
+    GameStats of every completed scenario by strategy name. Scenario seeds
+    derive from the master seed, so that is all the random state a resumed
+    run needs to continue exactly where the interrupted one stopped.
+    
+    The file is rewritten atomically, at most every interval seconds by
+    save_if_due() and whenever save() is called, so an interruption loses
+    no more than the scenarios finished since the last save.
+    """
+    
+    def __init__(self, path, interval=DEFAULT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.settings_list = []
+        self.runs = {}  # Parameter set index -> progress (see progress())
+        self.last_saved = monotonic()
+    
+    @classmethod
+    def load(cls, path, interval=DEFAULT_INTERVAL):
+        """Read a checkpoint written by save(), raising ValueError if it is not one"""
+        with open(path, 'rb') as checkpoint_file:
+            try:
+                data = pickle.load(checkpoint_file)
+            except (EOFError, pickle.UnpicklingError):
+                data = None
+        if not isinstance(data, dict) or data.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a checkpoint of this simulator version")
+        
+        checkpoint = cls(path, interval)
+        checkpoint.settings_list = data['settings_list']
+        checkpoint.runs = data['runs']
+        return checkpoint
+    
+    def progress(self, index):
+        """Return the progress of parameter set index, creating it on first use
+        
+        A dict with 'seed' (master seed, None until the set starts),
+        'timestamp' (of the set's output file names), 'results' (strategy
+        name -> list of GameStats of completed scenarios, in scenario order),
+        'hand_records' (strategy name -> hand records those scenarios wrote
+        to its hand record file) and 'done' (results exported).
+        """
+        if index not in self.runs:
+            self.runs[index] = {'seed': None, 'timestamp': None, 'results': {}, 'hand_records': {},
+                                'done': False}
+        return self.runs[index]
+    
+    def save(self):
+        """Write the checkpoint, replacing the previous file in one step"""
+        data = {'version': CHECKPOINT_VERSION, 'settings_list': self.settings_list, 'runs': self.runs}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as checkpoint_file:
+                pickle.dump(data, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.last_saved = monotonic()
+    
+    def save_if_due(self):
+        """Save when interval seconds have passed since the last save"""
+        if monotonic() - self.last_saved >= self.interval:
+            self.save()
@@ -0,0 +1,162 @@
+# Binary (.npy) export of hand records
+import os
+import struct
+from sinks import HandRecordSink
+
+# Card slots per hand; unused slots hold NO_CARD. A hand never hits at 21, so
+# it can never use more than 21 cards (twenty-one Aces in a big shoe).
+MAX_CARDS = 22
+NO_CARD = 255
+# Player hands a record can hold after splits (TableRules' default max_hands).
+# The player slots hold the cards of every hand in play order, hand_sizes says
+# how many belong to each.
+MAX_HANDS = 4
+MAX_PLAYER_CARDS = MAX_CARDS * MAX_HANDS
+
+# New actions go at the end so existing files keep their codes
+PLAYER_ACTIONS = ('Stand', 'Hit', 'Blackjack', 'Double', 'Split', 'Surrender')
+RESULTS = ('Loss', 'Win', 'Draw', 'Blackjack')
+
+# Bits of the flags field
+PLAYER_BUSTED = 1
+DEALER_BUSTED = 2
+IS_BLACKJACK = 4
+RESHUFFLED_AFTER = 8
+
+# Fixed-width record layout, as a NumPy structured dtype description and the matching struct format
+HAND_RECORD_DESCR = [
+    ('scenario', '<u4'),
+    ('hand', '<u4'),
+    ('player_cards', '|u1', (MAX_PLAYER_CARDS,)),
+    ('dealer_cards', '|u1', (MAX_CARDS,)),
+    ('hand_sizes', '|u1', (MAX_HANDS,)),
+    ('num_player_cards', '|u1'),
+    ('num_dealer_cards', '|u1'),
+    ('player_total', '|u1'),
+    ('dealer_total', '|u1'),
+    ('action', '|u1'),
+    ('result', '|u1'),
+    ('flags', '|u1'),
+    ('cards_remaining', '<u2'),
+    ('deck_penetration', '<f4'),
+    ('bet_amount', '<f8'),
+    ('money_change', '<f8'),
+    ('bankroll_after', '<f8'),
+]
+HAND_RECORD_STRUCT = struct.Struct(f'<II{MAX_PLAYER_CARDS}s{MAX_CARDS}s{MAX_HANDS}sBBBBBBBHfddd')
+
+_ACTION_CODES = {action: i for i, action in enumerate(PLAYER_ACTIONS)}
+_RESULT_CODES = {result: i for i, result in enumerate(RESULTS)}
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+# Room left in the header for the record count, which is only known on close
+_SHAPE_WIDTH = 20
+
+
+def check_npy_strategy(strategy):
+    """Raise ValueError if strategy can split into more hands than a record holds
+    
+    Called before a run starts, so a TableRules with a higher max_hands fails
+    up front rather than at its first long re-split.
+    """
+    table = strategy.table
+    if table is not None and table.rules.max_hands > MAX_HANDS:
+        raise ValueError(f"{strategy.short_name} splits into up to {table.rules.max_hands} hands, but .npy "
+                         f"hand records hold at most {MAX_HANDS}; write CSV hand records instead")
+
+
+def pack_hand_record(hand_record):
+    """Pack a HandRecord into the fixed-width binary layout"""
+    player_codes = hand_record.player_codes
+    dealer_codes = hand_record.dealer_codes
+    hand_sizes = hand_record.hand_sizes or bytes([len(player_codes)])
+    if len(hand_sizes) > MAX_HANDS:
+        raise ValueError(f"Rounds split into more than {MAX_HANDS} hands cannot be stored")
+    if max(hand_sizes) > MAX_CARDS or len(dealer_codes) > MAX_CARDS:
+        raise ValueError(f"Hands with more than {MAX_CARDS} cards cannot be stored")
+    
+    flags = ((PLAYER_BUSTED if hand_record.player_busted else 0)
+             | (DEALER_BUSTED if hand_record.dealer_busted else 0)
+             | (IS_BLACKJACK if hand_record.is_blackjack else 0)
+             | (RESHUFFLED_AFTER if hand_record.reshuffled_after else 0))
+    
+    return HAND_RECORD_STRUCT.pack(
+        hand_record.scenario_number,
+        hand_record.hand_number,
+        player_codes.ljust(MAX_PLAYER_CARDS, bytes([NO_CARD])),
+        dealer_codes.ljust(MAX_CARDS, bytes([NO_CARD])),
+        hand_sizes,
+        len(player_codes),
+        len(dealer_codes),
+        hand_record.player_total,
+        hand_record.dealer_total,
+        _ACTION_CODES[hand_record.player_action],
+        _RESULT_CODES[hand_record.result],
+        flags,
+        hand_record.cards_remaining,
+        hand_record.deck_penetration,
+        hand_record.bet_amount,
+        hand_record.money_change,
+        hand_record.bankroll_after,
+    )
+
+
+def npy_header(num_records):
+    """Build a .npy (format 1.0) header for num_records hand records"""
+    shape = f"({num_records},)".ljust(_SHAPE_WIDTH)
+    header = f"{{'descr': {HAND_RECORD_DESCR!r}, 'fortran_order': False, 'shape': {shape}, }}"
+    # The header ends in a newline and is padded so the data starts on a 64-byte boundary
+    padding = -(len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + ' ' * padding + '\n').encode('latin1')
+    return NPY_MAGIC + struct.pack('<H', len(header)) + header
+
+
+class NpyHandSink(HandRecordSink):
+    """Writes records as a fixed-width structured .npy array
+    
+    The file needs nothing but the standard library to write; NumPy can open
+    it with numpy.load(path, mmap_mode='r') and scan it without parsing text.
+    Records are buffered and the header's record count is filled in on close.
+    With resume_hands, an existing file is continued after its first
+    resume_hands records, as CSVHandSink does.
+    """
+    
+    def __init__(self, path, buffer_size=4096, resume_hands=None):
+        super().__init__()
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.buffered = 0
+        if resume_hands is None:
+            self.file = open(path, 'wb')
+            self.file.write(npy_header(0))
+        else:
+            # The header has a fixed size, so record n always starts at the same offset
+            end = len(npy_header(0)) + resume_hands * HAND_RECORD_STRUCT.size
+            if os.path.getsize(path) < end:
+                raise ValueError(f"{path} holds fewer than {resume_hands} hand records")
+            self.file = open(path, 'r+b')
+            self.file.truncate(end)
+            self.file.seek(end)
+            self.hands_written = resume_hands
+    
+    def write(self, hand_record):
+        self.buffer += pack_hand_record(hand_record)
+        self.buffered += 1
+        self.hands_written += 1
+        if self.buffered >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered records to the file"""
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.buffered = 0
+        self.file.flush()
+    
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.seek(0)
+            self.file.write(npy_header(self.hands_written))
+            self.file.close()
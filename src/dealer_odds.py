@@ -0,0 +1,176 @@
+# Exact dealer outcome probabilities
+from functools import lru_cache
+from deck import CompactDeck
+from player import Dealer
+from utils import EMPTY_HAND_STATE, HAND_TRANSITIONS, HAND_VALUES
+
+# Final dealer results, in the order used by the probability tuples below
+DEALER_OUTCOMES = (17, 18, 19, 20, 21, 'bust', 'blackjack')
+BUST = 5
+BLACKJACK = 6
+
+# Chance of each card points value (Ace = 1, index 0 unused) in an infinite shoe
+INFINITE_SHOE_PROBABILITIES = (0.0,) + (1 / 13,) * 9 + (4 / 13,)
+
+
+_BLACKJACK_OUTCOME = (0.0,) * BLACKJACK + (1.0,)
+_BUST_OUTCOME = (0.0,) * BUST + (1.0, 0.0)
+_STAND_OUTCOMES = tuple(tuple(1.0 if i == total else 0.0 for i in range(len(DEALER_OUTCOMES)))
+                        for total in range(5))
+
+
+def shoe_composition(num_decks):
+    """Return the card counts of a full shoe as a tuple indexed by points (index 0 unused)"""
+    return (0,) + (4 * num_decks,) * 9 + (16 * num_decks,)
+
+
+def remove_cards(counts, *points):
+    """Return a copy of a shoe composition with the given cards taken out"""
+    counts = list(counts)
+    for value in points:
+        if counts[value] <= 0:
+            raise ValueError(f"No cards worth {value} left in the shoe")
+        counts[value] -= 1
+    return tuple(counts)
+
+
+@lru_cache(maxsize=None)
+def _dealer_finish(state, num_cards, counts):
+    """Probabilities of each dealer outcome from a hand state and remaining shoe
+    
+    counts is a shoe composition tuple, or None for an infinite shoe.
+    Follows Dealer.should_hit: hit on 16 or less, stand on any 17 or more.
+    """
+    value = HAND_VALUES[state]
+    if num_cards == 2 and value == 21:
+        return _BLACKJACK_OUTCOME
+    if value > 21:
+        return _BUST_OUTCOME
+    if value >= 17:
+        return _STAND_OUTCOMES[value - 17]
+    
+    t17 = t18 = t19 = t20 = t21 = bust = blackjack = 0.0
+    transitions = HAND_TRANSITIONS[state]
+    remaining = None if counts is None else sum(counts)
+    for points in range(1, 11):
+        if counts is None:
+            weight = INFINITE_SHOE_PROBABILITIES[points]
+            rest = None
+        else:
+            count = counts[points]
+            if not count:
+                continue
+            weight = count / remaining
+            rest = counts[:points] + (count - 1,) + counts[points + 1:]
+        # Only whether the dealer holds two cards matters, so card counts past three share entries
+        o17, o18, o19, o20, o21, o_bust, o_blackjack = _dealer_finish(transitions[points], min(num_cards + 1, 3), rest)
+        t17 += weight * o17
+        t18 += weight * o18
+        t19 += weight * o19
+        t20 += weight * o20
+        t21 += weight * o21
+        bust += weight * o_bust
+        blackjack += weight * o_blackjack
+    return (t17, t18, t19, t20, t21, bust, blackjack)
+
+
+def clear_cache():
+    """Free the memoized dealer results; top-level solves call this once they are done
+    
+    Entries are keyed on shoe compositions, so a finite shoe leaves millions
+    of them behind that no later solve of another shoe can reuse.
+    """
+    _dealer_finish.cache_clear()
+
+
+def dealer_outcome_probabilities(upcard_points, counts=None):
+    """Return the dealer outcome probabilities for an upcard as a tuple ordered like DEALER_OUTCOMES"""
+    return _dealer_finish(HAND_TRANSITIONS[EMPTY_HAND_STATE][upcard_points], 1, counts)
+
+
+def dealer_outcome_distribution(upcard_points, counts=None):
+    """Return the dealer's final-result distribution for an upcard
+    
+    upcard_points is the upcard's points value (Ace = 1, 10/J/Q/K = 10).
+    counts is the shoe composition the hole card and hits are drawn from
+    (with the upcard already removed), or None for an infinite shoe.
+    Returns a dict mapping each of DEALER_OUTCOMES to its probability.
+    """
+    return dict(zip(DEALER_OUTCOMES, dealer_outcome_probabilities(upcard_points, counts)))
+
+
+def dealer_outcome_table(num_decks=None):
+    """Return {upcard points: outcome distribution} for a fresh shoe
+    
+    num_decks=None uses an infinite shoe.
+    """
+    table = {}
+    try:
+        for upcard in range(1, 11):
+            counts = None if num_decks is None else remove_cards(shoe_composition(num_decks), upcard)
+            table[upcard] = dealer_outcome_distribution(upcard, counts)
+    finally:
+        clear_cache()
+    return table
+
+
+def dealer_bust_probability(num_decks=None):
+    """Return the overall chance the dealer busts off the top of a fresh shoe"""
+    if num_decks is None:
+        upcard_probabilities = INFINITE_SHOE_PROBABILITIES
+    else:
+        counts = shoe_composition(num_decks)
+        upcard_probabilities = [count / sum(counts) for count in counts]
+    
+    table = dealer_outcome_table(num_decks)
+    return sum(upcard_probabilities[upcard] * table[upcard]['bust'] for upcard in range(1, 11))
+
+
+def format_dealer_table(num_decks=None):
+    """Format the dealer outcome table as text, one row per upcard"""
+    table = dealer_outcome_table(num_decks)
+    shoe = "infinite shoe" if num_decks is None else f"{num_decks}-deck shoe"
+    lines = [f"Dealer outcomes by upcard ({shoe}, dealer stands on all 17s)",
+             f"{'Upcard':<8}" + ''.join(f"{str(outcome):>11}" for outcome in DEALER_OUTCOMES)]
+    for upcard in range(2, 11):
+        lines.append(f"{upcard:<8}" + ''.join(f"{table[upcard][o] * 100:>10.2f}%" for o in DEALER_OUTCOMES))
+    lines.append(f"{'A':<8}" + ''.join(f"{table[1][o] * 100:>10.2f}%" for o in DEALER_OUTCOMES))
+    lines.append(f"Overall bust probability: {dealer_bust_probability(num_decks) * 100:.2f}%")
+    return '\n'.join(lines)
+
+
+def simulate_dealer_outcomes(num_decks, num_hands, rng=None):
+    """Sample dealer hands with Deck and Dealer to cross-check the exact numbers
+    
+    Hands are dealt back to back from one shoe that is reshuffled at the cut
+    card, as in the simulator. Returns {upcard points: outcome frequencies}.
+    """
+    deck = CompactDeck(num_decks, rng)
+    dealer = Dealer()
+    counts = {upcard: [0] * len(DEALER_OUTCOMES) for upcard in range(1, 11)}
+    
+    for _ in range(num_hands):
+        dealer.clear_hand()
+        dealer.add_card(deck.deal_card())
+        dealer.add_card(deck.deal_card())
+        upcard = dealer.get_upcard().points
+        
+        if dealer.get_hand_value() == 21:
+            counts[upcard][BLACKJACK] += 1
+        else:
+            while dealer.should_hit():
+                dealer.add_card(deck.deal_card())
+            value = dealer.get_hand_value()
+            counts[upcard][BUST if value > 21 else value - 17] += 1
+        deck.reshuffle_after_hand()
+    
+    frequencies = {}
+    for upcard, upcard_counts in counts.items():
+        hands = sum(upcard_counts) or 1
+        frequencies[upcard] = {outcome: count / hands for outcome, count in zip(DEALER_OUTCOMES, upcard_counts)}
+    return frequencies
+
+
+if __name__ == '__main__':
+    import sys
+    print(format_dealer_table(int(sys.argv[1]) if len(sys.argv) > 1 else None))
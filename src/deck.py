@@ -1,11 +1,22 @@
 # Deck module
 import random
 
+SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+
 class Card:
     """Represents a single card in the deck"""
+    __slots__ = ('suit', 'rank', 'points', 'code')
+    
     def __init__(self, suit, rank):
         self.suit = suit
         self.rank = rank
+        # Hard value used by the hand-state table (Ace counts as 1)
+        self.points = 1 if rank == 'A' else self.value()
+        # Compact card code (suit index * 13 + rank index), an index into CARD_TABLE
+        self.code = SUIT_INDEX[suit] * 13 + RANK_INDEX[rank]
         
     def value(self):
         """Return the value of the card for blackjack"""
@@ -19,6 +30,30 @@ class Card:
     def __str__(self):
         return f"{self.rank} of {self.suit}"
 
+# Card counting systems: the tag added to the running count for each card,
+# indexed by card points (Ace = 1, ten-value cards = 10; index 0 is unused)
+COUNT_SYSTEMS = {
+    'hi-lo': (0, -1, 1, 1, 1, 1, 1, 0, 0, 0, -1),
+    'ko': (0, -1, 1, 1, 1, 1, 1, 1, 0, 0, -1),
+    'hi-opt-i': (0, 0, 0, 1, 1, 1, 1, 0, 0, 0, -1),
+    'zen': (0, -1, 1, 1, 2, 2, 2, 1, 0, 0, -2),
+}
+
+# True counts are bucketed by floor and clamped to this range, so extreme
+# counts late in a shoe share an end bucket
+TRUE_COUNT_MIN = -6
+TRUE_COUNT_MAX = 6
+
+
+def count_tags(count_system):
+    """Return the count tags of a system by card points, checking its name"""
+    try:
+        return COUNT_SYSTEMS[count_system]
+    except KeyError:
+        raise ValueError(f"Unknown count system {count_system!r}; "
+                         f"choose from: {', '.join(COUNT_SYSTEMS)}") from None
+
+
 class CutCard:
     """Special card used to mark when deck should be reshuffled"""
     def __init__(self):
@@ -29,9 +64,14 @@ class CutCard:
 
 class Deck:
     """Represents a multi-deck shoe with cut card mechanism"""
-    def __init__(self, num_decks=6):
+    def __init__(self, num_decks=6, rng=None, count_system='hi-lo'):
         self.num_decks = num_decks
-        self.cards = []
+        # Source of shuffles and cut card positions (defaults to the global random module)
+        self.rng = rng if rng is not None else random
+        # Running count of the dealt cards since the last shuffle, under count_system
+        self.count_system = count_system
+        self.count_tags = count_tags(count_system)
+        self.running_count = 0
         self.cut_card_position = 0
         self.cut_card_reached = False
         self.cards_dealt_since_shuffle = 0
@@ -40,12 +80,9 @@ class Deck:
     
     def create_single_deck(self):
         """Create a single 52-card deck"""
-        suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        
         deck = []
-        for suit in suits:
-            for rank in ranks:
+        for suit in SUITS:
+            for rank in RANKS:
                 deck.append(Card(suit, rank))
         return deck
     
@@ -61,17 +98,18 @@ class Deck:
         self.place_cut_card()
         self.cut_card_reached = False
         self.cards_dealt_since_shuffle = 0
+        self.running_count = 0
     
     def shuffle(self):
         """Shuffle the multi-deck shoe"""
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
     
     def place_cut_card(self):
         """Place cut card at 75th percentile (random position within that range)"""
         # 75th percentile means 25% of cards remain when cut card is reached
         min_position = int(self.total_cards * 0.70)  # 70-80% range for more realism
         max_position = int(self.total_cards * 0.80)
-        self.cut_card_position = random.randint(min_position, max_position)
+        self.cut_card_position = self.rng.randint(min_position, max_position)
     
     def deal_card(self):
         """Deal one card from the deck"""
@@ -85,6 +123,7 @@ class Deck:
         
         card = self.cards.pop()
         self.cards_dealt_since_shuffle += 1
+        self.running_count += self.count_tags[card.points]
         return card
     
     def should_reshuffle(self):
@@ -104,6 +143,10 @@ class Deck:
         """Return how much of the deck has been dealt (penetration percentage)"""
         return (self.cards_dealt_since_shuffle / self.total_cards) * 100
     
+    def true_count(self):
+        """Running count per deck still in the shoe"""
+        return self.running_count * 52 / max(self.cards_remaining(), 1)
+    
     def get_deck_info(self):
         """Return information about the current deck state"""
         return {
@@ -113,5 +156,71 @@ class Deck:
             'cards_dealt': self.cards_dealt_since_shuffle,
             'penetration': self.penetration_percentage(),
             'cut_card_position': self.cut_card_position,
-            'cut_card_reached': self.cut_card_reached
+            'cut_card_reached': self.cut_card_reached,
+            'count_system': self.count_system,
+            'running_count': self.running_count,
+            'true_count': self.true_count()
         }
+
+
+# One shared Card instance per card code (suit index * 13 + rank index), in the
+# same order Deck.create_single_deck builds a deck
+CARD_TABLE = [Card(suit, rank) for suit in SUITS for rank in RANKS]
+
+
+class CompactDeck(Deck):
+    """Multi-deck shoe stored as a bytearray of card codes
+    
+    Drop-in replacement for Deck: the shoe is a single reusable buffer that is
+    reset and shuffled in place, and cards are dealt by moving a cursor instead
+    of popping objects. Dealt cards are shared instances from CARD_TABLE.
+    Given the same random state it deals exactly the same cards as Deck.
+    """
+    def __init__(self, num_decks=6, rng=None, count_system='hi-lo'):
+        self._template = bytes(range(52)) * num_decks
+        self._buffer = bytearray(self._template)
+        self._cursor = 0
+        # Count tags by card code, so dealing needs no Card lookup to count
+        self._code_tags = tuple(count_tags(count_system)[card.points] for card in CARD_TABLE)
+        super().__init__(num_decks, rng, count_system)
+    
+    def reset(self):
+        """Restore the unshuffled shoe in place, then shuffle and place the cut card"""
+        self._buffer[:] = self._template
+        self._cursor = len(self._buffer)
+        
+        self.shuffle()
+        self.place_cut_card()
+        self.cut_card_reached = False
+        self.cards_dealt_since_shuffle = 0
+        self.running_count = 0
+    
+    def shuffle(self):
+        """Fisher-Yates shuffle of the shoe buffer in place"""
+        # shuffle works on any mutable sequence, so it consumes the random
+        # stream exactly as it does for Deck's list of Card objects
+        self.rng.shuffle(self._buffer)
+    
+    def deal_card(self):
+        """Deal one card from the deck"""
+        if self._cursor == 0:
+            self.reset()  # Emergency reshuffle if somehow empty
+        
+        # Check if we've reached the cut card position
+        if self.cards_dealt_since_shuffle >= self.cut_card_position:
+            self.cut_card_reached = True
+        
+        self._cursor -= 1
+        self.cards_dealt_since_shuffle += 1
+        code = self._buffer[self._cursor]
+        self.running_count += self._code_tags[code]
+        return CARD_TABLE[code]
+    
+    @property
+    def cards(self):
+        """The undealt cards as a list, in Deck's order (the next card is last)"""
+        return [CARD_TABLE[code] for code in self._buffer[:self._cursor]]
+    
+    def cards_remaining(self):
+        """Return number of cards remaining in the shoe"""
+        return self._cursor
@@ -1,22 +1,84 @@
 # Game module
-from deck import Deck
+import math
+from deck import CARD_TABLE, TRUE_COUNT_MAX, TRUE_COUNT_MIN, Deck, CompactDeck
 from player import Player, Dealer
-from utils import calculate_hand_value
+from betting import default_betting_policy
+from profiling import PhaseTimer
+from rng import RandomStream
+from strategy import DOUBLE, HIT, SURRENDER
+from utils import HAND_VALUES, Hand, RunningStats, calculate_hand_value
+
+
+# Per-hand statistics a precision target can be set on, by GameStats attribute
+PRECISION_METRICS = {
+    'dealer_bust': 'dealer_bust_stats',
+    'ev': 'return_stats',
+}
+DEFAULT_CHECK_INTERVAL = 1000
+
+
+def precision_stats(stats, metric):
+    """Return the RunningStats a precision target on metric is checked against"""
+    try:
+        return getattr(stats, PRECISION_METRICS[metric])
+    except KeyError:
+        raise ValueError(f"Unknown precision metric {metric!r}; "
+                         f"choose from: {', '.join(PRECISION_METRICS)}") from None
+
+
+def precision_reached(running, precision_target):
+    """True once the standard error of running is at or below precision_target"""
+    return running.count > 1 and running.standard_error() <= precision_target
+
+
+def merge_true_count_buckets(buckets, other):
+    """Add the per-bucket counters of other into buckets"""
+    for bucket, counts in other.items():
+        merged = buckets.setdefault(bucket, [0, 0, 0, 0.0])
+        for i, value in enumerate(counts):
+            merged[i] += value
+    return buckets
+
+
+def true_count_table(buckets):
+    """Return {bucket: {'hands', 'win_rate', 'dealer_bust_rate', 'mean_money_change'}} in bucket order"""
+    table = {}
+    for bucket in sorted(buckets):
+        hands, player_wins, dealer_busts, money_change = buckets[bucket]
+        table[bucket] = {
+            'hands': hands,
+            'win_rate': player_wins / hands,
+            'dealer_bust_rate': dealer_busts / hands,
+            'mean_money_change': money_change / hands,
+        }
+    return table
 
 
 class HandRecord:
-    """Records detailed information about a single hand"""
+    """Records detailed information about a single hand
+    
+    Cards are stored as bytes of card codes; the "10 of Hearts" style strings
+    are only built when player_cards or dealer_cards is read (e.g. on export).
+    After a split, player_codes holds the cards of every hand in play order,
+    hand_sizes the number of cards of each hand, and player_total the total
+    of the first hand; player_hands and player_totals give every hand.
+    """
+    __slots__ = ('hand_number', 'scenario_number', 'player_codes', 'dealer_codes',
+                 'player_total', 'dealer_total', 'player_action', 'bet_amount', 'result',
+                 'money_change', 'player_busted', 'dealer_busted', 'bankroll_after', 'is_blackjack',
+                 'hand_sizes', 'deck_penetration', 'cards_remaining', 'reshuffled_after')
     
-    def __init__(self, hand_number, scenario_number, player_cards, dealer_cards, 
+    def __init__(self, hand_number, scenario_number, player_codes, dealer_codes, 
                  player_total, dealer_total, player_action, bet_amount, result, 
-                 money_change, player_busted, dealer_busted, bankroll_after, is_blackjack=False):
+                 money_change, player_busted, dealer_busted, bankroll_after, is_blackjack=False,
+                 hand_sizes=None):
         self.hand_number = hand_number
         self.scenario_number = scenario_number
-        self.player_cards = player_cards  # List of card strings
-        self.dealer_cards = dealer_cards  # List of card strings
+        self.player_codes = player_codes  # bytes of card codes
+        self.dealer_codes = dealer_codes  # bytes of card codes
         self.player_total = player_total
         self.dealer_total = dealer_total
-        self.player_action = player_action  # "Hit" or "Stand"
+        self.player_action = player_action  # "Stand", "Hit", "Blackjack", "Double", "Split" or "Surrender"
         self.bet_amount = bet_amount
         self.result = result  # "Win", "Loss", "Draw"
         self.money_change = money_change
@@ -24,26 +86,68 @@ class HandRecord:
         self.dealer_busted = dealer_busted
         self.bankroll_after = bankroll_after
         self.is_blackjack = is_blackjack  # Player got natural blackjack
+        self.hand_sizes = hand_sizes  # bytes of cards per hand after a split, None without one
         # Deck tracking attributes (set after creation)
         self.deck_penetration = 0.0
         self.cards_remaining = 0
         self.reshuffled_after = False
+    
+    @property
+    def player_cards(self):
+        """List of the player's card strings"""
+        return [str(CARD_TABLE[code]) for code in self.player_codes]
+    
+    @property
+    def dealer_cards(self):
+        """List of the dealer's card strings"""
+        return [str(CARD_TABLE[code]) for code in self.dealer_codes]
+    
+    @property
+    def player_hands(self):
+        """The card codes of each of the player's hands (one unless split)"""
+        if self.hand_sizes is None:
+            return [self.player_codes]
+        hands = []
+        start = 0
+        for size in self.hand_sizes:
+            hands.append(self.player_codes[start:start + size])
+            start += size
+        return hands
+    
+    @property
+    def player_totals(self):
+        """The final total of each of the player's hands"""
+        return [calculate_hand_value([CARD_TABLE[code] for code in hand]) for hand in self.player_hands]
+    
+    @property
+    def cards_count(self):
+        """Total number of cards dealt in the hand"""
+        return len(self.player_codes) + len(self.dealer_codes)
 
 
 class GameResult:
     """Represents the result of a single game"""
+    __slots__ = ('player_wins', 'dealer_wins', 'is_draw', 'dealer_busted', 'player_busted',
+                 'bet_amount', 'is_blackjack', 'money_change', 'true_count', 'wagered')
     
-    def __init__(self, player_wins, dealer_wins, is_draw, dealer_busted, player_busted, bet_amount=0.0, is_blackjack=False):
+    def __init__(self, player_wins, dealer_wins, is_draw, dealer_busted, player_busted, bet_amount=0.0, is_blackjack=False,
+                 money_change=None, wagered=None):
         self.player_wins = player_wins
         self.dealer_wins = dealer_wins
         self.is_draw = is_draw
         self.dealer_busted = dealer_busted
         self.player_busted = player_busted
-        self.bet_amount = float(bet_amount)
+        self.bet_amount = float(bet_amount)  # Initial bet of the round
         self.is_blackjack = is_blackjack  # Player got natural blackjack
+        self.true_count = 0.0  # Shoe true count before the round was dealt
+        # Total money put down, including doubles, splits and insurance
+        self.wagered = self.bet_amount if wagered is None else float(wagered)
         
-        # Calculate money won/lost
-        if player_wins:
+        # Calculate money won/lost; rounds with doubles, splits, surrender or
+        # insurance pass their net money change explicitly
+        if money_change is not None:
+            self.money_change = float(money_change)
+        elif player_wins:
             if is_blackjack:
                 # Blackjack pays 3:2 (1.5x the bet)
                 self.money_change = self.bet_amount * 1.5
@@ -79,6 +183,18 @@ class GameStats:
         self.target_multiplier = target_multiplier
         self.hand_records = []  # Store detailed hand records
         self.current_scenario = 1  # Track which scenario we're in
+        self.phase_timer = None  # PhaseTimer of the run when timing was enabled
+        # Outcomes by true count before the deal (floored and clamped to
+        # TRUE_COUNT_MIN..TRUE_COUNT_MAX from deck.py): bucket -> [hands, player wins,
+        # dealer busts, money change]
+        self.true_count_buckets = {}
+        # Per-hand streaming statistics, mergeable across scenarios and workers
+        self.money_stats = RunningStats()  # Money change per hand
+        self.return_stats = RunningStats()  # Money change per unit bet (the EV estimate)
+        self.drawdown_stats = RunningStats()  # Peak bankroll minus bankroll after each hand
+        self.dealer_bust_stats = RunningStats()  # 1.0 when the dealer busted, else 0.0
+        self.peak_bankroll = self.current_bankroll
+        self.max_drawdown = 0.0
     
     def add_result(self, result):
         """Add a game result to the statistics"""
@@ -95,12 +211,40 @@ class GameStats:
         
         if result.dealer_busted:
             self.dealer_busts += 1
+            self.dealer_bust_stats.add(1.0)
+        else:
+            self.dealer_bust_stats.add(0.0)
         if result.player_busted:
             self.player_busts += 1
             
         # Update money tracking
         self.current_bankroll += result.money_change
-        self.total_bet += result.bet_amount
+        self.total_bet += result.wagered
+        self.money_stats.add(result.money_change)
+        if result.bet_amount:  # A zero bet (e.g. a sat-out hand) has no return per unit
+            self.return_stats.add(result.money_change / result.bet_amount)
+        
+        if self.current_bankroll > self.peak_bankroll:
+            self.peak_bankroll = self.current_bankroll
+        drawdown = self.peak_bankroll - self.current_bankroll
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+        self.drawdown_stats.add(drawdown)
+        
+        bucket = math.floor(result.true_count)
+        if bucket < TRUE_COUNT_MIN:
+            bucket = TRUE_COUNT_MIN
+        elif bucket > TRUE_COUNT_MAX:
+            bucket = TRUE_COUNT_MAX
+        counts = self.true_count_buckets.get(bucket)
+        if counts is None:
+            counts = self.true_count_buckets[bucket] = [0, 0, 0, 0.0]
+        counts[0] += 1
+        if result.player_wins:
+            counts[1] += 1
+        if result.dealer_busted:
+            counts[2] += 1
+        counts[3] += result.money_change
         
         if result.money_change > 0:
             self.total_winnings += result.money_change
@@ -143,14 +287,116 @@ class GameStats:
         return summary
 
 
+class ScenarioSummary:
+    """Aggregates the GameStats of several scenarios in a single pass
+    
+    More scenarios can be folded in with add() as they finish.
+    """
+    
+    def __init__(self, results, starting_bankroll):
+        self.starting_bankroll = starting_bankroll
+        self.num_scenarios = 0
+        self.total_profit = 0.0
+        self.profitable_scenarios = 0
+        self.busted_scenarios = 0
+        self.target_reached_scenarios = 0
+        self.best_result = None
+        self.worst_result = None
+        self.best_profit = 0.0
+        self.worst_profit = 0.0
+        self.max_drawdown = 0.0
+        self.profit_stats = RunningStats()  # Profit per scenario
+        self.money_stats = RunningStats()
+        self.return_stats = RunningStats()
+        self.drawdown_stats = RunningStats()
+        self.dealer_bust_stats = RunningStats()
+        self.phase_timer = None  # Merged PhaseTimer when the scenarios were timed
+        self.true_count_buckets = {}
+        
+        for stats in results:
+            self.add(stats)
+    
+    def add(self, stats):
+        """Fold the GameStats of one more scenario into the summary"""
+        profit = stats.current_bankroll - self.starting_bankroll
+        first = self.num_scenarios == 0
+        self.num_scenarios += 1
+        self.total_profit += profit
+        self.profit_stats.add(profit)
+        if profit > 0:
+            self.profitable_scenarios += 1
+        if stats.current_bankroll <= 0:
+            self.busted_scenarios += 1
+        if stats.reached_target:
+            self.target_reached_scenarios += 1
+        if first or profit > self.best_profit:
+            self.best_profit, self.best_result = profit, stats
+        if first or profit < self.worst_profit:
+            self.worst_profit, self.worst_result = profit, stats
+        if stats.max_drawdown > self.max_drawdown:
+            self.max_drawdown = stats.max_drawdown
+        self.money_stats.merge(stats.money_stats)
+        self.return_stats.merge(stats.return_stats)
+        self.drawdown_stats.merge(stats.drawdown_stats)
+        self.dealer_bust_stats.merge(stats.dealer_bust_stats)
+        merge_true_count_buckets(self.true_count_buckets, stats.true_count_buckets)
+        if stats.phase_timer is not None:
+            if self.phase_timer is None:
+                self.phase_timer = PhaseTimer()
+            self.phase_timer.merge(stats.phase_timer)
+    
+    def rate(self, count):
+        """Percentage of scenarios"""
+        return (count / self.num_scenarios) * 100 if self.num_scenarios else 0.0
+    
+    @property
+    def average_profit(self):
+        return self.total_profit / self.num_scenarios if self.num_scenarios else 0.0
+    
+    @property
+    def success_rate(self):
+        return self.rate(self.profitable_scenarios)
+    
+    @property
+    def bust_rate(self):
+        return self.rate(self.busted_scenarios)
+    
+    @property
+    def target_rate(self):
+        return self.rate(self.target_reached_scenarios)
+
+
+# Per-scenario values compared between strategies in paired (common random numbers) runs
+PAIRED_METRICS = {
+    'Profit': lambda stats: stats.current_bankroll - stats.starting_bankroll,
+    'Return_Per_Unit_Bet': lambda stats: stats.return_stats.mean,
+    'Dealer_Bust_Rate': lambda stats: stats.dealer_bust_stats.mean,
+}
+
+
+def paired_difference_stats(results, baseline_results, value):
+    """RunningStats of value(stats) - value(baseline stats), scenario by scenario
+    
+    Only meaningful when both lists played the same shoes scenario by
+    scenario; scenarios missing from either list are ignored.
+    """
+    differences = RunningStats()
+    for stats, baseline in zip(results, baseline_results):
+        differences.add(value(stats) - value(baseline))
+    return differences
+
+
 class Game:
     """Manages a single blackjack game"""
     
-    def __init__(self, num_decks=6):
-        self.deck = Deck(num_decks)
+    def __init__(self, num_decks=6, compact_shoe=True, rng=None, timer=None, count_system='hi-lo'):
+        # The compact shoe deals the same cards as Deck without allocating Card objects
+        shoe_class = CompactDeck if compact_shoe else Deck
+        self.deck = shoe_class(num_decks, rng, count_system)
         self.player = Player("Player")
         self.dealer = Dealer()
         self.reshuffle_pending = False
+        self.timer = timer  # Optional PhaseTimer timing each phase of play_round
     
     def deal_initial_cards(self):
         """Deal initial two cards to player and dealer"""
@@ -164,8 +410,9 @@ class Game:
     
     def play_player_turn(self, strategy):
         """Play the player's turn using the given strategy"""
+        upcard = self.dealer.hand[0].points
         while not self.player.is_busted():
-            action = strategy.decide(self.player.hand)
+            action = strategy.decide(self.player.hand, upcard)
             if action == 'hit':
                 self.player.add_card(self.deck.deal_card())
             else:  # stand
@@ -186,20 +433,8 @@ class Game:
     
     def is_blackjack(self, hand):
         """Check if a hand is a natural blackjack (Ace + 10-value card in first 2 cards)"""
-        if len(hand) != 2:
-            return False
-        
-        # Check if we have exactly one Ace and one 10-value card
-        has_ace = False
-        has_ten = False
-        
-        for card in hand:
-            if card.rank == 'A':
-                has_ace = True
-            elif card.value() == 10:  # 10, J, Q, K
-                has_ten = True
-        
-        return has_ace and has_ten
+        # Two cards can only total 21 as an Ace plus a 10-value card
+        return len(hand) == 2 and calculate_hand_value(hand) == 21
     
     def determine_winner(self, bet_amount=10.0):
         """Determine the winner and return a GameResult"""
@@ -241,94 +476,286 @@ class Game:
         else:
             return GameResult(False, False, True, False, False, bet_amount, False)
     
-    def play_round(self, strategy, bet_amount=10.0, hand_number=1, scenario_number=1, stats=None):
-        """Play a complete round and return the result with detailed hand record"""
+    def record_hand(self, stats, sink, result, hand_number, scenario_number, player_codes, player_total,
+                    player_action, reshuffled, hand_sizes=None):
+        """Create the HandRecord of a finished round and write it to sink (or stats.hand_records)"""
+        # Determine result string
+        if result.player_wins:
+            if result.is_blackjack:
+                result_str = "Blackjack"
+            else:
+                result_str = "Win"
+        elif result.dealer_wins:
+            result_str = "Loss" 
+        else:
+            result_str = "Draw"
+        
+        # Calculate bankroll after this hand
+        bankroll_after = stats.current_bankroll + result.money_change
+        
+        hand_record = HandRecord(
+            hand_number=hand_number,
+            scenario_number=scenario_number,
+            player_codes=player_codes,
+            dealer_codes=bytes([card.code for card in self.dealer.hand]),
+            player_total=player_total,
+            dealer_total=self.dealer.get_hand_value(),
+            player_action=player_action,
+            bet_amount=result.bet_amount,
+            result=result_str,
+            money_change=result.money_change,
+            player_busted=result.player_busted,
+            dealer_busted=result.dealer_busted,
+            bankroll_after=bankroll_after,
+            is_blackjack=result.is_blackjack,
+            hand_sizes=hand_sizes
+        )
+        
+        # Add deck information to hand record
+        hand_record.deck_penetration = self.deck.penetration_percentage()
+        hand_record.cards_remaining = self.deck.cards_remaining()
+        hand_record.reshuffled_after = reshuffled
+        
+        if sink is not None:
+            sink.write(hand_record)
+        else:
+            stats.hand_records.append(hand_record)
+    
+    def play_table_round(self, table, bet_amount=10.0, hand_number=1, scenario_number=1, stats=None, sink=None,
+                         bankroll=None):
+        """Play a round with doubles, splits, late surrender and insurance from a StrategyTable
+        
+        Every decision is one lookup in the table's precompiled tuples by
+        hand state and dealer upcard, so the richer rules add no per-call
+        strategy logic. The dealer peeks under an Ace or ten: naturals settle
+        before the player acts. Split hands are played left to right, each
+        drawing its second card when its turn comes. bankroll (None =
+        unlimited) caps the initial bet plus everything added for doubles,
+        splits and insurance; a double that cannot be covered is played as
+        the table's fallback instead, and an uncovered split is not made.
+        """
+        timer = self.timer
+        if timer is not None:
+            start = timer.clock()
+        
+        true_count = self.deck.true_count()
         self.deal_initial_cards()
         
-        # Record initial cards
-        player_cards = [str(card) for card in self.player.hand]
-        dealer_cards = [str(card) for card in self.dealer.hand]
+        rules = table.rules
+        deal_card = self.deck.deal_card
+        player_hand = self.player.hand
+        dealer_hand = self.dealer.hand
+        upcard = dealer_hand[0].points
+        player_blackjack = HAND_VALUES[player_hand.state] == 21
+        dealer_blackjack = HAND_VALUES[dealer_hand.state] == 21
+        
+        if timer is not None:
+            start = timer.lap('deal', start)
+        
+        available = math.inf if bankroll is None else bankroll - bet_amount
+        wagered = bet_amount
+        money_change = 0.0
+        
+        # Insurance is decided from the count before the deal, which the hole card has not touched
+        insurance = bet_amount / 2
+        if (upcard == 1 and rules.insurance_true_count is not None and true_count >= rules.insurance_true_count
+                and available >= insurance):
+            available -= insurance
+            wagered += insurance
+            money_change += 2 * insurance if dealer_blackjack else -insurance
+        
+        hands = [player_hand]
+        bets = [bet_amount]
+        player_action = "Stand"
+        surrendered = False
+        
+        if player_blackjack:
+            player_action = "Blackjack"
+        elif not dealer_blackjack:
+            i = 0
+            while i < len(hands):
+                hand = hands[i]
+                split_hand = len(hands) > 1
+                if len(hand) == 1:
+                    hand.append(deal_card())  # A split hand draws its second card on its turn
+                
+                # Split (and re-split) while the table says so and the rules and bankroll allow
+                points = hand[0].points
+                while (len(hand) == 2 and hand[1].points == points and len(hands) < rules.max_hands
+                       and table.split[points * 11 + upcard] and available >= bets[i]
+                       and (points != 1 or not split_hand or rules.resplit_aces)):
+                    available -= bets[i]
+                    wagered += bets[i]
+                    first_card, second_card = hand
+                    hands.insert(i + 1, Hand((second_card,)))
+                    bets.insert(i + 1, bets[i])
+                    hand.clear()
+                    hand.append(first_card)
+                    hand.append(deal_card())
+                    split_hand = True
+                    player_action = "Split"
+                
+                # Split Aces take one card each unless the rules allow drawing
+                if points == 1 and split_hand and not rules.hit_split_aces:
+                    i += 1
+                    continue
+                
+                actions = table.split_first if split_hand else table.first
+                while HAND_VALUES[hand.state] <= 21:
+                    action = actions[hand.state * 11 + upcard]
+                    if action == HIT:
+                        hand.append(deal_card())
+                        if player_action == "Stand":
+                            player_action = "Hit"
+                        actions = table.later
+                    elif action == DOUBLE:
+                        if available < bets[i]:
+                            actions = table.later  # Played as the chart's fallback
+                            continue
+                        available -= bets[i]
+                        wagered += bets[i]
+                        bets[i] *= 2
+                        hand.append(deal_card())
+                        if player_action != "Split":
+                            player_action = "Double"
+                        break
+                    elif action == SURRENDER:
+                        surrendered = True
+                        player_action = "Surrender"
+                        break
+                    else:  # Stand
+                        break
+                i += 1
+        
+        if timer is not None:
+            start = timer.lap('player', start)
+        
+        player_busted = all(HAND_VALUES[hand.state] > 21 for hand in hands)
+        # Naturals were settled by the peek; otherwise the dealer plays out any live hand
+        if not (player_blackjack or dealer_blackjack or surrendered or player_busted):
+            self.play_dealer_turn()
+        
+        if timer is not None:
+            start = timer.lap('dealer', start)
+        
+        dealer_value = HAND_VALUES[dealer_hand.state]
+        dealer_busted = dealer_value > 21
+        is_blackjack = player_blackjack and not dealer_blackjack
+        if player_blackjack or dealer_blackjack:
+            if is_blackjack:
+                money_change += bet_amount * 1.5
+            elif not player_blackjack:
+                money_change -= bet_amount
+        elif surrendered:
+            money_change -= bet_amount / 2
+        else:
+            for hand, bet in zip(hands, bets):
+                value = HAND_VALUES[hand.state]
+                if value > 21 or (value < dealer_value and not dealer_busted):
+                    money_change -= bet
+                elif dealer_busted or value > dealer_value:
+                    money_change += bet
+        
+        result = GameResult(money_change > 0, money_change < 0, money_change == 0, dealer_busted, player_busted,
+                            bet_amount, is_blackjack, money_change, wagered)
+        result.true_count = true_count
+        
+        if timer is not None:
+            start = timer.lap('result', start)
+        
+        reshuffled = self.check_reshuffle_after_hand()
+        
+        if timer is not None:
+            start = timer.lap('shuffle', start)
+        
+        if stats is not None:
+            self.record_hand(stats, sink, result, hand_number, scenario_number,
+                             bytes([card.code for hand in hands for card in hand]),
+                             HAND_VALUES[hands[0].state], player_action, reshuffled,
+                             bytes([len(hand) for hand in hands]) if len(hands) > 1 else None)
+            
+            if timer is not None:
+                timer.lap('record', start)
+        
+        return result
+    
+    def play_round(self, strategy, bet_amount=10.0, hand_number=1, scenario_number=1, stats=None, sink=None,
+                   bankroll=None):
+        """Play a complete round and return the result with detailed hand record
+        
+        A hand record is created when stats is provided; it is written to sink
+        if one is given, otherwise appended to stats.hand_records.
+        
+        Strategies with a StrategyTable play the full rules instead (see
+        play_table_round); bankroll limits the money they can add to the
+        bet for doubles, splits and insurance.
+        """
+        if strategy.table is not None:
+            return self.play_table_round(strategy.table, bet_amount, hand_number, scenario_number, stats, sink,
+                                         bankroll)
+        
+        timer = self.timer
+        if timer is not None:
+            start = timer.clock()
+        
+        true_count = self.deck.true_count()
+        self.deal_initial_cards()
         
         # Check for blackjacks first
         player_blackjack = self.is_blackjack(self.player.hand)
         dealer_blackjack = self.is_blackjack(self.dealer.hand)
         
+        if timer is not None:
+            start = timer.lap('deal', start)
+        
         # Track player actions
         player_action = "Stand"  # Default
         
         # If player has blackjack, no hitting allowed
         if not player_blackjack:
             # Play player turn and track if they hit
+            upcard = self.dealer.hand[0].points
             while not self.player.is_busted():
-                action = strategy.decide(self.player.hand)
+                action = strategy.decide(self.player.hand, upcard)
                 if action == 'hit':
                     player_action = "Hit"
                     self.player.add_card(self.deck.deal_card())
-                    player_cards.append(str(self.player.hand[-1]))  # Add new card to record
                 else:  # stand
                     break
         else:
             player_action = "Blackjack"
         
+        if timer is not None:
+            start = timer.lap('player', start)
+        
         # Dealer plays only if player doesn't have blackjack or both have blackjack
         if not player_blackjack or dealer_blackjack:
             if not self.player.is_busted():
                 self.play_dealer_turn()
         
-        # Update dealer cards if dealer drew more
-        if len(self.dealer.hand) > 2:
-            dealer_cards = [str(card) for card in self.dealer.hand]
+        if timer is not None:
+            start = timer.lap('dealer', start)
         
         result = self.determine_winner(bet_amount)
+        result.true_count = true_count
+        
+        if timer is not None:
+            start = timer.lap('result', start)
         
         # Check for reshuffle after hand is complete
         reshuffled = self.check_reshuffle_after_hand()
         
+        if timer is not None:
+            start = timer.lap('shuffle', start)
+        
         # Create detailed hand record if stats provided
         if stats is not None:
-            player_total = self.player.get_hand_value()
-            dealer_total = self.dealer.get_hand_value()
-            
-            # Determine result string
-            if result.player_wins:
-                if result.is_blackjack:
-                    result_str = "Blackjack"
-                else:
-                    result_str = "Win"
-            elif result.dealer_wins:
-                result_str = "Loss" 
-            else:
-                result_str = "Draw"
-            
-            # Calculate bankroll after this hand
-            bankroll_after = stats.current_bankroll + result.money_change
+            self.record_hand(stats, sink, result, hand_number, scenario_number,
+                             bytes([card.code for card in self.player.hand]), self.player.get_hand_value(),
+                             player_action, reshuffled)
             
-            # Get deck info for this hand
-            deck_info = self.deck.get_deck_info()
-            
-            hand_record = HandRecord(
-                hand_number=hand_number,
-                scenario_number=scenario_number,
-                player_cards=player_cards,
-                dealer_cards=dealer_cards,
-                player_total=player_total,
-                dealer_total=dealer_total,
-                player_action=player_action,
-                bet_amount=bet_amount,
-                result=result_str,
-                money_change=result.money_change,
-                player_busted=result.player_busted,
-                dealer_busted=result.dealer_busted,
-                bankroll_after=bankroll_after,
-                is_blackjack=result.is_blackjack
-            )
-            
-            # Add deck information to hand record
-            hand_record.deck_penetration = deck_info['penetration']
-            hand_record.cards_remaining = deck_info['cards_remaining']
-            hand_record.reshuffled_after = reshuffled
-            
-            stats.hand_records.append(hand_record)
+            if timer is not None:
+                timer.lap('record', start)
         
         return result
 
@@ -336,21 +763,120 @@ class Game:
 class GameSimulator:
     """Simulates multiple games for statistical analysis"""
     
-    def __init__(self, num_decks=6):
-        self.game = Game(num_decks)
+    def __init__(self, num_decks=6, compact_shoe=True, rng=None, timing=False, count_system='hi-lo', cache=None):
+        self.game = Game(num_decks, compact_shoe, rng, count_system=count_system)
         self.num_decks = num_decks
+        self.compact_shoe = compact_shoe
+        self.rng = rng
+        self.timing = timing  # Time the phases of every round into stats.phase_timer
+        self.count_system = count_system  # Card counting system behind the true count buckets
+        self.cache = cache  # Optional ResultCache of finished runs
+    
+    def cache_key(self, rng, *parts):
+        """Return the cache key of a run drawing from rng, or None if it cannot be cached
+        
+        Only runs on a RandomStream are cached; the key covers its current
+        state, so it identifies the cards the run will be dealt. Timed runs
+        are never cached. The compact and object shoes deal the same cards,
+        so the shoe type is not part of the key.
+        """
+        if self.cache is None or self.timing or not isinstance(rng, RandomStream):
+            return None
+        return self.cache.key(self.num_decks, self.count_system, rng.getstate(), *parts)
+    
+    def cached_result(self, cache_key, rng):
+        """Return a cached result and move rng on to where the run left it, or None"""
+        if cache_key is None:
+            return None
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return None
+        result, rng_state = entry
+        rng.setstate(rng_state)
+        return result
     
-    def simulate(self, strategy, num_rounds, starting_bankroll=1000.0, base_bet_amount=10.0, target_multiplier=0.5, scenario_number=1):
-        """Simulate multiple rounds with progressive betting strategy"""
+    def simulate(self, strategy, num_rounds, starting_bankroll=1000.0, base_bet_amount=10.0, target_multiplier=0.5, scenario_number=1, sink=None, rng=None, record_hands=True,
+                 precision_target=None, precision_metric='dealer_bust', check_interval=DEFAULT_CHECK_INTERVAL,
+                 betting=None):
+        """Simulate multiple rounds with progressive betting strategy
+        
+        Hand records are streamed to sink as they are produced when one is
+        given; otherwise they are kept in stats.hand_records. With
+        record_hands=False no records are created at all. The shoe draws
+        from rng when given, else from the simulator's own rng.
+        
+        With a precision_target, num_rounds becomes an upper bound: every
+        check_interval rounds the standard error of precision_metric (a key
+        of PRECISION_METRICS) is checked and the run stops once it is at or
+        below the target.
+        
+        betting is a BettingPolicy (default: x3 on loss, reset on win or
+        draw); its fields are read once here and applied inline each round.
+        
+        When the simulator was created with timing=True, the wall time and
+        call count of each phase of every round (plus the initial shuffle)
+        are accumulated in stats.phase_timer.
+        
+        With a cache, runs without hand records on a RandomStream are looked
+        up before playing and stored afterwards, together with the stream's
+        final state, so a cached run leaves rng exactly as a played one would.
+        """
+        rng = rng if rng is not None else self.rng
+        cache_key = None
+        if sink is None and not record_hands:
+            cache_key = self.cache_key(rng, 'simulate', strategy, num_rounds, starting_bankroll, base_bet_amount,
+                                       target_multiplier, scenario_number, precision_target, precision_metric,
+                                       check_interval, betting if betting is not None else default_betting_policy())
+            cached = self.cached_result(cache_key, rng)
+            if cached is not None:
+                return cached
+        
+        timer = None
+        if self.timing:
+            timer = PhaseTimer()
+            start = timer.clock()
+        
         # Reset the game with fresh deck for each scenario
-        self.game = Game(self.num_decks)
+        self.game = Game(self.num_decks, self.compact_shoe, rng, timer, self.count_system)
         
         stats = GameStats(starting_bankroll, target_multiplier)
         stats.current_scenario = scenario_number
+        if timer is not None:
+            timer.lap('shuffle', start)
+            stats.phase_timer = timer
         current_bet = base_bet_amount
         target_profit = starting_bankroll * target_multiplier
         
+        policy = betting if betting is not None else default_betting_policy()
+        loss_multiplier = policy.loss_multiplier
+        max_bet = base_bet_amount * policy.max_units if policy.max_units else math.inf
+        spread = policy.spread
+        kelly_fraction = policy.kelly_fraction
+        deck = self.game.deck
+        
+        if precision_target is not None:
+            running = precision_stats(stats, precision_metric)
+            next_check = check_interval
+        else:
+            next_check = num_rounds + 1  # Never
+        
         for round_num in range(num_rounds):
+            if round_num == next_check:
+                next_check += check_interval
+                if precision_reached(running, precision_target):
+                    stats.stopped_early = True
+                    stats.stop_reason = (f"Precision target reached after {stats.total_games} rounds "
+                                         f"({precision_metric} SE {running.standard_error():.6f} ≤ {precision_target})")
+                    break
+            
+            # Count-based policies size the bet from the shoe before the deal
+            if spread is not None:
+                bucket = min(max(math.floor(deck.true_count()), TRUE_COUNT_MIN), TRUE_COUNT_MAX)
+                current_bet = base_bet_amount * spread[bucket - TRUE_COUNT_MIN]
+            elif kelly_fraction:
+                edge = policy.base_edge + policy.edge_per_count * deck.true_count()
+                current_bet = max(base_bet_amount, stats.current_bankroll * kelly_fraction * edge / policy.variance)
+            
             # Check if player has enough money to bet
             if stats.current_bankroll < current_bet:
                 stats.stopped_early = True
@@ -366,7 +892,8 @@ class GameSimulator:
                 break
                 
             # Play the round with detailed tracking
-            result = self.game.play_round(strategy, current_bet, round_num + 1, scenario_number, stats)
+            result = self.game.play_round(strategy, current_bet, round_num + 1, scenario_number,
+                                          stats if record_hands else None, sink, stats.current_bankroll)
             stats.add_result(result)
             
             # Adjust bet based on result
@@ -374,7 +901,154 @@ class GameSimulator:
                 # Win or draw - reset to base bet
                 current_bet = base_bet_amount
             else:
-                # Loss - triple the bet for next round
-                current_bet *= 3
+                # Loss - raise the bet by the policy's multiplier (x3 by default)
+                current_bet = min(current_bet * loss_multiplier, max_bet)
         
+        if cache_key is not None:
+            self.cache.put(cache_key, (stats, rng.getstate()))
         return stats
+    
+    def simulate_family(self, strategies, num_rounds, starting_bankroll=1000.0, base_bet_amount=10.0, target_multiplier=0.5, scenario_number=1, rng=None,
+                        betting=None):
+        """Simulate several strategies in one pass over the same shoes
+        
+        Each round deals one set of initial cards, then a shared run of
+        further cards that is only drawn from the shoe as far as some strategy
+        needs it. Every strategy hits from the front of that run and the
+        dealer draws the cards after the player's, so the dealer's hand
+        depends only on how many cards the player took and is played once per
+        distinct count. The shoe moves on past the furthest card used.
+        
+        Each strategy keeps its own bankroll, bet (under the betting policy)
+        and stopping rules, exactly as in simulate; a single strategy plays the same hands
+        as simulate would with the same rng. No hand records are kept and
+        phases are not timed. Returns a list of GameStats in the order of
+        strategies. Results are cached like those of simulate. Only hit/stand
+        strategies can share a pass; strategies with a StrategyTable raise
+        ValueError.
+        """
+        if any(strategy.table is not None for strategy in strategies):
+            raise ValueError("Single-pass runs only support hit/stand strategies")
+        rng = rng if rng is not None else self.rng
+        cache_key = self.cache_key(rng, 'simulate_family', list(strategies), num_rounds, starting_bankroll,
+                                   base_bet_amount, target_multiplier, scenario_number,
+                                   betting if betting is not None else default_betting_policy())
+        cached = self.cached_result(cache_key, rng)
+        if cached is not None:
+            return cached
+        
+        self.game = Game(self.num_decks, self.compact_shoe, rng, count_system=self.count_system)
+        game = self.game
+        deck = game.deck
+        player, dealer = game.player, game.dealer
+        
+        all_stats = []
+        for _ in strategies:
+            stats = GameStats(starting_bankroll, target_multiplier)
+            stats.current_scenario = scenario_number
+            all_stats.append(stats)
+        bets = [base_bet_amount] * len(strategies)
+        target_profit = starting_bankroll * target_multiplier
+        active = list(range(len(strategies)))
+        
+        policy = betting if betting is not None else default_betting_policy()
+        loss_multiplier = policy.loss_multiplier
+        max_bet = base_bet_amount * policy.max_units if policy.max_units else math.inf
+        spread = policy.spread
+        kelly_fraction = policy.kelly_fraction
+        
+        tail = []  # Cards after the initial deal, in the order the shoe deals them
+        dealer_hands = {}  # Finished dealer hand by number of tail cards the player took
+        outcomes = {}  # Unit-bet GameResult by (final player hand state, tail cards taken)
+        
+        for round_num in range(num_rounds):
+            # Same betting and stopping rules as simulate, applied to each strategy on its own
+            true_count = deck.true_count()
+            if spread is not None:
+                bucket = min(max(math.floor(true_count), TRUE_COUNT_MIN), TRUE_COUNT_MAX)
+                bets = [base_bet_amount * spread[bucket - TRUE_COUNT_MIN]] * len(strategies)
+            
+            still_active = []
+            for i in active:
+                stats = all_stats[i]
+                if kelly_fraction:
+                    edge = policy.base_edge + policy.edge_per_count * true_count
+                    bets[i] = max(base_bet_amount, stats.current_bankroll * kelly_fraction * edge / policy.variance)
+                if stats.current_bankroll < bets[i]:
+                    stats.stopped_early = True
+                    stats.stop_reason = f"Insufficient funds after {stats.total_games} rounds (Need ${bets[i]:.2f}, Have ${stats.current_bankroll:.2f})"
+                    continue
+                current_profit = stats.current_bankroll - starting_bankroll
+                if current_profit >= target_profit:
+                    stats.reached_target = True
+                    stats.stopped_early = True
+                    stats.stop_reason = f"Target profit reached after {stats.total_games} rounds (${current_profit:,.2f} ≥ ${target_profit:,.2f})"
+                    continue
+                still_active.append(i)
+            active = still_active
+            if not active:
+                break
+            
+            game.deal_initial_cards()
+            player_cards = tuple(player.hand)
+            dealer_cards = tuple(dealer.hand)
+            upcard = dealer_cards[0].points
+            player_blackjack = game.is_blackjack(player.hand)
+            dealer_blackjack = game.is_blackjack(dealer.hand)
+            dealer_plays = not player_blackjack or dealer_blackjack
+            unplayed_dealer_hand = Hand(dealer_cards)
+            tail.clear()
+            dealer_hands.clear()
+            outcomes.clear()
+            
+            for i in active:
+                strategy = strategies[i]
+                hand = Hand(player_cards)
+                used = 0
+                if not player_blackjack:
+                    while HAND_VALUES[hand.state] <= 21 and strategy.decide(hand, upcard) == 'hit':
+                        if used == len(tail):
+                            tail.append(deck.deal_card())
+                        hand.append(tail[used])
+                        used += 1
+                
+                # Strategies ending on the same hand after the same cards share an outcome
+                outcome = outcomes.get((hand.state, used))
+                if outcome is None:
+                    dealer_hand = unplayed_dealer_hand
+                    if dealer_plays and HAND_VALUES[hand.state] <= 21:
+                        dealer_hand = dealer_hands.get(used)
+                        if dealer_hand is None:
+                            dealer_hand = Hand(dealer_cards)
+                            position = used
+                            while HAND_VALUES[dealer_hand.state] <= 16:
+                                if position == len(tail):
+                                    tail.append(deck.deal_card())
+                                dealer_hand.append(tail[position])
+                                position += 1
+                            dealer_hands[used] = dealer_hand
+                    
+                    player.hand = hand
+                    dealer.hand = dealer_hand
+                    outcome = game.determine_winner(1.0)
+                    outcomes[(hand.state, used)] = outcome
+                
+                result = GameResult(outcome.player_wins, outcome.dealer_wins, outcome.is_draw, outcome.dealer_busted,
+                                    outcome.player_busted, bets[i], outcome.is_blackjack)
+                result.true_count = true_count
+                all_stats[i].add_result(result)
+                
+                # Adjust bet based on result
+                if result.player_wins or result.is_draw:
+                    bets[i] = base_bet_amount
+                else:
+                    bets[i] = min(bets[i] * loss_multiplier, max_bet)
+            
+            # The hands above are shared with the memo; give the game fresh ones
+            player.hand = Hand()
+            dealer.hand = Hand()
+            game.check_reshuffle_after_hand()
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, (all_stats, rng.getstate()))
+        return all_stats
@@ -0,0 +1,191 @@
+# Reader and query API for exported hand histories
+import ast
+import csv
+import math
+import mmap
+import struct
+from collections import namedtuple
+from columnar import (DEALER_BUSTED, HAND_RECORD_DESCR, HAND_RECORD_STRUCT, MAX_HANDS, NPY_MAGIC,
+                      PLAYER_ACTIONS, PLAYER_BUSTED, RESULTS)
+from deck import RANK_INDEX, RANKS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up queries on .npy files
+    np = None
+
+# One hand as seen by queries; upcard is the dealer upcard's points (Ace = 1)
+# and hands the number of player hands the round ended with (more than 1 after a split)
+HandRow = namedtuple('HandRow', ['scenario', 'hand', 'upcard', 'penetration', 'bet', 'result',
+                                 'player_action', 'player_busted', 'dealer_busted', 'money_change', 'hands'])
+
+GROUP_KEYS = ('upcard', 'penetration', 'bet')
+
+# Points of each rank index (RANKS order), used to turn card codes into upcards
+_RANK_POINTS = tuple(1 if rank == 'A' else 10 if rank in ('J', 'Q', 'K') else int(rank) for rank in RANKS)
+
+# Decimals of penetration kept by queries: CSV files store it as "49.96" -> "50.0%",
+# so .npy values (float32) are rounded the same way before bucketing
+PENETRATION_DECIMALS = 1
+
+# Rows unpacked per step when scanning a .npy file with NumPy
+_CHUNK_ROWS = 1 << 20
+
+
+def read_npy_header(file):
+    """Read a hand-record .npy header and return (data offset, number of records)"""
+    magic = file.read(len(NPY_MAGIC))
+    if magic != NPY_MAGIC:
+        raise ValueError("Not a version 1.0 .npy hand record file")
+    header_length = struct.unpack('<H', file.read(2))[0]
+    header = ast.literal_eval(file.read(header_length).decode('latin1'))
+    if header['descr'] != HAND_RECORD_DESCR:
+        raise ValueError("The .npy file was written with another hand record layout")
+    return len(NPY_MAGIC) + 2 + header_length, header['shape'][0]
+
+
+class HandHistory:
+    """Lazily opened hand history exported as CSV or .npy
+    
+    Nothing is loaded up front: CSV files are streamed row by row and .npy
+    files are memory-mapped, so queries run in bounded memory on any size of
+    file. Queries accept equality filters on HandRow fields, for example
+    history.bust_rate_by('upcard', scenario=3, player_action='Hit').
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.format = 'npy' if path.endswith('.npy') else 'csv'
+    
+    def __iter__(self):
+        return self.iter_rows()
+    
+    def iter_rows(self):
+        """Yield every hand as a HandRow"""
+        if self.format == 'npy':
+            return self._iter_npy_rows()
+        return self._iter_csv_rows()
+    
+    def _iter_csv_rows(self):
+        with open(self.path, newline='', encoding='utf-8') as csv_file:
+            for row in csv.DictReader(csv_file):
+                upcard_rank = row['Dealer_Cards'].split(' of ', 1)[0]
+                yield HandRow(
+                    int(row['Scenario']),
+                    int(row['Hand_Number']),
+                    _RANK_POINTS[RANK_INDEX[upcard_rank]],
+                    round(float(row['Deck_Penetration_%'].rstrip('%')), PENETRATION_DECIMALS),
+                    float(row['Bet_Amount']),
+                    row['Result'],
+                    row['Player_Action'],
+                    row['Player_Busted'] == 'True',
+                    row['Dealer_Busted'] == 'True',
+                    float(row['Money_Change']),
+                    row.get('Hand_Sizes', '').count('|') + 1,  # Older files have no Hand_Sizes column
+                )
+    
+    def _iter_npy_rows(self):
+        with open(self.path, 'rb') as npy_file:
+            offset, count = read_npy_header(npy_file)
+            if count == 0:
+                return
+            with mmap.mmap(npy_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                end = offset + count * HAND_RECORD_STRUCT.size
+                for record in HAND_RECORD_STRUCT.iter_unpack(memoryview(mapped)[offset:end]):
+                    (scenario, hand, _, dealer_cards, hand_sizes, _, _, _, _, action, result, flags,
+                     _, penetration, bet, money_change, _) = record
+                    yield HandRow(scenario, hand, _RANK_POINTS[dealer_cards[0] % 13],
+                                  round(penetration, PENETRATION_DECIMALS), bet,
+                                  RESULTS[result], PLAYER_ACTIONS[action], bool(flags & PLAYER_BUSTED),
+                                  bool(flags & DEALER_BUSTED), money_change, MAX_HANDS - hand_sizes.count(0))
+    
+    def bust_rate_by(self, key, bucket_width=10.0, **filters):
+        """Dealer bust rate grouped by 'upcard', 'penetration' bucket or 'bet'
+        
+        Penetration is bucketed into bucket_width-percent bands labelled by
+        their lower edge. Returns {group: {'hands', 'dealer_busts',
+        'bust_rate'}} sorted by group.
+        """
+        if key not in GROUP_KEYS:
+            raise ValueError(f"Group key must be one of: {', '.join(GROUP_KEYS)}")
+        for field in filters:
+            if field not in HandRow._fields:
+                raise ValueError(f"Unknown filter field '{field}'")
+        
+        if self.format == 'npy' and np is not None:
+            counts = self._npy_counts(key, bucket_width, filters)
+        else:
+            counts = {}
+            index = HandRow._fields.index(key)
+            for row in self.iter_rows():
+                if any(getattr(row, field) != value for field, value in filters.items()):
+                    continue
+                group = row[index]
+                if key == 'penetration':
+                    group = float(math.floor(group / bucket_width) * bucket_width)
+                hands_busts = counts.setdefault(group, [0, 0])
+                hands_busts[0] += 1
+                hands_busts[1] += row.dealer_busted
+        
+        return {group: {'hands': hands, 'dealer_busts': busts, 'bust_rate': busts / hands}
+                for group, (hands, busts) in sorted(counts.items())}
+    
+    def _npy_counts(self, key, bucket_width, filters):
+        """Vectorized group counts over the memory-mapped .npy file"""
+        records = np.load(self.path, mmap_mode='r')
+        rank_points = np.array(_RANK_POINTS)
+        counts = {}
+        for start in range(0, len(records), _CHUNK_ROWS):
+            chunk = records[start:start + _CHUNK_ROWS]
+            columns = {
+                'scenario': lambda: chunk['scenario'],
+                'hand': lambda: chunk['hand'],
+                'upcard': lambda: rank_points[chunk['dealer_cards'][:, 0] % 13],
+                'penetration': lambda: np.round(chunk['deck_penetration'].astype(np.float64), PENETRATION_DECIMALS),
+                'bet': lambda: chunk['bet_amount'],
+                'result': lambda: chunk['result'],
+                'player_action': lambda: chunk['action'],
+                'player_busted': lambda: (chunk['flags'] & PLAYER_BUSTED) != 0,
+                'dealer_busted': lambda: (chunk['flags'] & DEALER_BUSTED) != 0,
+                'money_change': lambda: chunk['money_change'],
+                'hands': lambda: (chunk['hand_sizes'] != 0).sum(axis=1),
+            }
+            
+            selected = np.ones(len(chunk), dtype=bool)
+            for field, value in filters.items():
+                if field == 'result':
+                    value = RESULTS.index(value)
+                elif field == 'player_action':
+                    value = PLAYER_ACTIONS.index(value)
+                selected &= columns[field]() == value
+            
+            groups = columns[key]()[selected]
+            if key == 'penetration':
+                groups = np.floor(groups / bucket_width) * bucket_width
+            busts = columns['dealer_busted']()[selected]
+            
+            labels, inverse = np.unique(groups, return_inverse=True)
+            hands_per_group = np.bincount(inverse, minlength=len(labels))
+            busts_per_group = np.bincount(inverse, weights=busts, minlength=len(labels))
+            for label, hands, group_busts in zip(labels.tolist(), hands_per_group, busts_per_group):
+                hands_busts = counts.setdefault(label, [0, 0])
+                hands_busts[0] += int(hands)
+                hands_busts[1] += int(group_busts)
+        return counts
+    
+    def bust_rate_by_upcard(self, **filters):
+        """Dealer bust rate for each upcard (points, Ace = 1)"""
+        return self.bust_rate_by('upcard', **filters)
+    
+    def bust_rate_by_penetration(self, bucket_width=10.0, **filters):
+        """Dealer bust rate per deck penetration band"""
+        return self.bust_rate_by('penetration', bucket_width, **filters)
+    
+    def bust_rate_by_bet(self, **filters):
+        """Dealer bust rate for each bet amount"""
+        return self.bust_rate_by('bet', **filters)
+
+
+def open_hand_history(path):
+    """Open an exported hand history (results/BJ_*_hands_*.csv or .npy) for querying"""
+    return HandHistory(path)
@@ -1,16 +1,72 @@
 # Main entry point for the Blackjack simulator
+import argparse
 import csv
 import os
+import random
 from datetime import datetime
-from strategy import get_available_strategies
-from game import GameSimulator
+from strategy import get_available_strategies, get_strategy
+from parallel import create_executor, iter_family_scenarios, iter_scenarios
+from columnar import NpyHandSink, check_npy_strategy
+from sinks import CSVHandSink
+from deck import COUNT_SYSTEMS
+from game import PAIRED_METRICS, PRECISION_METRICS, ScenarioSummary, paired_difference_stats, true_count_table
+from utils import RunningStats
+from profiling import PHASES, run_profiled
+from betting import DEFAULT_BETTING, parse_betting_policy
+from ruin import threshold_progression_outcomes
+from cache import ResultCache
+from checkpoint import Checkpoint
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# Settings used by non-interactive runs when neither a config file nor a flag sets them
+DEFAULT_SETTINGS = {
+    'decks': 6,
+    'rounds': 1000,
+    'scenarios': 10,
+    'bankroll': 1000.0,
+    'bet': 10.0,
+    'target': 0.5,
+    'strategies': ['S12', 'S16'],
+    'seed': None,
+    'workers': 1,
+    'format': 'csv',
+    'precision': None,  # Target standard error in percent; scenarios become an upper bound
+    'precision_metric': 'dealer_bust',
+    'paired': False,  # All strategies play the same shoes (common random numbers)
+    'single_pass': False,  # All strategies play the same hands in one pass, without hand records
+    'timing': False,  # Time each phase of every round and report it in the summary
+    'count_system': 'hi-lo',  # Card counting system for the true count breakdown
+    'betting': DEFAULT_BETTING,  # Betting policy spec (see betting.parse_betting_policy)
+    'cache': None,  # Directory of cached seeded scenario results (None = no cache)
+}
+
+# Output formats for hand-by-hand records ('npy' is fixed-width binary, 'none' skips them)
+HAND_RECORD_FORMATS = ('csv', 'npy', 'none')
 
 class BlackjackSimulator:
     """Main application class for the Blackjack strategy simulator"""
-    def __init__(self):
-        self.simulator = None  # Will be initialized with deck count
+    def __init__(self, num_workers=1, seed=None, paired=False, checkpoint=None):
         self.strategies = get_available_strategies()
         self.num_decks = 6  # Default
+        self.num_workers = num_workers  # Processes used to run scenarios
+        self.seed = seed  # Master seed for per-scenario seeds (None = unseeded)
+        self.paired = paired  # Same seed per scenario for every strategy
+        self.single_pass = False  # Evaluate all strategies over one shared pass per scenario
+        self.timing = False  # Collect per-phase timings of every round
+        self.count_system = 'hi-lo'
+        self.betting = parse_betting_policy(DEFAULT_BETTING)
+        self.cache = None  # ResultCache reused by repeated seeded runs
+        self.checkpoint = checkpoint  # Checkpoint saved while running, for resuming interrupted runs
+        self.progress = None  # Checkpoint progress of the parameter set being run
+        self.hand_record_format = 'csv'
+        self.precision_target = None  # Stop a strategy's scenarios once this standard error is reached
+        self.precision_metric = 'dealer_bust'
+        self.timestamp = None  # Shared by all files exported for one parameter set
+        self.results_dir = os.path.join(os.path.dirname(__file__), "..", "results")
     
     def get_num_rounds(self):
         """Get the number of rounds to simulate"""
@@ -104,14 +160,11 @@ class BlackjackSimulator:
                 print("Please enter a valid number")
     
     def run_simulation(self):
-        """Run the main simulation for both strategies"""
+        """Run the main simulation for both strategies, prompting for every setting"""
         print("Testing both strategies automatically...")
         
         # Get table settings first
-        self.num_decks = self.get_num_decks()
-        
-        # Initialize simulator with chosen deck count
-        self.simulator = GameSimulator(self.num_decks)
+        num_decks = self.get_num_decks()
         
         num_rounds = self.get_num_rounds()
         
@@ -124,12 +177,139 @@ class BlackjackSimulator:
         
         print("\n--- TARGET SETTINGS ---")
         target_multiplier = self.get_target_multiplier()
-        target_amount = bankroll * target_multiplier
         
-        # Test both strategies and collect all results
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update({
+            'decks': num_decks,
+            'rounds': num_rounds,
+            'scenarios': num_scenarios,
+            'bankroll': bankroll,
+            'bet': bet_amount,
+            'target': target_multiplier,
+            'strategies': [strategy.short_name for strategy in self.strategies],
+            'seed': self.seed,
+            'workers': self.num_workers,
+            'paired': self.paired,
+        })
+        self.run_sweep([settings])
+    
+    def run_sweep(self, settings_list):
+        """Run several parameter sets in this process, reusing worker pools between them
+        
+        With a checkpoint, parameter sets it records as done are skipped and
+        the others continue from their last completed scenario. The
+        checkpoint is saved when the run is interrupted.
+        """
+        executors = {}
+        if self.checkpoint is not None:
+            self.checkpoint.settings_list = settings_list
+        try:
+            for i, settings in enumerate(settings_list, 1):
+                if len(settings_list) > 1:
+                    print(f"\n{'#'*60}")
+                    print(f"PARAMETER SET {i}/{len(settings_list)}")
+                    print(f"{'#'*60}")
+                
+                progress = None if self.checkpoint is None else self.checkpoint.progress(i)
+                if progress is not None and progress['done']:
+                    print("\nAlready completed in the checkpoint; results were exported then.")
+                    continue
+                
+                workers = settings['workers']
+                if workers not in executors:
+                    executors[workers] = create_executor(workers)
+                self.run_settings(settings, executors[workers], f"_set{i}" if len(settings_list) > 1 else "",
+                                  progress)
+        except KeyboardInterrupt:
+            if self.checkpoint is not None:
+                self.checkpoint.save()
+                print(f"\n\nProgress saved to {self.checkpoint.path} "
+                      f"(continue with: python main.py --resume {self.checkpoint.path})")
+            raise
+        finally:
+            for executor in executors.values():
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+    
+    def run_settings(self, settings, executor=None, file_suffix="", progress=None):
+        """Run every strategy for one validated parameter set and export the results
+        
+        Creates (and shuts down) its own worker pool unless one is passed in.
+        file_suffix keeps the files of several parameter sets in one sweep apart.
+        progress is this set's entry in self.checkpoint: completed scenarios
+        found there are not run again and new ones are added as they finish.
+        """
+        self.timestamp = datetime.now().strftime("%m%d_%H%M") + file_suffix
+        self.num_decks = settings['decks']
+        self.strategies = [get_strategy(name) for name in settings['strategies']]
+        self.seed = settings['seed']
+        self.paired = settings['paired']
+        self.single_pass = settings['single_pass']
+        self.timing = settings['timing']
+        self.count_system = settings['count_system']
+        self.betting = parse_betting_policy(settings['betting'])
+        self.cache = ResultCache(settings['cache']) if settings['cache'] else None
+        if progress is not None and progress['seed'] is not None:
+            self.seed = progress['seed']  # Resuming: the seed the interrupted run used
+        if (self.paired or progress is not None) and self.seed is None:
+            # Pairing and resuming need seeded shoes; pick a master seed so the run can be repeated
+            self.seed = random.SystemRandom().randrange(2**32)
+        self.progress = progress
+        if progress is not None:
+            progress['seed'] = self.seed
+            # A resumed run continues the files of the interrupted one
+            self.timestamp = progress['timestamp'] = progress['timestamp'] or self.timestamp
+        self.num_workers = settings['workers']
+        self.hand_record_format = settings['format']
+        self.precision_target = None if settings['precision'] is None else settings['precision'] / 100
+        self.precision_metric = settings['precision_metric']
+        
+        num_rounds = settings['rounds']
+        bankroll = settings['bankroll']
+        bet_amount = settings['bet']
+        target_multiplier = settings['target']
+        
+        # Test all strategies and collect all results
         all_strategy_results = {}
         
-        for strategy in self.strategies:
+        # One pool of worker processes is shared by all strategies
+        owns_executor = executor is None
+        if owns_executor:
+            executor = create_executor(self.num_workers)
+        try:
+            run = self.run_family if self.single_pass else self.run_strategies
+            run(all_strategy_results, executor, settings['scenarios'], num_rounds,
+                bankroll, bet_amount, target_multiplier)
+        finally:
+            if owns_executor and executor is not None:
+                executor.shutdown(cancel_futures=True)
+        
+        if (self.paired or self.single_pass) and len(all_strategy_results) > 1:
+            self.display_paired_comparison(all_strategy_results)
+        
+        # Export combined results to single CSV
+        self.export_combined_csv(all_strategy_results, num_rounds, bankroll, bet_amount, target_multiplier)
+        if progress is not None:
+            progress['done'] = True
+            self.checkpoint.save()
+        
+        print(f"\n{'='*60}")
+        print("ALL STRATEGIES COMPLETED!")
+        print(f"{'='*60}")
+    
+    def run_strategies(self, all_strategy_results, executor, num_scenarios, num_rounds,
+                       bankroll, bet_amount, target_multiplier):
+        """Run every scenario of every strategy, storing results by strategy name
+        
+        Hand records are streamed to one file per strategy while the
+        scenarios run, so they are never all held in memory.
+        """
+        target_amount = bankroll * target_multiplier
+        if self.hand_record_format == 'npy':
+            for strategy in self.strategies:
+                check_npy_strategy(strategy)
+        
+        for strategy_index, strategy in enumerate(self.strategies):
             print(f"\n{'='*60}")
             print(f"TESTING STRATEGY: {strategy.name}")
             print(f"{'='*60}")
@@ -137,41 +317,131 @@ class BlackjackSimulator:
             print(f"\nRunning {num_scenarios} scenarios of {num_rounds} rounds each")
             print(f"Table: {self.num_decks} decks ({self.num_decks * 52} total cards)")
             print(f"Starting bankroll: ${bankroll:,.2f}")
-            print(f"Base bet: ${bet_amount:,.2f} (Progressive: x3 on loss, reset on win)")
+            print(f"Base bet: ${bet_amount:,.2f} (Betting {self.betting.describe()})")
             print(f"Target: {target_multiplier}x profit (${target_amount:,.2f})")
+            if self.seed is not None:
+                print(f"Master seed: {self.seed}")
+            if self.paired:
+                print("Paired mode: every strategy plays the same shoes scenario by scenario")
+            if self.cache is not None:
+                if self.hand_record_format == 'none' and self.seed is not None and not self.timing:
+                    print(f"Result cache: {self.cache.directory}")
+                else:
+                    print("Result cache not used: it needs a seed, --format none and no --timing")
+            if self.precision_target is not None:
+                print(f"Precision target: {self.precision_metric} standard error ≤ {self.precision_target:.4%}")
+            strategy_results = self.checkpoint_results(strategy.name)
             print("Please wait...\n")
             
-            # Run multiple scenarios for this strategy
-            strategy_results = []
-            for i in range(num_scenarios):
-                print(f"Running scenario {i+1}/{num_scenarios}...", end=" ", flush=True)
-                stats = self.simulator.simulate(strategy, num_rounds, bankroll, bet_amount, target_multiplier, i+1)
-                strategy_results.append(stats)
-                print("✓")
+            strategy_short = strategy.short_name
+            # Sharing one seed index gives every strategy the same per-scenario seeds
+            seed_index = 0 if self.paired else strategy_index
+            
+            # Run multiple scenarios for this strategy (in order, possibly on the worker pool)
+            hand_records = {} if self.progress is None else self.progress['hand_records']
+            sink = self.open_hand_record_sink(strategy_short, self.timestamp, hand_records.get(strategy.name))
+            try:
+                scenarios = iter_scenarios(strategy, num_scenarios, num_rounds, bankroll, bet_amount,
+                                           target_multiplier, self.num_decks, executor, self.seed,
+                                           seed_index, record_hands=False, sink=sink,
+                                           precision_target=self.precision_target,
+                                           precision_metric=self.precision_metric, timing=self.timing,
+                                           count_system=self.count_system, betting=self.betting,
+                                           cache=self.cache, completed=list(strategy_results))
+                for i in range(len(strategy_results), num_scenarios):
+                    print(f"Running scenario {i+1}/{num_scenarios}...", end=" ", flush=True)
+                    stats = next(scenarios, None)
+                    if stats is None:
+                        print("not needed")
+                        print(f"Precision target reached after {i} scenarios")
+                        break
+                    strategy_results.append(stats)
+                    print("✓")
+                    if self.checkpoint is not None:
+                        if sink is not None:
+                            # The file now holds exactly the records of the completed scenarios
+                            sink.flush()
+                            hand_records[strategy.name] = sink.hands_written
+                        self.checkpoint.save_if_due()
+            finally:
+                if sink is not None:
+                    sink.close()
+            
+            if sink is not None:
+                print(f"\n📋 {strategy_short} Hand Records: {sink.hands_written} hands exported to {sink.path}")
             
             # Store results for combined CSV export
             all_strategy_results[strategy.name] = strategy_results
+            if self.checkpoint is not None:
+                self.checkpoint.save()
             
             # Display results for this strategy
             self.display_scenario_summary(strategy_results, strategy.name, num_rounds, bankroll, bet_amount, target_multiplier)
             
             print(f"\n{strategy.name} completed!")
+    
+    def run_family(self, all_strategy_results, executor, num_scenarios, num_rounds,
+                   bankroll, bet_amount, target_multiplier):
+        """Run every scenario once for all strategies together, storing results by strategy name
         
-        # Export combined results to single CSV
-        self.export_combined_csv(all_strategy_results, num_rounds, bankroll, bet_amount, target_multiplier)
-        
-        # Export detailed hand records for each strategy
-        self.export_hand_records(all_strategy_results, num_rounds, bankroll, bet_amount, target_multiplier)
+        All strategies play the same hands from one pass over each scenario's
+        shoes, so no hand records are written in this mode.
+        """
+        target_amount = bankroll * target_multiplier
         
         print(f"\n{'='*60}")
-        print("ALL STRATEGIES COMPLETED!")
+        print(f"TESTING STRATEGIES IN ONE PASS: {', '.join(s.short_name for s in self.strategies)}")
         print(f"{'='*60}")
+        
+        print(f"\nRunning {num_scenarios} scenarios of {num_rounds} rounds each")
+        print(f"Table: {self.num_decks} decks ({self.num_decks * 52} total cards)")
+        print(f"Starting bankroll: ${bankroll:,.2f}")
+        print(f"Base bet: ${bet_amount:,.2f} (Betting {self.betting.describe()})")
+        print(f"Target: {target_multiplier}x profit (${target_amount:,.2f})")
+        if self.seed is not None:
+            print(f"Master seed: {self.seed}")
+        print("Single pass: every strategy plays the same hands (no hand records)")
+        for strategy in self.strategies:
+            all_strategy_results[strategy.name] = self.checkpoint_results(strategy.name)
+        print("Please wait...\n")
+        
+        completed = list(zip(*all_strategy_results.values()))
+        for results in all_strategy_results.values():
+            del results[len(completed):]  # Drop a scenario interrupted between strategies
+        scenarios = iter_family_scenarios(self.strategies, num_scenarios, num_rounds, bankroll, bet_amount,
+                                          target_multiplier, self.num_decks, executor, self.seed,
+                                          count_system=self.count_system, betting=self.betting,
+                                          cache=self.cache, completed=completed)
+        for i in range(len(completed), num_scenarios):
+            print(f"Running scenario {i+1}/{num_scenarios}...", end=" ", flush=True)
+            for strategy, stats in zip(self.strategies, next(scenarios)):
+                all_strategy_results[strategy.name].append(stats)
+            print("✓")
+            if self.checkpoint is not None:
+                self.checkpoint.save_if_due()
+        
+        for strategy in self.strategies:
+            self.display_scenario_summary(all_strategy_results[strategy.name], strategy.name, num_rounds,
+                                          bankroll, bet_amount, target_multiplier)
+    
+    def checkpoint_results(self, strategy_name):
+        """Return the list collecting a strategy's scenario results
+        
+        When checkpointing, this is the list kept in the checkpoint, holding
+        any scenarios completed before an interruption.
+        """
+        if self.progress is None:
+            return []
+        results = self.progress['results'].setdefault(strategy_name, [])
+        if results:
+            print(f"Resuming after {len(results)} completed scenarios from the checkpoint")
+        return results
     
     def display_scenario_summary(self, results, strategy_name, rounds_per_scenario, starting_bankroll, bet_amount, target_multiplier):
         """Display a comprehensive summary of all scenarios"""
         print("\n" + "="*90)
         print(f"SUMMARY: {len(results)} Scenarios of {rounds_per_scenario} rounds each")
-        print(f"Strategy: {strategy_name} | Table: {self.num_decks} decks | Starting: ${starting_bankroll:,.2f} | Base Bet: ${bet_amount:,.2f} (Progressive)")
+        print(f"Strategy: {strategy_name} | Table: {self.num_decks} decks | Starting: ${starting_bankroll:,.2f} | Base Bet: ${bet_amount:,.2f} ({self.betting.name})")
         print(f"Target: {target_multiplier}x bankroll (${starting_bankroll * target_multiplier:,.2f})")
         print("="*90)
         
@@ -180,11 +450,6 @@ class BlackjackSimulator:
         print("-" * 90)
         
         # Individual scenario results
-        total_profit = 0
-        profitable_scenarios = 0
-        busted_scenarios = 0
-        target_reached_scenarios = 0
-        
         for i, stats in enumerate(results, 1):
             profit = stats.current_bankroll - starting_bankroll
             win_rate = (stats.player_wins / stats.total_games) * 100 if stats.total_games > 0 else 0
@@ -193,10 +458,8 @@ class BlackjackSimulator:
             # Determine status
             if stats.current_bankroll <= 0:
                 status = "BUSTED"
-                busted_scenarios += 1
             elif stats.reached_target:
                 status = "TARGET HIT"
-                target_reached_scenarios += 1
             elif stats.stopped_early:
                 status = "EARLY STOP"
             elif profit > 0:
@@ -204,52 +467,122 @@ class BlackjackSimulator:
             else:
                 status = "LOSS"
             
-            if profit > 0:
-                profitable_scenarios += 1
-                
-            total_profit += profit
-            
             print(f"{i:<10} {win_rate:<8.1f} ${stats.current_bankroll:<11,.2f} "
                   f"${profit:<11.2f} {stats.total_games:<8} {target_reached:<8} {status:<15}")
         
         # Summary statistics
         print("-" * 90)
-        avg_profit = total_profit / len(results)
-        success_rate = (profitable_scenarios / len(results)) * 100
-        bust_rate = (busted_scenarios / len(results)) * 100
-        target_rate = (target_reached_scenarios / len(results)) * 100
+        summary = ScenarioSummary(results, starting_bankroll)
+        num_scenarios = summary.num_scenarios
+        target_rate = summary.target_rate
         
         print(f"\nOVERALL STATISTICS:")
-        print(f"Average Profit/Loss: ${avg_profit:+,.2f}")
-        print(f"Profitable Scenarios: {profitable_scenarios}/{len(results)} ({success_rate:.1f}%)")
-        print(f"Target Reached: {target_reached_scenarios}/{len(results)} ({target_rate:.1f}%)")
-        print(f"Busted Scenarios: {busted_scenarios}/{len(results)} ({bust_rate:.1f}%)")
-        print(f"Total Profit/Loss: ${total_profit:+,.2f}")
+        print(f"Average Profit/Loss: ${summary.average_profit:+,.2f}")
+        print(f"Profitable Scenarios: {summary.profitable_scenarios}/{num_scenarios} ({summary.success_rate:.1f}%)")
+        print(f"Target Reached: {summary.target_reached_scenarios}/{num_scenarios} ({target_rate:.1f}%)")
+        print(f"Busted Scenarios: {summary.busted_scenarios}/{num_scenarios} ({summary.bust_rate:.1f}%)")
+        print(f"Total Profit/Loss: ${summary.total_profit:+,.2f}")
         
         # Best and worst performance
-        best_result = max(results, key=lambda x: x.current_bankroll - starting_bankroll)
-        worst_result = min(results, key=lambda x: x.current_bankroll - starting_bankroll)
-        
-        best_profit = best_result.current_bankroll - starting_bankroll
-        worst_profit = worst_result.current_bankroll - starting_bankroll
-        
-        print(f"\nBEST SCENARIO: ${best_profit:+,.2f} (Final: ${best_result.current_bankroll:,.2f})")
-        print(f"WORST SCENARIO: ${worst_profit:+,.2f} (Final: ${worst_result.current_bankroll:,.2f})")
-        
-        # Progressive betting analysis
+        print(f"\nBEST SCENARIO: ${summary.best_profit:+,.2f} (Final: ${summary.best_result.current_bankroll:,.2f})")
+        print(f"WORST SCENARIO: ${summary.worst_profit:+,.2f} (Final: ${summary.worst_result.current_bankroll:,.2f})")
+        
+        # Per-hand statistics with 95% confidence intervals
+        money_low, money_high = summary.money_stats.confidence_interval()
+        bust_low, bust_high = summary.dealer_bust_stats.confidence_interval()
+        print(f"\nPER-HAND STATISTICS ({summary.money_stats.count:,} hands, 95% CI):")
+        print(f"Money Change: ${summary.money_stats.mean:+,.3f} ± {summary.money_stats.standard_error() * 1.96:,.3f} "
+              f"[${money_low:+,.3f}, ${money_high:+,.3f}]")
+        print(f"Dealer Bust Rate: {summary.dealer_bust_stats.mean * 100:.2f}% "
+              f"[{bust_low * 100:.2f}%, {bust_high * 100:.2f}%]")
+        print(f"Mean Drawdown: ${summary.drawdown_stats.mean:,.2f} (Max: ${summary.max_drawdown:,.2f})")
+        
+        print(f"\nBY TRUE COUNT ({self.count_system}, before the deal):")
+        print(f"{'True Count':<12} {'Hands':>10} {'Win%':>7} {'Dealer Bust%':>13} {'Avg $/Hand':>11}")
+        for bucket, row in true_count_table(summary.true_count_buckets).items():
+            print(f"{bucket:<+12d} {row['hands']:>10,} {row['win_rate'] * 100:>7.1f} "
+                  f"{row['dealer_bust_rate'] * 100:>13.1f} {row['mean_money_change']:>+11.2f}")
+        
+        if summary.phase_timer is not None:
+            print(f"\nPHASE TIMINGS (all scenarios):")
+            print(summary.phase_timer.format_table())
+        
+        # Betting policy analysis
         target_amount = starting_bankroll * target_multiplier
-        print(f"\nPROGRESSIVE BETTING ANALYSIS:")
+        print(f"\nBETTING ANALYSIS ({self.betting.name}):")
         print(f"Target Profit: ${target_amount:,.2f} ({target_multiplier}x starting bankroll)")
         print(f"Success Rate: {target_rate:.1f}% reached target before running out of money/rounds")
         
+        exact = self.exact_progression_outcomes(strategy_name, rounds_per_scenario, starting_bankroll,
+                                                bet_amount, target_multiplier)
+        if exact is not None:
+            print(f"Exact (infinite shoe): {exact['target'] * 100:.1f}% reach target, "
+                  f"{exact['ruin'] * 100:.1f}% run out of money, {exact['expected_hands']:.1f} hands on average")
+        
+        print("="*90)
+    
+    def exact_progression_outcomes(self, strategy_name, num_rounds, starting_bankroll, bet_amount, target_multiplier):
+        """Exact target/ruin probabilities from the ruin solver, or None when it does not apply
+        
+        Applies to stand-at-threshold strategies under a plain whole-number
+        progression (such as the default x3) with a moderate bankroll. The
+        hand probabilities are those of an infinite shoe: a finite shoe's
+        solve takes seconds per strategy, and the two differ by a fraction
+        of a percent for six decks.
+        """
+        policy = self.betting
+        multiplier = policy.loss_multiplier
+        if policy.uses_count() or policy.max_units or multiplier < 2 or multiplier != int(multiplier):
+            return None
+        strategy = next((s for s in self.strategies if s.name == strategy_name), None)
+        if not hasattr(strategy, 'threshold'):
+            return None
+        try:
+            return threshold_progression_outcomes(strategy.threshold, None, starting_bankroll, bet_amount,
+                                                  target_multiplier, num_rounds, int(multiplier))
+        except ValueError:
+            return None
+    
+    def paired_comparisons(self, all_strategy_results):
+        """Yield (strategy short name, metric, paired difference stats, unpaired SE)
+        
+        Each strategy is compared with the first one, scenario by scenario.
+        The unpaired standard error is what the same difference would carry
+        if the two strategies had played independent shoes.
+        """
+        baseline_results = next(iter(all_strategy_results.values()))
+        for strategy_name, results in list(all_strategy_results.items())[1:]:
+            strategy_short = self.get_strategy_short(strategy_name)
+            num_pairs = min(len(results), len(baseline_results))
+            for metric, value in PAIRED_METRICS.items():
+                differences = paired_difference_stats(results, baseline_results, value)
+                strategy_values, baseline_values = RunningStats(), RunningStats()
+                for i in range(num_pairs):
+                    strategy_values.add(value(results[i]))
+                    baseline_values.add(value(baseline_results[i]))
+                unpaired_se = (strategy_values.standard_error() ** 2 + baseline_values.standard_error() ** 2) ** 0.5
+                yield strategy_short, metric, differences, unpaired_se
+    
+    def display_paired_comparison(self, all_strategy_results):
+        """Print paired differences of each strategy against the first one"""
+        baseline_short = self.get_strategy_short(next(iter(all_strategy_results)))
+        print(f"\n{'='*90}")
+        print(f"PAIRED COMPARISON vs {baseline_short} (same shoes, 95% CI)")
+        print(f"{'='*90}")
+        print(f"{'Strategy':<10} {'Metric':<22} {'Difference':>14} {'Paired SE':>12} {'Unpaired SE':>12}")
+        print("-" * 90)
+        for strategy_short, metric, differences, unpaired_se in self.paired_comparisons(all_strategy_results):
+            low, high = differences.confidence_interval()
+            print(f"{strategy_short:<10} {metric:<22} {differences.mean:>+14.4f} {differences.standard_error():>12.4f} "
+                  f"{unpaired_se:>12.4f}   [{low:+.4f}, {high:+.4f}]")
         print("="*90)
     
     def export_combined_csv(self, all_strategy_results, rounds_per_scenario, starting_bankroll, bet_amount, target_multiplier):
         """Export combined results for both strategies to single CSV files"""
-        timestamp = datetime.now().strftime("%m%d_%H%M")
+        timestamp = self.timestamp
         
         # Create results directory if it doesn't exist
-        results_dir = os.path.join(os.path.dirname(__file__), "..", "results")
+        results_dir = self.results_dir
         os.makedirs(results_dir, exist_ok=True)
         
         # Export detailed scenario results - COMBINED
@@ -263,12 +596,13 @@ class BlackjackSimulator:
             writer.writerow([
                 'Strategy', 'Scenario', 'Player_Wins', 'Player_Blackjacks', 'Dealer_Wins', 'Draws', 'Dealer_Busts', 'Player_Busts',
                 'Total_Games', 'Starting_Bankroll', 'Final_Bankroll', 'Profit_Loss', 'Win_Rate_%', 'Blackjack_Rate_%',
-                'Target_Reached', 'Stopped_Early', 'Stop_Reason', 'Status'
+                'Target_Reached', 'Stopped_Early', 'Stop_Reason', 'Status',
+                'Mean_Money_Change', 'Money_Change_SE', 'Max_Drawdown'
             ])
             
             # Write data for all strategies
             for strategy_name, results in all_strategy_results.items():
-                strategy_short = "S12" if "12" in strategy_name else "S16"
+                strategy_short = self.get_strategy_short(strategy_name)
                 
                 for i, stats in enumerate(results, 1):
                     profit = stats.current_bankroll - starting_bankroll
@@ -291,7 +625,8 @@ class BlackjackSimulator:
                         strategy_short, i, stats.player_wins, stats.player_blackjacks, stats.dealer_wins, stats.draws, stats.dealer_busts,
                         stats.player_busts, stats.total_games, starting_bankroll, stats.current_bankroll,
                         profit, win_rate, blackjack_rate, stats.reached_target, stats.stopped_early,
-                        stats.stop_reason, status
+                        stats.stop_reason, status,
+                        stats.money_stats.mean, stats.money_stats.standard_error(), stats.max_drawdown
                     ])
         
         # Export summary statistics - COMBINED
@@ -305,6 +640,11 @@ class BlackjackSimulator:
             writer.writerow(['Configuration'])
             writer.writerow(['Strategies_Tested', ', '.join(all_strategy_results.keys())])
             writer.writerow(['Num_Decks', self.num_decks])
+            writer.writerow(['Master_Seed', self.seed])
+            writer.writerow(['Paired_Shoes', self.paired])
+            writer.writerow(['Single_Pass', self.single_pass])
+            writer.writerow(['Count_System', self.count_system])
+            writer.writerow(['Betting_Policy', self.betting.name])
             writer.writerow(['Total_Cards_Per_Shoe', self.num_decks * 52])
             writer.writerow(['Scenarios_Per_Strategy', len(next(iter(all_strategy_results.values())))])
             writer.writerow(['Rounds_Per_Scenario', rounds_per_scenario])
@@ -315,139 +655,111 @@ class BlackjackSimulator:
             writer.writerow([])
             
             # Write summary for each strategy
+            summaries = {}
             for strategy_name, results in all_strategy_results.items():
-                strategy_short = "S12" if "12" in strategy_name else "S16"
-                
-                # Calculate summary statistics
-                total_profit = sum(stats.current_bankroll - starting_bankroll for stats in results)
-                profitable_scenarios = sum(1 for stats in results if (stats.current_bankroll - starting_bankroll) > 0)
-                busted_scenarios = sum(1 for stats in results if stats.current_bankroll <= 0)
-                target_reached_scenarios = sum(1 for stats in results if stats.reached_target)
+                strategy_short = self.get_strategy_short(strategy_name)
                 
-                avg_profit = total_profit / len(results)
-                success_rate = (profitable_scenarios / len(results)) * 100
-                bust_rate = (busted_scenarios / len(results)) * 100
-                target_rate = (target_reached_scenarios / len(results)) * 100
-                
-                best_result = max(results, key=lambda x: x.current_bankroll - starting_bankroll)
-                worst_result = min(results, key=lambda x: x.current_bankroll - starting_bankroll)
-                best_profit = best_result.current_bankroll - starting_bankroll
-                worst_profit = worst_result.current_bankroll - starting_bankroll
+                summary = ScenarioSummary(results, starting_bankroll)
+                summaries[strategy_short] = summary
                 
                 writer.writerow([f'{strategy_short}_Summary'])
                 writer.writerow([f'{strategy_short}_Strategy_Name', strategy_name])
-                writer.writerow([f'{strategy_short}_Average_Profit_Loss', avg_profit])
-                writer.writerow([f'{strategy_short}_Total_Profit_Loss', total_profit])
-                writer.writerow([f'{strategy_short}_Profitable_Scenarios', profitable_scenarios])
-                writer.writerow([f'{strategy_short}_Success_Rate_%', success_rate])
-                writer.writerow([f'{strategy_short}_Target_Reached_Scenarios', target_reached_scenarios])
-                writer.writerow([f'{strategy_short}_Target_Rate_%', target_rate])
-                writer.writerow([f'{strategy_short}_Busted_Scenarios', busted_scenarios])
-                writer.writerow([f'{strategy_short}_Bust_Rate_%', bust_rate])
-                writer.writerow([f'{strategy_short}_Best_Scenario_Profit', best_profit])
-                writer.writerow([f'{strategy_short}_Worst_Scenario_Profit', worst_profit])
+                writer.writerow([f'{strategy_short}_Average_Profit_Loss', summary.average_profit])
+                writer.writerow([f'{strategy_short}_Average_Profit_Loss_SE', summary.profit_stats.standard_error()])
+                writer.writerow([f'{strategy_short}_Total_Profit_Loss', summary.total_profit])
+                writer.writerow([f'{strategy_short}_Profitable_Scenarios', summary.profitable_scenarios])
+                writer.writerow([f'{strategy_short}_Success_Rate_%', summary.success_rate])
+                writer.writerow([f'{strategy_short}_Target_Reached_Scenarios', summary.target_reached_scenarios])
+                writer.writerow([f'{strategy_short}_Target_Rate_%', summary.target_rate])
+                exact = self.exact_progression_outcomes(strategy_name, rounds_per_scenario, starting_bankroll,
+                                                        bet_amount, target_multiplier)
+                if exact is not None:
+                    writer.writerow([f'{strategy_short}_Exact_Infinite_Shoe_Target_Rate_%', exact['target'] * 100])
+                    writer.writerow([f'{strategy_short}_Exact_Infinite_Shoe_Insufficient_Funds_Rate_%', exact['ruin'] * 100])
+                    writer.writerow([f'{strategy_short}_Exact_Infinite_Shoe_Expected_Hands', exact['expected_hands']])
+                writer.writerow([f'{strategy_short}_Busted_Scenarios', summary.busted_scenarios])
+                writer.writerow([f'{strategy_short}_Bust_Rate_%', summary.bust_rate])
+                writer.writerow([f'{strategy_short}_Best_Scenario_Profit', summary.best_profit])
+                writer.writerow([f'{strategy_short}_Worst_Scenario_Profit', summary.worst_profit])
+                writer.writerow([f'{strategy_short}_Total_Hands', summary.money_stats.count])
+                self.write_running_stats(writer, f'{strategy_short}_Money_Change_Per_Hand', summary.money_stats)
+                self.write_running_stats(writer, f'{strategy_short}_Dealer_Bust_Rate', summary.dealer_bust_stats)
+                self.write_running_stats(writer, f'{strategy_short}_Drawdown', summary.drawdown_stats)
+                writer.writerow([f'{strategy_short}_Max_Drawdown', summary.max_drawdown])
+                for bucket, row in true_count_table(summary.true_count_buckets).items():
+                    label = f'{strategy_short}_True_Count_{bucket:+d}'
+                    writer.writerow([f'{label}_Hands', row['hands']])
+                    writer.writerow([f'{label}_Win_Rate_%', row['win_rate'] * 100])
+                    writer.writerow([f'{label}_Dealer_Bust_Rate_%', row['dealer_bust_rate'] * 100])
+                    writer.writerow([f'{label}_Mean_Money_Change', row['mean_money_change']])
+                if summary.phase_timer is not None:
+                    for phase in PHASES:
+                        writer.writerow([f'{strategy_short}_Phase_{phase}_Seconds', summary.phase_timer.seconds[phase]])
+                        writer.writerow([f'{strategy_short}_Phase_{phase}_Calls', summary.phase_timer.calls[phase]])
+                writer.writerow([])
+            
+            if (self.paired or self.single_pass) and len(all_strategy_results) > 1:
+                baseline_short = self.get_strategy_short(next(iter(all_strategy_results)))
+                writer.writerow(['Paired_Comparison'])
+                writer.writerow(['Baseline_Strategy', baseline_short])
+                writer.writerow(['Strategy', 'Metric', 'Mean_Difference', 'Paired_SE', 'CI95_Low', 'CI95_High',
+                                 'Unpaired_SE', 'Scenario_Pairs'])
+                for strategy_short, metric, differences, unpaired_se in self.paired_comparisons(all_strategy_results):
+                    low, high = differences.confidence_interval()
+                    writer.writerow([strategy_short, metric, differences.mean, differences.standard_error(),
+                                     low, high, unpaired_se, differences.count])
                 writer.writerow([])
             
             # Write comparison summary
             writer.writerow(['Strategy_Comparison'])
             writer.writerow(['Metric', 'Stand_at_12', 'Stand_at_16', 'Better_Strategy'])
             
-            # Get strategy results for comparison
-            s12_results = None
-            s16_results = None
-            for strategy_name, results in all_strategy_results.items():
-                if "12" in strategy_name:
-                    s12_results = results
-                else:
-                    s16_results = results
+            s12 = summaries.get('S12')
+            s16 = summaries.get('S16')
             
-            if s12_results and s16_results:
-                # Calculate metrics for comparison
-                s12_avg_profit = sum(stats.current_bankroll - starting_bankroll for stats in s12_results) / len(s12_results)
-                s16_avg_profit = sum(stats.current_bankroll - starting_bankroll for stats in s16_results) / len(s16_results)
-                
-                s12_success_rate = (sum(1 for stats in s12_results if (stats.current_bankroll - starting_bankroll) > 0) / len(s12_results)) * 100
-                s16_success_rate = (sum(1 for stats in s16_results if (stats.current_bankroll - starting_bankroll) > 0) / len(s16_results)) * 100
-                
-                s12_target_rate = (sum(1 for stats in s12_results if stats.reached_target) / len(s12_results)) * 100
-                s16_target_rate = (sum(1 for stats in s16_results if stats.reached_target) / len(s16_results)) * 100
-                
-                s12_bust_rate = (sum(1 for stats in s12_results if stats.current_bankroll <= 0) / len(s12_results)) * 100
-                s16_bust_rate = (sum(1 for stats in s16_results if stats.current_bankroll <= 0) / len(s16_results)) * 100
-                
-                writer.writerow(['Average_Profit', f'${s12_avg_profit:.2f}', f'${s16_avg_profit:.2f}', 'S12' if s12_avg_profit > s16_avg_profit else 'S16'])
-                writer.writerow(['Success_Rate_%', f'{s12_success_rate:.1f}%', f'{s16_success_rate:.1f}%', 'S12' if s12_success_rate > s16_success_rate else 'S16'])
-                writer.writerow(['Target_Rate_%', f'{s12_target_rate:.1f}%', f'{s16_target_rate:.1f}%', 'S12' if s12_target_rate > s16_target_rate else 'S16'])
-                writer.writerow(['Bust_Rate_%', f'{s12_bust_rate:.1f}%', f'{s16_bust_rate:.1f}%', 'S12' if s12_bust_rate < s16_bust_rate else 'S16'])
+            if s12 and s16:
+                writer.writerow(['Average_Profit', f'${s12.average_profit:.2f}', f'${s16.average_profit:.2f}', 'S12' if s12.average_profit > s16.average_profit else 'S16'])
+                writer.writerow(['Success_Rate_%', f'{s12.success_rate:.1f}%', f'{s16.success_rate:.1f}%', 'S12' if s12.success_rate > s16.success_rate else 'S16'])
+                writer.writerow(['Target_Rate_%', f'{s12.target_rate:.1f}%', f'{s16.target_rate:.1f}%', 'S12' if s12.target_rate > s16.target_rate else 'S16'])
+                writer.writerow(['Bust_Rate_%', f'{s12.bust_rate:.1f}%', f'{s16.bust_rate:.1f}%', 'S12' if s12.bust_rate < s16.bust_rate else 'S16'])
         
         print(f"\n📊 Combined results exported to CSV files:")
         print(f"   Detailed: {detailed_path}")
         print(f"   Summary:  {summary_path}")
         print(f"   Location: {os.path.abspath(results_dir)}")
     
-    def export_hand_records(self, all_strategy_results, rounds_per_scenario, starting_bankroll, bet_amount, target_multiplier):
-        """Export detailed hand-by-hand records for each strategy to separate CSV files"""
-        timestamp = datetime.now().strftime("%m%d_%H%M")
+    def write_running_stats(self, writer, label, stats):
+        """Write mean, standard error and 95% CI rows for a RunningStats"""
+        low, high = stats.confidence_interval()
+        writer.writerow([f'{label}_Mean', stats.mean])
+        writer.writerow([f'{label}_SE', stats.standard_error()])
+        writer.writerow([f'{label}_CI95_Low', low])
+        writer.writerow([f'{label}_CI95_High', high])
+    
+    def get_strategy_short(self, strategy_name):
+        """Return the short name (e.g. S12) of a strategy being tested"""
+        for strategy in self.strategies:
+            if strategy.name == strategy_name:
+                return strategy.short_name
+        return strategy_name
+    
+    def open_hand_record_sink(self, strategy_short, timestamp, resume_hands=None):
+        """Open a streaming sink for one strategy's hand-by-hand records (None if disabled)
+        
+        resume_hands continues an existing file after that many records.
+        """
+        if self.hand_record_format == 'none':
+            return None
         
         # Create results directory if it doesn't exist
-        results_dir = os.path.join(os.path.dirname(__file__), "..", "results")
+        results_dir = self.results_dir
         os.makedirs(results_dir, exist_ok=True)
         
-        # Export hand records for each strategy separately
-        for strategy_name, results in all_strategy_results.items():
-            strategy_short = "S12" if "12" in strategy_name else "S16"
-            
-            # Create filename for this strategy's hand records
-            hands_filename = f"BJ_{strategy_short}_hands_{timestamp}.csv"
-            hands_path = os.path.join(results_dir, hands_filename)
-            
-            with open(hands_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow([
-                    'Strategy', 'Scenario', 'Hand_Number', 'Player_Cards', 'Dealer_Cards',
-                    'Player_Total', 'Dealer_Total', 'Player_Action', 'Bet_Amount',
-                    'Result', 'Money_Change', 'Player_Busted', 'Dealer_Busted', 'Is_Blackjack',
-                    'Bankroll_After', 'Cards_Count', 'Deck_Penetration_%', 'Cards_Remaining', 'Reshuffled_After'
-                ])
-                
-                # Write all hand records for this strategy
-                total_hands = 0
-                for scenario_stats in results:
-                    for hand_record in scenario_stats.hand_records:
-                        total_hands += 1
-                        
-                        # Format card lists as strings
-                        player_cards_str = ' | '.join(hand_record.player_cards)
-                        dealer_cards_str = ' | '.join(hand_record.dealer_cards)
-                        cards_count = len(hand_record.player_cards) + len(hand_record.dealer_cards)
-                        
-                        writer.writerow([
-                            strategy_short,
-                            hand_record.scenario_number,
-                            hand_record.hand_number,
-                            player_cards_str,
-                            dealer_cards_str,
-                            hand_record.player_total,
-                            hand_record.dealer_total,
-                            hand_record.player_action,
-                            hand_record.bet_amount,
-                            hand_record.result,
-                            hand_record.money_change,
-                            hand_record.player_busted,
-                            hand_record.dealer_busted,
-                            hand_record.is_blackjack,
-                            hand_record.bankroll_after,
-                            cards_count,
-                            f"{hand_record.deck_penetration:.1f}%",
-                            hand_record.cards_remaining,
-                            hand_record.reshuffled_after
-                        ])
-                
-                print(f"\n📋 {strategy_short} Hand Records: {total_hands} hands exported to {hands_filename}")
-        
-        print(f"\n📁 Hand records location: {os.path.abspath(results_dir)}")
+        hands_filename = f"BJ_{strategy_short}_hands_{timestamp}.{self.hand_record_format}"
+        hands_path = os.path.join(results_dir, hands_filename)
+        if self.hand_record_format == 'npy':
+            return NpyHandSink(hands_path, resume_hands=resume_hands)
+        return CSVHandSink(hands_path, strategy_short, resume_hands=resume_hands)
     
     def start_game(self):
         """Start the game application"""
@@ -465,10 +777,183 @@ class BlackjackSimulator:
         
         print("\nThank you for using the Blackjack simulator!")
 
-def main():
+def is_whole_number(value):
+    """True for ints; bools are ints in Python but not valid counts"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def is_number(value):
+    """True for ints and floats, excluding bools"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def validate_settings(settings):
+    """Check a parameter set, raising ValueError with a readable message"""
+    unknown = set(settings) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown setting(s): {', '.join(sorted(unknown))}")
+    for key in ('decks', 'rounds', 'scenarios'):
+        if not is_whole_number(settings[key]) or settings[key] <= 0:
+            raise ValueError(f"'{key}' must be a positive whole number")
+    for key in ('bankroll', 'bet', 'target'):
+        if not is_number(settings[key]) or settings[key] <= 0:
+            raise ValueError(f"'{key}' must be a positive number")
+    if settings['bet'] > settings['bankroll']:
+        raise ValueError("'bet' cannot exceed 'bankroll'")
+    if settings['seed'] is not None and not is_whole_number(settings['seed']):
+        raise ValueError("'seed' must be a whole number")
+    if not is_whole_number(settings['workers']) or settings['workers'] < 0:
+        raise ValueError("'workers' must be 0 (one per CPU) or a positive whole number")
+    if settings['precision'] is not None and (
+            not is_number(settings['precision']) or settings['precision'] <= 0):
+        raise ValueError("'precision' must be a positive number (percent)")
+    if settings['precision_metric'] not in PRECISION_METRICS:
+        raise ValueError(f"'precision_metric' must be one of: {', '.join(PRECISION_METRICS)}")
+    if not isinstance(settings['paired'], bool):
+        raise ValueError("'paired' must be true or false")
+    if not isinstance(settings['single_pass'], bool):
+        raise ValueError("'single_pass' must be true or false")
+    if settings['count_system'] not in COUNT_SYSTEMS:
+        raise ValueError(f"'count_system' must be one of: {', '.join(COUNT_SYSTEMS)}")
+    if not isinstance(settings['betting'], str):
+        raise ValueError("'betting' must be a policy such as \"flat\" or \"martingale:3\"")
+    parse_betting_policy(settings['betting'])
+    if settings['cache'] is not None and not isinstance(settings['cache'], str):
+        raise ValueError("'cache' must be a directory path")
+    if not isinstance(settings['timing'], bool):
+        raise ValueError("'timing' must be true or false")
+    if settings['single_pass'] and settings['precision'] is not None:
+        raise ValueError("'precision' cannot be combined with 'single_pass'")
+    if settings['single_pass'] and settings['timing']:
+        raise ValueError("'timing' cannot be combined with 'single_pass'")
+    if settings['format'] not in HAND_RECORD_FORMATS:
+        raise ValueError(f"'format' must be one of: {', '.join(HAND_RECORD_FORMATS)}")
+    if isinstance(settings['strategies'], str):
+        settings['strategies'] = settings['strategies'].split(',')
+    if (not isinstance(settings['strategies'], list) or not settings['strategies']
+            or not all(isinstance(name, str) for name in settings['strategies'])):
+        raise ValueError("'strategies' must be a list of names such as [\"S12\", \"S16\"]")
+    for name in settings['strategies']:
+        if get_strategy(name).table is not None and settings['single_pass']:
+            raise ValueError(f"'single_pass' only supports hit/stand strategies, not {name}")
+    settings['bankroll'] = float(settings['bankroll'])
+    settings['bet'] = float(settings['bet'])
+    settings['workers'] = settings['workers'] or None
+    return settings
+
+def load_config(path):
+    """Load parameter sets from a TOML file
+    
+    Top-level keys are shared defaults; each [[runs]] table is one parameter
+    set that overrides them. A file without [[runs]] describes a single run.
+    """
+    if tomllib is None:
+        raise ValueError("TOML config files require Python 3.11 or newer")
+    with open(path, 'rb') as config_file:
+        config = tomllib.load(config_file)
+    
+    runs = config.pop('runs', None) or [{}]
+    return [dict(config, **run) for run in runs]
+
+def build_settings_list(args):
+    """Combine defaults, the config file and command-line flags into parameter sets"""
+    overrides = {key: value for key, value in vars(args).items()
+                 if key in DEFAULT_SETTINGS and value is not None}
+    runs = load_config(args.config) if args.config else [{}]
+    return [validate_settings({**DEFAULT_SETTINGS, **run, **overrides}) for run in runs]
+
+def parse_args(argv=None):
+    """Parse command-line options
+    
+    Without a config file or any simulation setting, the simulator prompts
+    for settings interactively as before.
+    """
+    parser = argparse.ArgumentParser(description="Blackjack Bust-the-Dealer Strategy Simulator")
+    parser.add_argument('--config', help="TOML file with settings and optional [[runs]] parameter sets")
+    parser.add_argument('--decks', type=int, help="decks in the shoe (default 6)")
+    parser.add_argument('--rounds', type=int, help="rounds per scenario (default 1000)")
+    parser.add_argument('--scenarios', type=int, help="scenarios per strategy (default 10)")
+    parser.add_argument('--bankroll', type=float, help="starting bankroll (default 1000)")
+    parser.add_argument('--bet', type=float, help="base bet per hand (default 10)")
+    parser.add_argument('--target', type=float, help="target profit as a multiple of the bankroll (default 0.5)")
+    parser.add_argument('--strategies', type=lambda value: value.split(','),
+                        help="comma-separated strategies, e.g. S12,S16 (S12 to S21, or BASIC for basic strategy)")
+    parser.add_argument('--workers', type=int,
+                        help="worker processes for running scenarios (0 = one per CPU, default 1)")
+    parser.add_argument('--seed', type=int, help="master seed for reproducible runs (default: unseeded)")
+    parser.add_argument('--format', choices=HAND_RECORD_FORMATS, help="hand record output format (default csv)")
+    parser.add_argument('--paired', action='store_true', default=None,
+                        help="play every strategy on the same shoes and report paired differences")
+    parser.add_argument('--single-pass', action='store_true', default=None,
+                        help="evaluate all strategies over the same hands in one pass (no hand records)")
+    parser.add_argument('--betting', metavar='POLICY',
+                        help="betting policy: flat, martingale[:MULT[:CAP]], spread[:TOP] or kelly[:FRACTION] "
+                             "(default martingale:3)")
+    parser.add_argument('--count-system', choices=tuple(COUNT_SYSTEMS),
+                        help="card counting system for the true count breakdown (default hi-lo)")
+    parser.add_argument('--cache', metavar='DIR',
+                        help="reuse results of seeded scenarios stored in DIR (with --format none)")
+    parser.add_argument('--timing', action='store_true', default=None,
+                        help="time each phase of every round (deal, player, dealer, ...) and report it")
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help="save completed scenarios to FILE while running, so an interrupted run can resume")
+    parser.add_argument('--resume', metavar='FILE',
+                        help="continue the run saved in checkpoint FILE (its settings are used; "
+                             "only --workers and --profile may be given)")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="write a cProfile/pstats file of the run (main process only)")
+    parser.add_argument('--precision', type=float,
+                        help="stop once the standard error is at or below this many percent, "
+                             "e.g. 0.05 (--scenarios becomes the upper bound)")
+    parser.add_argument('--precision-metric', choices=tuple(PRECISION_METRICS),
+                        help="statistic the precision target applies to (default dealer_bust)")
+    return parser.parse_args(argv)
+
+def is_interactive(args):
+    """True when no config file or simulation setting was given on the command line"""
+    return args.config is None and all(
+        getattr(args, key) is None for key in DEFAULT_SETTINGS if key not in ('workers', 'seed', 'paired'))
+
+def main(argv=None):
     """Main function"""
-    simulator = BlackjackSimulator()
-    simulator.start_game()
+    args = parse_args(argv)
+    
+    if args.resume:
+        if args.checkpoint or args.seed is not None or args.paired or not is_interactive(args):
+            raise SystemExit("--resume takes its settings from the checkpoint; only --workers and --profile "
+                             "may be given with it")
+        try:
+            checkpoint = Checkpoint.load(args.resume)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Cannot resume: {e}")
+        settings_list = checkpoint.settings_list
+        if args.workers is not None:
+            for settings in settings_list:
+                settings['workers'] = args.workers or None
+    else:
+        checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+        
+        if is_interactive(args):
+            workers = DEFAULT_SETTINGS['workers'] if args.workers is None else args.workers
+            simulator = BlackjackSimulator(num_workers=workers or None, seed=args.seed, paired=bool(args.paired),
+                                           checkpoint=checkpoint)
+            if args.profile:
+                run_profiled(args.profile, simulator.start_game)
+            else:
+                simulator.start_game()
+            return
+        
+        try:
+            settings_list = build_settings_list(args)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Invalid settings: {e}")
+    
+    simulator = BlackjackSimulator(checkpoint=checkpoint)
+    try:
+        if args.profile:
+            run_profiled(args.profile, simulator.run_sweep, settings_list)
+        else:
+            simulator.run_sweep(settings_list)
+    except KeyboardInterrupt:
+        raise SystemExit("\nSimulation interrupted by user.")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,191 @@
+# Parallel scenario runner
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from game import PRECISION_METRICS, GameSimulator, precision_reached, precision_stats
+from utils import RunningStats
+from rng import RandomStream, derive_seed
+
+
+def run_scenario(task, sink=None):
+    """Run one scenario (usually in a worker process) and return its GameStats
+    
+    task is (num_decks, strategy, num_rounds, starting_bankroll,
+    base_bet_amount, target_multiplier, scenario_number, seed, record_hands,
+    timing, count_system, betting, cache), as built by iter_scenarios.
+    """
+    (num_decks, strategy, num_rounds, starting_bankroll, base_bet_amount,
+     target_multiplier, scenario_number, seed, record_hands, timing, count_system, betting, cache) = task
+    
+    rng = RandomStream(seed) if seed is not None else None
+    simulator = GameSimulator(num_decks, timing=timing, count_system=count_system, cache=cache)
+    # Skipping records keeps the result compact when it is sent back to the parent
+    return simulator.simulate(strategy, num_rounds, starting_bankroll, base_bet_amount,
+                              target_multiplier, scenario_number, sink, rng, record_hands, betting=betting)
+
+
+def run_family_scenario(task):
+    """Run one scenario of every strategy in a single pass and return their GameStats
+    
+    task is (num_decks, strategies, num_rounds, starting_bankroll,
+    base_bet_amount, target_multiplier, scenario_number, seed, count_system,
+    betting, cache), as built by iter_family_scenarios.
+    """
+    (num_decks, strategies, num_rounds, starting_bankroll, base_bet_amount,
+     target_multiplier, scenario_number, seed, count_system, betting, cache) = task
+    
+    rng = RandomStream(seed) if seed is not None else None
+    simulator = GameSimulator(num_decks, count_system=count_system, cache=cache)
+    return simulator.simulate_family(strategies, num_rounds, starting_bankroll, base_bet_amount,
+                                     target_multiplier, scenario_number, rng, betting)
+
+
+def create_executor(num_workers, initializer=None):
+    """Create a process pool, or None when running serially
+    
+    initializer, if given, runs once in each worker process as it starts.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers <= 1:
+        return None
+    executor = ProcessPoolExecutor(max_workers=num_workers, initializer=initializer)
+    executor.num_workers = num_workers  # Read by map_in_order for its default window
+    return executor
+
+
+def default_window(num_workers=None):
+    """Tasks to keep queued on a pool: two per worker, so no worker waits for its next task
+    
+    num_workers defaults to one per CPU, as in create_executor.
+    """
+    return 2 * (num_workers or os.cpu_count() or 1)
+
+
+def map_in_order(executor, function, tasks, window=None):
+    """Yield function(task) for each task, in task order, running them on executor
+    
+    Only window tasks (default: default_window of the executor's workers, when
+    it came from create_executor) are on the pool at a time:
+    task i + window is submitted once result i has been consumed, so
+    finished results never pile up faster than the caller handles them.
+    Tasks still queued are cancelled when the generator is closed.
+    """
+    window = window or default_window(getattr(executor, 'num_workers', None))
+    tasks = iter(tasks)
+    pending = deque(executor.submit(function, task) for task in itertools.islice(tasks, window))
+    try:
+        while pending:
+            yield pending.popleft().result()
+            for task in itertools.islice(tasks, 1):
+                pending.append(executor.submit(function, task))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def iter_scenarios(strategy, num_scenarios, num_rounds, starting_bankroll=1000.0, base_bet_amount=10.0,
+                   target_multiplier=0.5, num_decks=6, executor=None, seed=None, strategy_index=0,
+                   record_hands=True, window=None, sink=None, precision_target=None,
+                   precision_metric='dealer_bust', timing=False, count_system='hi-lo', betting=None,
+                   cache=None, completed=()):
+    """Yield the GameStats of each scenario in scenario order
+    
+    Without an executor the scenarios run one after another in this process.
+    With an executor the scenarios run on the pool and are collected in
+    order, with at most window of them submitted ahead of the one being
+    yielded (see map_in_order), so records held by finished scenarios stay
+    bounded. When a master seed is given, every (strategy, scenario)
+    pair plays on its own RandomStream derived from it, so results do not
+    depend on the worker count or on which worker runs a scenario.
+    
+    When a sink is given, hand records are written to it instead of being
+    kept on the yielded GameStats. Worker processes send back one scenario's
+    records at a time, which the parent forwards to the sink in order.
+    
+    With a precision_target, num_scenarios becomes an upper bound: the
+    per-hand statistics of the scenarios yielded so far are merged, and no
+    further scenarios are yielded once the standard error of
+    precision_metric is at or below the target. Scenarios are checked in
+    order, so a seeded run stops at the same scenario for any worker count;
+    pending scenarios on the pool are cancelled.
+    
+    With timing=True each GameStats carries a PhaseTimer of its scenario.
+    count_system names the card counting system (see deck.COUNT_SYSTEMS)
+    behind the true count buckets of each GameStats, and betting is the
+    BettingPolicy every scenario plays (default: x3 on loss).
+    
+    With a ResultCache, seeded scenarios that keep no hand records are
+    looked up before they run (in the worker, when there is a pool), so
+    repeating or extending a seeded run only plays the new scenarios.
+    
+    completed holds the GameStats of the first scenarios from an earlier,
+    interrupted run (see checkpoint.Checkpoint). They are not run or
+    yielded again, but count towards the precision target, so a resumed
+    run yields exactly the scenarios the uninterrupted run would have
+    yielded after them.
+    """
+    # Records bound for a sink have to travel back from the workers
+    record_hands = record_hands or sink is not None
+    running = None
+    if precision_target is not None:
+        if precision_metric not in PRECISION_METRICS:
+            raise ValueError(f"Unknown precision metric {precision_metric!r}")
+        running = RunningStats()
+        for stats in completed:
+            running.merge(precision_stats(stats, precision_metric))
+        if completed and precision_reached(running, precision_target):
+            return
+    
+    tasks = []
+    for scenario_number in range(len(completed) + 1, num_scenarios + 1):
+        seed_value = None if seed is None else derive_seed(seed, strategy_index, scenario_number)
+        tasks.append((num_decks, strategy, num_rounds, starting_bankroll, base_bet_amount,
+                      target_multiplier, scenario_number, seed_value, record_hands, timing, count_system,
+                      betting, cache))
+    
+    if executor is None:
+        results = (run_scenario(task, sink) for task in tasks)
+    else:
+        results = map_in_order(executor, run_scenario, tasks, window)
+    
+    try:
+        for stats in results:
+            if executor is not None and sink is not None:
+                for hand_record in stats.hand_records:
+                    sink.write(hand_record)
+                stats.hand_records = []
+            yield stats
+            
+            if running is not None:
+                running.merge(precision_stats(stats, precision_metric))
+                if precision_reached(running, precision_target):
+                    return
+    finally:
+        # Cancels scenarios still queued on the pool when stopping early
+        results.close()
+
+
+def iter_family_scenarios(strategies, num_scenarios, num_rounds, starting_bankroll=1000.0, base_bet_amount=10.0,
+                          target_multiplier=0.5, num_decks=6, executor=None, seed=None, window=None,
+                          count_system='hi-lo', betting=None, cache=None, completed=()):
+    """Yield, for each scenario in order, a list of GameStats (one per strategy)
+    
+    Every strategy plays the scenario's shoes in one pass (see
+    GameSimulator.simulate_family). Scenario seeds are the ones iter_scenarios
+    gives strategy index 0, so a family of one strategy reproduces it.
+    Scenarios in completed (from an interrupted run) are skipped.
+    """
+    tasks = []
+    for scenario_number in range(len(completed) + 1, num_scenarios + 1):
+        seed_value = None if seed is None else derive_seed(seed, 0, scenario_number)
+        tasks.append((num_decks, list(strategies), num_rounds, starting_bankroll, base_bet_amount,
+                      target_multiplier, scenario_number, seed_value, count_system, betting, cache))
+    
+    if executor is None:
+        for task in tasks:
+            yield run_family_scenario(task)
+        return
+    
+    yield from map_in_order(executor, run_family_scenario, tasks, window)
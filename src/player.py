@@ -1,11 +1,11 @@
 # Player module
-from utils import calculate_hand_value, is_bust, format_hand
+from utils import HAND_VALUES, Hand, format_hand
 
 class Player:
     """Represents a player in the blackjack game"""
     def __init__(self, name):
         self.name = name
-        self.hand = []
+        self.hand = Hand()
     
     def add_card(self, card):
         """Add a card to the player's hand"""
@@ -13,24 +13,29 @@ class Player:
     
     def clear_hand(self):
         """Clear the player's hand for a new round"""
-        self.hand = []
+        self.hand.clear()
     
     def get_hand_value(self):
-        """Get the current value of the hand"""
-        return calculate_hand_value(self.hand)
+        """Get the current value of the hand (cached in the hand state)"""
+        return HAND_VALUES[self.hand.state]
     
     def is_busted(self):
         """Check if the player is busted"""
-        return is_bust(self.hand)
+        return HAND_VALUES[self.hand.state] > 21
     
     def get_hand_display(self):
         """Get a formatted display of the hand"""
         return format_hand(self.hand)
     
-    def make_move(self, strategy=None):
-        """Make a move based on strategy (to be overridden or use strategy)"""
+    def make_move(self, strategy=None, upcard=None):
+        """Make a move based on strategy (to be overridden or use strategy)
+        
+        upcard is the dealer upcard's points (Ace = 1), required with a strategy.
+        """
         if strategy:
-            return strategy.decide(self.hand)
+            if upcard is None:
+                raise ValueError("make_move needs the dealer upcard to consult a strategy")
+            return strategy.decide(self.hand, upcard)
         return 'stand'  # Default action
 
 class Dealer(Player):
@@ -40,7 +45,7 @@ class Dealer(Player):
     
     def should_hit(self):
         """Dealer hits on 16 or less, stands on 17+"""
-        return self.get_hand_value() <= 16
+        return HAND_VALUES[self.hand.state] <= 16
     
     def get_upcard(self):
         """Get the dealer's face-up card (first card)"""
@@ -0,0 +1,30 @@
+# Random number streams
+import random
+
+
+def derive_seed(master_seed, *keys):
+    """Derive an independent 64-bit seed from a master seed and any number of keys"""
+    # String seeds are hashed with SHA-512, which is stable across processes and runs
+    key = ':'.join(str(part) for part in (master_seed,) + keys)
+    return random.Random(key).getrandbits(64)
+
+
+class RandomStream(random.Random):
+    """Seedable random number generator that can spawn independent substreams
+    
+    A RandomStream is a regular random.Random, so it can be passed anywhere a
+    shuffle/randint source is expected (Deck, Game, GameSimulator).
+    """
+    
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed_value = seed
+        super().__init__(seed)
+    
+    def spawn(self, *keys):
+        """Return the substream identified by keys (e.g. strategy and scenario)"""
+        return RandomStream(derive_seed(self.seed_value, *keys))
+    
+    def __reduce__(self):
+        return (self.__class__, (self.seed_value,), self.getstate())
@@ -0,0 +1,161 @@
+# Exact target and ruin probabilities of the progressive betting walk
+import argparse
+import math
+from functools import lru_cache
+from threshold_ev import threshold_strategy_ev
+
+# Keeps infinite-horizon solves from running forever when a walk never stops
+MAX_ROUNDS = 1_000_000
+# Largest bankroll-plus-target, in half base bets, solved (about a second per 1,000 rounds)
+MAX_UNITS = 20_000
+
+
+def _solve(win, blackjack, push, loss, bankroll_units, target_units, multiplier, num_rounds, tolerance):
+    """Run the DP over (bankroll, bet level) states; amounts are in half base bets
+    
+    target[k][b], ruin[k][b] and hands[k][b] hold, for a round about to start
+    with bankroll b and bet level k (bet = 2 * multiplier**k units), the
+    probability of stopping at the target, of stopping for insufficient
+    funds, and the expected number of hands played, with n rounds left.
+    Only playing states (bet <= b < top) are stored; the rest are stops.
+    """
+    top = bankroll_units + target_units  # Bankroll at which the target is reached
+    bets = []
+    bet = 2
+    while bet < top:  # Larger bets can never be covered by a playing bankroll
+        bets.append(bet)
+        bet *= multiplier
+    levels = len(bets)
+    
+    target = [[0.0] * top for _ in bets]
+    ruin = [[0.0] * top for _ in bets]
+    hands = [[0.0] * top for _ in bets]
+    
+    rounds = 0
+    while True:
+        # Once almost every walk has stopped, further rounds change nothing
+        unfinished = 1.0 - target[0][bankroll_units] - ruin[0][bankroll_units]
+        if rounds == num_rounds or (rounds and unfinished <= tolerance):
+            break
+        if rounds == MAX_ROUNDS:
+            raise ValueError(f"Walk has not settled after {MAX_ROUNDS:,} rounds")
+        
+        # With no rounds left after this one, the next state is never checked
+        live = 1.0 if rounds else 0.0
+        rounds += 1
+        target0, ruin0, hands0 = target[0], ruin[0], hands[0]
+        new_target, new_ruin, new_hands = [], [], []
+        
+        for k, bet in enumerate(bets):
+            level_target = [0.0] * top
+            level_ruin = [0.0] * top
+            level_hands = [0.0] * top
+            if k + 1 < levels:
+                next_bet = bets[k + 1]
+                next_target, next_ruin, next_hands = target[k + 1], ruin[k + 1], hands[k + 1]
+            else:
+                next_bet = top  # Never affordable: a loss here always ends the walk
+            bonus = bet * 3 // 2
+            
+            for b in range(bet, top):
+                # Push: same bankroll, bet resets
+                t = push * target0[b]
+                r = push * ruin0[b]
+                e = push * hands0[b]
+                # Win and blackjack: bankroll grows, bet resets
+                for probability, after in ((win, b + bet), (blackjack, b + bonus)):
+                    if after >= top:
+                        t += probability * live
+                    else:
+                        t += probability * target0[after]
+                        r += probability * ruin0[after]
+                        e += probability * hands0[after]
+                # Loss: bankroll shrinks, bet moves up a level
+                after = b - bet
+                if after >= next_bet:
+                    t += loss * next_target[after]
+                    r += loss * next_ruin[after]
+                    e += loss * next_hands[after]
+                else:
+                    r += loss * live
+                level_target[b] = t
+                level_ruin[b] = r
+                level_hands[b] = 1.0 + e
+            
+            new_target.append(level_target)
+            new_ruin.append(level_ruin)
+            new_hands.append(level_hands)
+        target, ruin, hands = new_target, new_ruin, new_hands
+    
+    return target[0][bankroll_units], ruin[0][bankroll_units], hands[0][bankroll_units], rounds
+
+
+@lru_cache(maxsize=None)
+def progression_outcomes(win, blackjack, push, loss, starting_bankroll=1000.0, base_bet_amount=10.0,
+                         target_multiplier=0.5, num_rounds=None, multiplier=3, tolerance=1e-10):
+    """Exact outcome probabilities of GameSimulator.simulate's progressive walk
+    
+    win, blackjack, push and loss are the per-hand probabilities (win
+    excluding blackjack, which pays 3:2). The bet starts at the base bet, is
+    multiplied after each loss and resets after a win or push; before each
+    round the walk stops when the bankroll cannot cover the bet (ruin) or
+    the profit has reached the target. num_rounds=None solves the unlimited
+    walk to within tolerance.
+    
+    Returns {'target', 'ruin', 'unfinished', 'expected_hands', 'rounds'}.
+    Results are cached per configuration.
+    """
+    if abs(win + blackjack + push + loss - 1.0) > 1e-9:
+        raise ValueError("Hand outcome probabilities must sum to 1")
+    if not isinstance(multiplier, int) or multiplier < 2:
+        raise ValueError("multiplier must be a whole number of at least 2")
+    
+    unit = base_bet_amount / 2  # Blackjack pays 1.5 bets, a whole number of half bets
+    bankroll_units = starting_bankroll / unit
+    target_units = math.ceil(starting_bankroll * target_multiplier / unit - 1e-9)
+    if bankroll_units != int(bankroll_units):
+        raise ValueError("starting_bankroll must be a whole number of half base bets")
+    bankroll_units = int(bankroll_units)
+    if bankroll_units < 2 or target_units < 1:
+        raise ValueError("bankroll must cover the base bet and the target must be positive")
+    if bankroll_units + target_units > MAX_UNITS:
+        raise ValueError(f"Bankroll and target span more than {MAX_UNITS:,} half bets")
+    
+    target, ruin, hands, rounds = _solve(win, blackjack, push, loss, bankroll_units, target_units,
+                                         multiplier, num_rounds, tolerance)
+    return {
+        'target': target,
+        'ruin': ruin,
+        'unfinished': max(0.0, 1.0 - target - ruin),
+        'expected_hands': hands,
+        'rounds': rounds,
+    }
+
+
+def threshold_progression_outcomes(threshold, num_decks=None, starting_bankroll=1000.0, base_bet_amount=10.0,
+                                   target_multiplier=0.5, num_rounds=None, multiplier=3):
+    """progression_outcomes for a stand-at-threshold strategy, from its exact hand probabilities"""
+    ev = threshold_strategy_ev(threshold, num_decks)
+    return progression_outcomes(ev['win'], ev['blackjack'], ev['push'], ev['loss'], float(starting_bankroll),
+                                float(base_bet_amount), float(target_multiplier), num_rounds, multiplier)
+
+
+def main(argv=None):
+    """Print exact target and ruin probabilities for S12 to S21 on an infinite shoe"""
+    parser = argparse.ArgumentParser(description="Exact target/ruin probabilities of the x3 progression "
+                                                 "(infinite shoe)")
+    parser.add_argument('--bankroll', type=float, default=1000.0)
+    parser.add_argument('--bet', type=float, default=10.0)
+    parser.add_argument('--target', type=float, default=0.5)
+    parser.add_argument('--rounds', type=int, help="rounds per scenario (default: unlimited)")
+    args = parser.parse_args(argv)
+    
+    print(f"{'Strategy':<10} {'Target%':>9} {'Ruin%':>9} {'Unfinished%':>12} {'Exp. hands':>11}")
+    for threshold in range(12, 22):
+        outcome = threshold_progression_outcomes(threshold, None, args.bankroll, args.bet, args.target, args.rounds)
+        print(f"S{threshold:<9} {outcome['target'] * 100:>9.2f} {outcome['ruin'] * 100:>9.2f} "
+              f"{outcome['unfinished'] * 100:>12.2f} {outcome['expected_hands']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+# Local HTTP/JSON-lines simulation service
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import signal
+from collections import deque
+from time import monotonic
+from cache import ResultCache
+from game import ScenarioSummary, precision_reached, precision_stats
+from main import DEFAULT_SETTINGS, validate_settings
+from betting import parse_betting_policy
+from parallel import create_executor, default_window, run_family_scenario, run_scenario
+from rng import derive_seed
+from strategy import get_strategy
+from utils import RunningStats
+
+# Job settings the service accepts; hand records, timing and workers belong to the CLI
+JOB_SETTINGS = ('decks', 'rounds', 'scenarios', 'bankroll', 'bet', 'target', 'strategies', 'seed', 'paired',
+                'single_pass', 'precision', 'precision_metric', 'count_system', 'betting')
+
+# Finished jobs and their events are kept this many seconds for late clients,
+# and no more than MAX_FINISHED_JOBS of them at a time
+FINISHED_JOB_TTL = 3600.0
+MAX_FINISHED_JOBS = 100
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 64 * 1024
+
+HTTP_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _ignore_sigint():
+    """Leave Ctrl+C to the service process, which shuts the pool down"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def summary_fields(summary):
+    """Return the JSON-friendly aggregate of a ScenarioSummary"""
+    return {
+        'scenarios': summary.num_scenarios,
+        'hands': summary.money_stats.count,
+        'average_profit': summary.average_profit,
+        'profit_se': summary.profit_stats.standard_error(),
+        'success_rate': summary.success_rate,
+        'bust_rate': summary.bust_rate,
+        'target_rate': summary.target_rate,
+        'max_drawdown': summary.max_drawdown,
+        'return_per_unit_bet': summary.return_stats.mean,
+        'return_per_unit_bet_se': summary.return_stats.standard_error(),
+        'dealer_bust_rate': summary.dealer_bust_stats.mean,
+        'dealer_bust_rate_se': summary.dealer_bust_stats.standard_error(),
+    }
+
+
+class Job:
+    """One simulation request and the progress events it has produced
+    
+    Events are kept for the life of the job, so a client that starts
+    following late first receives everything it missed. The service forgets
+    the job (see SimulationService.evict_jobs) some time after it finishes.
+    """
+    
+    def __init__(self, job_id, settings):
+        self.id = job_id
+        self.settings = settings
+        self.status = 'queued'  # Then running, and finally completed, cancelled or failed
+        self.events = []
+        self.summaries = {}  # Strategy short name -> ScenarioSummary so far
+        self.task = None
+        self.finished_at = None  # monotonic() time the job finished
+        self.changed = asyncio.Condition()
+    
+    @property
+    def finished(self):
+        return self.status in ('completed', 'cancelled', 'failed')
+    
+    async def publish(self, event):
+        """Record an event and wake every client following the job"""
+        self.events.append(event)
+        async with self.changed:
+            self.changed.notify_all()
+    
+    async def finish(self, status, **fields):
+        """End the job with a final status and publish the 'finished' event"""
+        self.status = status
+        self.finished_at = monotonic()
+        await self.publish({'event': 'finished', **self.snapshot(), **fields})
+    
+    def snapshot(self):
+        """Return the job's current state"""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'settings': self.settings,
+            'summaries': {name: summary_fields(summary) for name, summary in self.summaries.items()},
+        }
+
+
+class SimulationService:
+    """Runs simulation jobs on one shared pool of worker processes
+    
+    Scenarios of all jobs are queued on the same warm pool through
+    run_in_executor, so the event loop only collects results in scenario
+    order and publishes a progress event with the partial aggregates after
+    each one. Cancelling a job cancels its scenarios that have not started.
+    Every job is seeded (the service picks a master seed when the request
+    has none), so a job can be repeated with the CLI.
+    """
+    
+    def __init__(self, num_workers=None, cache=None, job_ttl=FINISHED_JOB_TTL, max_finished_jobs=MAX_FINISHED_JOBS):
+        self.executor = create_executor(num_workers, _ignore_sigint)  # None runs scenarios on the loop's default threads
+        # Scenarios each job keeps queued on the pool
+        self.window = default_window(num_workers)
+        self.cache = cache
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+    
+    def close(self):
+        """Cancel running jobs and shut the pool down"""
+        for job in self.jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+    
+    def evict_jobs(self):
+        """Forget finished jobs older than job_ttl, then the oldest beyond max_finished_jobs
+        
+        Clients still following an evicted job keep receiving its events.
+        """
+        now = monotonic()
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished_at)
+        excess = len(finished) - self.max_finished_jobs
+        for i, job in enumerate(finished):
+            if i < excess or now - job.finished_at >= self.job_ttl:
+                del self.jobs[job.id]
+    
+    def submit(self, request):
+        """Validate a job request (a dict of JOB_SETTINGS) and start it, raising ValueError if invalid"""
+        if not isinstance(request, dict):
+            raise ValueError("Job must be a JSON object of settings")
+        unsupported = set(request) - set(JOB_SETTINGS)
+        if unsupported:
+            raise ValueError(f"Unsupported setting(s): {', '.join(sorted(unsupported))}")
+        settings = validate_settings({**DEFAULT_SETTINGS, **request})
+        settings = {key: settings[key] for key in JOB_SETTINGS}
+        if settings['seed'] is None:
+            settings['seed'] = random.SystemRandom().randrange(2**32)
+        
+        job = Job(str(next(self.job_ids)), settings)
+        self.jobs[job.id] = job
+        job.task = asyncio.get_running_loop().create_task(self.run_job(job))
+        return job
+    
+    def cancel(self, job):
+        """Stop a job; scenarios already running on the pool finish and are discarded"""
+        if job.task is not None and not job.finished:
+            job.task.cancel()
+            if job.status == 'queued':
+                # run_job has not started, so it will never publish the end of the job itself
+                job.task = asyncio.get_running_loop().create_task(job.finish('cancelled'))
+    
+    async def run_job(self, job):
+        """Run every scenario of a job, publishing progress until it ends"""
+        settings = job.settings
+        strategies = [get_strategy(name) for name in settings['strategies']]
+        for strategy in strategies:
+            job.summaries[strategy.short_name] = ScenarioSummary((), settings['bankroll'])
+        job.status = 'running'
+        await job.publish({'event': 'started', 'id': job.id, 'seed': settings['seed']})
+        
+        try:
+            if settings['single_pass']:
+                await self.run_family(job, strategies)
+            else:
+                for strategy_index, strategy in enumerate(strategies):
+                    await self.run_strategy(job, strategy, 0 if settings['paired'] else strategy_index)
+        except asyncio.CancelledError:
+            await job.finish('cancelled')
+            raise
+        except Exception as e:
+            await job.finish('failed', error=str(e))
+            return
+        await job.finish('completed')
+    
+    async def run_in_order(self, function, tasks, on_result):
+        """Run tasks on the pool and await on_result(result) for each, in task order
+        
+        Only self.window tasks are queued at a time, so the scenarios of
+        concurrent jobs take turns on the pool. Stops early when on_result
+        returns True; queued tasks are cancelled when stopping.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = iter(tasks)
+        pending = deque()
+        try:
+            while True:
+                for task in itertools.islice(tasks, self.window - len(pending)):
+                    pending.append(loop.run_in_executor(self.executor, function, task))
+                if not pending:
+                    return
+                if await on_result(await pending.popleft()):
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    async def run_strategy(self, job, strategy, seed_index):
+        """Run one strategy's scenarios in order, stopping early at the precision target"""
+        settings = job.settings
+        betting = parse_betting_policy(settings['betting'])
+        precision_target = None if settings['precision'] is None else settings['precision'] / 100
+        running = RunningStats()
+        tasks = [(settings['decks'], strategy, settings['rounds'], settings['bankroll'], settings['bet'],
+                  settings['target'], scenario_number, derive_seed(settings['seed'], seed_index, scenario_number),
+                  False, False, settings['count_system'], betting, self.cache)
+                 for scenario_number in range(1, settings['scenarios'] + 1)]
+        
+        async def on_result(stats):
+            await self.publish_scenario(job, strategy, stats)
+            if precision_target is None:
+                return False
+            running.merge(precision_stats(stats, settings['precision_metric']))
+            if not precision_reached(running, precision_target):
+                return False
+            await job.publish({'event': 'precision_reached', 'strategy': strategy.short_name,
+                               'scenario': stats.current_scenario})
+            return True
+        
+        await self.run_in_order(run_scenario, tasks, on_result)
+    
+    async def run_family(self, job, strategies):
+        """Run every scenario once for all strategies together"""
+        settings = job.settings
+        betting = parse_betting_policy(settings['betting'])
+        tasks = [(settings['decks'], strategies, settings['rounds'], settings['bankroll'], settings['bet'],
+                  settings['target'], scenario_number, derive_seed(settings['seed'], 0, scenario_number),
+                  settings['count_system'], betting, self.cache)
+                 for scenario_number in range(1, settings['scenarios'] + 1)]
+        
+        async def on_result(family_stats):
+            for strategy, stats in zip(strategies, family_stats):
+                await self.publish_scenario(job, strategy, stats)
+            return False
+        
+        await self.run_in_order(run_family_scenario, tasks, on_result)
+    
+    async def publish_scenario(self, job, strategy, stats):
+        """Fold a finished scenario into the job's aggregates and publish them"""
+        summary = job.summaries[strategy.short_name]
+        summary.add(stats)
+        await job.publish({
+            'event': 'scenario',
+            'strategy': strategy.short_name,
+            'scenario': stats.current_scenario,
+            'scenarios': job.settings['scenarios'],
+            'final_bankroll': stats.current_bankroll,
+            'summary': summary_fields(summary),
+        })
+    
+    async def handle(self, reader, writer):
+        """Serve one HTTP request
+        
+        POST /jobs            start a job from a JSON object of settings
+        GET /jobs             list jobs
+        GET /jobs/ID          current state and aggregates of a job
+        GET /jobs/ID/events   stream the job's events as JSON lines until it ends
+        DELETE /jobs/ID       cancel a job
+        
+        Invalid requests get a 400 JSON error; an unexpected error gets a 500
+        one rather than a dropped connection.
+        """
+        try:
+            await self.dispatch(reader, writer)
+        except Exception as e:
+            if not writer.is_closing():
+                await send_json(writer, 500, {'error': f"Internal error: {e}"})
+    
+    async def dispatch(self, reader, writer):
+        """Read one request and route it (see handle)"""
+        self.evict_jobs()
+        try:
+            method, path, body = await read_request(reader)
+        except ValueError as e:
+            await send_json(writer, 400, {'error': str(e)})
+            return
+        except asyncio.IncompleteReadError:
+            writer.close()
+            return
+        
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if not parts or parts[0] != 'jobs' or len(parts) > 3 or (len(parts) == 3 and parts[2] != 'events'):
+            await send_json(writer, 404, {'error': f"No such resource: {path}"})
+            return
+        
+        if len(parts) == 1:
+            if method == 'GET':
+                await send_json(writer, 200, {'jobs': [{'id': job.id, 'status': job.status}
+                                                       for job in self.jobs.values()]})
+            elif method == 'POST':
+                try:
+                    job = self.submit(json.loads(body or b'{}'))
+                except (TypeError, ValueError) as e:  # Includes malformed JSON and bad settings
+                    await send_json(writer, 400, {'error': str(e)})
+                    return
+                await send_json(writer, 202, job.snapshot())
+            else:
+                await send_json(writer, 405, {'error': f"{method} not allowed on /jobs"})
+            return
+        
+        job = self.jobs.get(parts[1])
+        if job is None:
+            await send_json(writer, 404, {'error': f"No job {parts[1]}"})
+        elif len(parts) == 3 and method == 'GET':
+            await self.stream_events(job, writer)
+        elif len(parts) == 2 and method == 'GET':
+            await send_json(writer, 200, job.snapshot())
+        elif len(parts) == 2 and method == 'DELETE':
+            self.cancel(job)
+            await send_json(writer, 200, {'id': job.id, 'status': 'cancelling' if not job.finished else job.status})
+        else:
+            await send_json(writer, 405, {'error': f"{method} not allowed on {path}"})
+    
+    async def stream_events(self, job, writer):
+        """Send a job's events as JSON lines, following it until it has finished"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        sent = 0
+        try:
+            while True:
+                for event in job.events[sent:]:
+                    writer.write(json.dumps(event).encode('utf-8') + b"\n")
+                sent = len(job.events)
+                await writer.drain()
+                if job.finished:
+                    break
+                async with job.changed:
+                    await job.changed.wait_for(lambda: len(job.events) > sent)
+        except ConnectionError:
+            pass  # The client stopped following; the job carries on
+        finally:
+            writer.close()
+
+
+async def read_request(reader):
+    """Read one HTTP request, returning (method, path, body)"""
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise ValueError("Malformed request line")
+    method, path, _ = request_line
+    
+    content_length = 0
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            try:
+                content_length = int(value)
+            except ValueError:
+                raise ValueError("Invalid Content-Length") from None
+    if not 0 <= content_length <= MAX_BODY_BYTES:
+        raise ValueError(f"Request body must be at most {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(content_length) if content_length else b''
+    return method.upper(), path, body
+
+
+async def send_json(writer, status, payload):
+    """Send a complete JSON response and close the connection"""
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+async def serve(host='127.0.0.1', port=8765, num_workers=None, cache=None):
+    """Run the service until cancelled"""
+    service = SimulationService(num_workers, cache)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Simulation service listening on http://{host}:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    """Start the service from the command line"""
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON-lines Blackjack simulation service")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default 8765)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="worker processes shared by all jobs (0 = one per CPU, default)")
+    parser.add_argument('--cache', metavar='DIR', help="reuse results of seeded scenarios stored in DIR")
+    args = parser.parse_args(argv)
+    
+    cache = ResultCache(args.cache) if args.cache else None
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers or None, cache))
+    except KeyboardInterrupt:
+        print("\nService stopped.")
+
+
+if __name__ == '__main__':
+    main()
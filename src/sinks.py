@@ -0,0 +1,138 @@
+# Hand record sinks
+import csv
+import os
+
+HAND_RECORD_HEADER = [
+    'Strategy', 'Scenario', 'Hand_Number', 'Player_Cards', 'Dealer_Cards',
+    'Player_Total', 'Dealer_Total', 'Player_Action', 'Bet_Amount',
+    'Result', 'Money_Change', 'Player_Busted', 'Dealer_Busted', 'Is_Blackjack',
+    'Bankroll_After', 'Cards_Count', 'Deck_Penetration_%', 'Cards_Remaining', 'Reshuffled_After',
+    'Hand_Sizes', 'Player_Totals'
+]
+
+
+def hand_record_row(strategy_short, hand_record):
+    """Format a HandRecord as a CSV row matching HAND_RECORD_HEADER"""
+    # Format card lists as strings
+    player_cards_str = ' | '.join(hand_record.player_cards)
+    dealer_cards_str = ' | '.join(hand_record.dealer_cards)
+    cards_count = hand_record.cards_count
+    # After a split, Player_Cards holds every hand in turn: these say where each one ends
+    if hand_record.hand_sizes is None:
+        hand_sizes_str = str(len(hand_record.player_codes))
+        player_totals_str = str(hand_record.player_total)
+    else:
+        hand_sizes_str = ' | '.join(str(size) for size in hand_record.hand_sizes)
+        player_totals_str = ' | '.join(str(total) for total in hand_record.player_totals)
+    
+    return [
+        strategy_short,
+        hand_record.scenario_number,
+        hand_record.hand_number,
+        player_cards_str,
+        dealer_cards_str,
+        hand_record.player_total,
+        hand_record.dealer_total,
+        hand_record.player_action,
+        hand_record.bet_amount,
+        hand_record.result,
+        hand_record.money_change,
+        hand_record.player_busted,
+        hand_record.dealer_busted,
+        hand_record.is_blackjack,
+        hand_record.bankroll_after,
+        cards_count,
+        f"{hand_record.deck_penetration:.1f}%",
+        hand_record.cards_remaining,
+        hand_record.reshuffled_after,
+        hand_sizes_str,
+        player_totals_str
+    ]
+
+
+class HandRecordSink:
+    """Base class for destinations that receive hand records as they are played"""
+    
+    def __init__(self):
+        self.hands_written = 0
+    
+    def write(self, hand_record):
+        """Consume one HandRecord"""
+        raise NotImplementedError("Sink must implement write method")
+    
+    def close(self):
+        """Flush and release any resources held by the sink"""
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class NullSink(HandRecordSink):
+    """Discards every record (only counts them)"""
+    
+    def write(self, hand_record):
+        self.hands_written += 1
+
+
+class MemorySink(HandRecordSink):
+    """Keeps every record in a list (intended for tests and small runs)"""
+    
+    def __init__(self, records=None):
+        super().__init__()
+        self.records = records if records is not None else []
+    
+    def write(self, hand_record):
+        self.records.append(hand_record)
+        self.hands_written += 1
+
+
+class CSVHandSink(HandRecordSink):
+    """Writes records to a CSV file in buffered batches, so memory stays bounded
+    
+    With resume_hands, an existing file is continued after its first
+    resume_hands records; any later rows (from scenarios an interrupted run
+    did not finish) are dropped.
+    """
+    
+    def __init__(self, path, strategy_short, buffer_size=1000, resume_hands=None):
+        super().__init__()
+        self.path = path
+        self.strategy_short = strategy_short
+        self.buffer_size = buffer_size
+        self.buffer = []
+        if resume_hands is None:
+            self.file = open(path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(HAND_RECORD_HEADER)
+        else:
+            # Rows never contain newlines, so the header plus resume_hands lines is what to keep
+            with open(path, 'rb') as existing:
+                for _ in range(resume_hands + 1):
+                    if not existing.readline():
+                        raise ValueError(f"{path} holds fewer than {resume_hands} hand records")
+                end = existing.tell()
+            os.truncate(path, end)
+            self.file = open(path, 'a', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.hands_written = resume_hands
+    
+    def write(self, hand_record):
+        self.buffer.append(hand_record_row(self.strategy_short, hand_record))
+        self.hands_written += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered rows to the file"""
+        self.writer.writerows(self.buffer)
+        self.buffer.clear()
+        self.file.flush()
+    
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
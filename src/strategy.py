@@ -1,40 +1,181 @@
 # Strategy module
-from utils import calculate_hand_value
+from utils import HAND_VALUES, NUM_HAND_STATES, calculate_hand_value
+
+# Actions in a compiled StrategyTable
+STAND, HIT, DOUBLE, SPLIT, SURRENDER = range(5)
+
+# Basic strategy charts for 4-8 decks, dealer standing on soft 17, double
+# after split and late surrender. Columns are the dealer upcard 2-10 then
+# Ace. H hit, S stand, D double (else hit), d double (else stand),
+# R surrender (else hit), P split. Hard totals below the chart hit and above
+# it stand; soft totals below it hit and above it stand.
+BASIC_HARD = {
+    9: 'HDDDDHHHHH',
+    10: 'DDDDDDDDHH',
+    11: 'DDDDDDDDDH',
+    12: 'HHSSSHHHHH',
+    13: 'SSSSSHHHHH',
+    14: 'SSSSSHHHHH',
+    15: 'SSSSSHHHRH',
+    16: 'SSSSSHHRRR',
+}
+BASIC_SOFT = {
+    13: 'HHHDDHHHHH',
+    14: 'HHHDDHHHHH',
+    15: 'HHDDDHHHHH',
+    16: 'HHDDDHHHHH',
+    17: 'HDDDDHHHHH',
+    18: 'SddddSSHHH',
+}
+# Pairs by card points (1 = Aces); pairs not split are played from the charts above
+BASIC_PAIRS = {
+    1: 'PPPPPPPPPP',
+    2: 'PPPPPPHHHH',
+    3: 'PPPPPPHHHH',
+    4: 'HHHPPHHHHH',
+    6: 'PPPPPHHHHH',
+    7: 'PPPPPPHHHH',
+    8: 'PPPPPPPPPP',
+    9: 'PPPPPSPPSS',
+}
+
+
+class TableRules:
+    """Rules for rounds played from a StrategyTable
+    
+    The dealer stands on all 17s and peeks for blackjack under an Ace or
+    ten-value upcard, so doubles and splits are only lost to a dealer
+    blackjack that has already been ruled out. Blackjack pays 3:2, and only
+    the first two cards of a hand may double or surrender.
+    
+    - double_after_split: hands formed by a split may double.
+    - max_hands: hands a round may be split into (re-splitting up to this).
+    - resplit_aces: split Aces may be split again.
+    - hit_split_aces: split Aces may draw more than their one card.
+    - late_surrender: the original hand may surrender half the bet after the peek.
+    - insurance_true_count: take insurance (half the bet, paying 2:1) against
+      an Ace when the true count before the deal is at least this; None never
+      takes it.
+    """
+    
+    def __init__(self, double_after_split=True, max_hands=4, resplit_aces=False, hit_split_aces=False,
+                 late_surrender=True, insurance_true_count=None):
+        self.double_after_split = double_after_split
+        self.max_hands = max_hands
+        self.resplit_aces = resplit_aces
+        self.hit_split_aces = hit_split_aces
+        self.late_surrender = late_surrender
+        self.insurance_true_count = insurance_true_count
+
+
+def _chart_code(hard, soft, state, upcard):
+    """Return the chart code for a hand state against an upcard (by points)"""
+    hard_total = state // 2
+    value = HAND_VALUES[state]
+    column = 9 if upcard == 1 else upcard - 2
+    chart = soft if value != hard_total else hard  # A soft hand counts an Ace as 11
+    row = chart.get(value)
+    if row is not None:
+        return row[column]
+    if value > max(chart):
+        return 'S'
+    if value < min(chart):
+        return 'H'
+    raise ValueError(f"Strategy chart has no row for {value}")
+
+
+def _compile_actions(hard, soft, can_double, can_surrender):
+    """Flatten charts into a tuple of actions indexed by hand state * 11 + upcard points"""
+    actions = {
+        'H': HIT,
+        'S': STAND,
+        'D': DOUBLE if can_double else HIT,
+        'd': DOUBLE if can_double else STAND,
+        'R': SURRENDER if can_surrender else HIT,
+    }
+    table = []
+    for state in range(NUM_HAND_STATES):
+        for upcard in range(11):
+            if upcard == 0 or HAND_VALUES[state] > 21:
+                table.append(STAND)  # Unused slot or busted hand
+            else:
+                table.append(actions[_chart_code(hard, soft, state, upcard)])
+    return tuple(table)
+
+
+class StrategyTable:
+    """Strategy charts compiled into flat lookup tables for Game's full rules
+    
+    Every table is indexed by hand state * 11 + dealer upcard points (Ace =
+    1), so a decision is one tuple lookup: first holds the actions for the
+    first two cards of the original hand, split_first those for the first
+    two cards of a split hand, and later those once a hand has drawn.
+    Doubles and surrenders the rules do not allow are compiled to their
+    fallbacks. split is indexed by pair card points * 11 + upcard points.
+    """
+    
+    def __init__(self, hard, soft, pairs, rules=None):
+        self.rules = rules if rules is not None else TableRules()
+        self.first = _compile_actions(hard, soft, True, self.rules.late_surrender)
+        self.split_first = _compile_actions(hard, soft, self.rules.double_after_split, False)
+        self.later = _compile_actions(hard, soft, False, False)
+        split = [False] * 121
+        for points, row in pairs.items():
+            for upcard in range(1, 11):
+                split[points * 11 + upcard] = row[9 if upcard == 1 else upcard - 2] == 'P'
+        self.split = tuple(split)
+
 
 class Strategy:
     """Base strategy class"""
-    def __init__(self, name):
+    # StrategyTable for the full rules (double, split, surrender), or None for hit/stand only
+    table = None
+    
+    def __init__(self, name, short_name=None):
         self.name = name
+        self.short_name = short_name or name  # Used in file names and CSV columns
     
-    def decide(self, hand):
-        """Decide whether to hit or stand based on the hand"""
+    def decide(self, hand, upcard):
+        """Decide whether to hit or stand based on the hand
+        
+        upcard is the dealer upcard's points (Ace = 1); strategies that
+        ignore the dealer, such as StandAtThresholdStrategy, may ignore it.
+        """
         raise NotImplementedError("Strategy must implement decide method")
 
-class AlwaysStandAt12Strategy(Strategy):
-    """Strategy A: Always stand at 12+"""
-    def __init__(self):
-        super().__init__("Always Stand at 12+")
+class StandAtThresholdStrategy(Strategy):
+    """Hit until the hand reaches a fixed total, then always stand"""
+    def __init__(self, threshold, name=None):
+        super().__init__(name or f"Always Stand at {threshold}+", f"S{threshold}")
+        self.threshold = threshold
     
-    def decide(self, hand):
-        """Hit until hand totals 12 or more, then always stand"""
+    def decide(self, hand, upcard):
+        """Hit until hand totals the threshold or more, then always stand (whatever the upcard)"""
         hand_value = calculate_hand_value(hand)
-        if hand_value >= 12:
+        if hand_value >= self.threshold:
             return 'stand'
         else:
             return 'hit'
 
-class AlwaysStandAt16Strategy(Strategy):
+class BasicStrategy(Strategy):
+    """Multi-deck basic strategy, played with doubles, splits and surrender"""
+    def __init__(self, rules=None):
+        super().__init__("Basic Strategy", "BASIC")
+        self.table = StrategyTable(BASIC_HARD, BASIC_SOFT, BASIC_PAIRS, rules)
+    
+    def decide(self, hand, upcard):
+        """Hit or stand from the table, for callers without the full rules"""
+        return 'hit' if self.table.later[hand.state * 11 + upcard] == HIT else 'stand'
+
+class AlwaysStandAt12Strategy(StandAtThresholdStrategy):
+    """Strategy A: Always stand at 12+"""
+    def __init__(self):
+        super().__init__(12)
+
+class AlwaysStandAt16Strategy(StandAtThresholdStrategy):
     """Strategy B: Always stand at 16+"""
     def __init__(self):
-        super().__init__("Always Stand at 16+")
-    
-    def decide(self, hand):
-        """Hit until hand totals 16 or more, then always stand"""
-        hand_value = calculate_hand_value(hand)
-        if hand_value >= 16:
-            return 'stand'
-        else:
-            return 'hit'
+        super().__init__(16)
 
 def get_available_strategies():
     """Return a list of available strategies"""
@@ -42,3 +183,18 @@ def get_available_strategies():
         AlwaysStandAt12Strategy(),
         AlwaysStandAt16Strategy()
     ]
+
+def get_strategy(short_name):
+    """Return a strategy from its short name, e.g. 'S12' for stand at 12+"""
+    short_name = short_name.strip().upper()
+    if short_name == 'BASIC':
+        return BasicStrategy()
+    for strategy in get_available_strategies():
+        if strategy.short_name == short_name:
+            return strategy
+    
+    if short_name.startswith('S') and short_name[1:].isdigit():
+        threshold = int(short_name[1:])
+        if 12 <= threshold <= 21:
+            return StandAtThresholdStrategy(threshold)
+    raise ValueError(f"Unknown strategy '{short_name}' (expected S12 to S21 or BASIC)")
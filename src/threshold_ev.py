@@ -0,0 +1,115 @@
+# Exact expected value of stand-at-threshold strategies
+from functools import lru_cache
+from dealer_odds import (BLACKJACK, BUST, INFINITE_SHOE_PROBABILITIES, clear_cache, dealer_outcome_probabilities,
+                         remove_cards, shoe_composition)
+from utils import EMPTY_HAND_STATE, HAND_TRANSITIONS, HAND_VALUES
+
+# Positions in the per-hand result tuples
+WIN = 0
+PUSH = 1
+LOSS = 2
+PLAYER_BUST = 3
+DEALER_BUST = 4
+
+
+def _card_probabilities(counts):
+    """Yield (points, probability, remaining counts) for the next card drawn"""
+    if counts is None:
+        for points in range(1, 11):
+            yield points, INFINITE_SHOE_PROBABILITIES[points], None
+        return
+    remaining = sum(counts)
+    for points in range(1, 11):
+        if counts[points]:
+            yield points, counts[points] / remaining, remove_cards(counts, points)
+
+
+@lru_cache(maxsize=None)
+def _player_finish(state, counts, threshold, upcard):
+    """Result probabilities once the player plays out a hand against an upcard
+    
+    The dealer's hole card is drawn after the player's hits. Cards in the shoe
+    are exchangeable and the player never sees the hole card, so this gives the
+    same probabilities as dealing it before the player acts.
+    """
+    value = HAND_VALUES[state]
+    if value > 21:
+        return (0.0, 0.0, 1.0, 1.0, 0.0)
+    
+    if value >= threshold:
+        dealer = dealer_outcome_probabilities(upcard, counts)
+        win = dealer[BUST]
+        push = 0.0
+        for dealer_total in range(17, 22):
+            if dealer_total < value:
+                win += dealer[dealer_total - 17]
+            elif dealer_total == value:
+                push = dealer[dealer_total - 17]
+        return (win, push, 1.0 - win - push, 0.0, dealer[BUST])
+    
+    totals = [0.0] * 5
+    for points, probability, remaining in _card_probabilities(counts):
+        outcome = _player_finish(HAND_TRANSITIONS[state][points], remaining, threshold, upcard)
+        for i in range(5):
+            totals[i] += probability * outcome[i]
+    return tuple(totals)
+
+
+@lru_cache(maxsize=None)
+def threshold_strategy_ev(threshold, num_decks=None):
+    """Return exact result probabilities and EV for standing at threshold or more
+    
+    Plays the rules of Game.play_round off the top of a fresh shoe of
+    num_decks decks (None = infinite shoe): no dealer peek, blackjack pays 3:2,
+    a dealer blackjack beats any other player hand, and the dealer stands on
+    all 17s. Returns a dict of probabilities per hand (win excludes player
+    blackjacks) and the EV in units of the bet.
+    
+    The memoized player and dealer results are freed once the solve is done:
+    a six-deck shoe leaves hundreds of megabytes of them.
+    """
+    if not 12 <= threshold <= 21:
+        raise ValueError("Stand threshold must be between 12 and 21")
+    
+    shoe = None if num_decks is None else shoe_composition(num_decks)
+    totals = [0.0] * 5
+    blackjack = 0.0
+    
+    # Deal order is player, dealer upcard, player
+    try:
+        for first, p_first, after_first in _card_probabilities(shoe):
+            for upcard, p_upcard, after_upcard in _card_probabilities(after_first):
+                for second, p_second, after_second in _card_probabilities(after_upcard):
+                    probability = p_first * p_upcard * p_second
+                    state = HAND_TRANSITIONS[HAND_TRANSITIONS[EMPTY_HAND_STATE][first]][second]
+                    
+                    if HAND_VALUES[state] == 21:
+                        # Player blackjack: push against a dealer blackjack, otherwise paid 3:2
+                        dealer_blackjack = dealer_outcome_probabilities(upcard, after_second)[BLACKJACK]
+                        totals[PUSH] += probability * dealer_blackjack
+                        blackjack += probability * (1.0 - dealer_blackjack)
+                        continue
+                    
+                    outcome = _player_finish(state, after_second, threshold, upcard)
+                    for i in range(5):
+                        totals[i] += probability * outcome[i]
+    finally:
+        _player_finish.cache_clear()
+        clear_cache()
+    
+    return {
+        'threshold': threshold,
+        'num_decks': num_decks,
+        'win': totals[WIN],
+        'blackjack': blackjack,
+        'push': totals[PUSH],
+        'loss': totals[LOSS],
+        'player_bust': totals[PLAYER_BUST],
+        'dealer_bust': totals[DEALER_BUST],
+        'ev': totals[WIN] + 1.5 * blackjack - totals[LOSS],
+    }
+
+
+def strategy_ev(strategy, num_decks=None):
+    """Return threshold_strategy_ev for a StandAtThresholdStrategy instance"""
+    return threshold_strategy_ev(strategy.threshold, num_decks)
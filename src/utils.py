@@ -1,7 +1,125 @@
 # Utility functions
 
+import math
+
+# Hand states encode a running hard total (every Ace counted as 1) plus a flag
+# for whether the hand holds an Ace: state = hard_total * 2 + has_ace.
+# The tables cover every hard total reachable by drawing onto a live hand
+# (at most 21 + 10); a bust hand is absorbing and keeps its state.
+MAX_HARD_TOTAL = 31
+NUM_HAND_STATES = (MAX_HARD_TOTAL + 1) * 2
+EMPTY_HAND_STATE = 0
+
+
+def _build_hand_tables():
+    """Precompute best hand value per state and state transitions per card points"""
+    values = []
+    transitions = []
+    for state in range(NUM_HAND_STATES):
+        hard_total, has_ace = divmod(state, 2)
+        # One Ace can count as 11 if that does not bust the hand
+        if has_ace and hard_total + 10 <= 21:
+            values.append(hard_total + 10)
+        else:
+            values.append(hard_total)
+        
+        row = [state] * 11  # Indexed by card points 1-10; index 0 is unused
+        if hard_total <= 21:
+            for points in range(1, 11):
+                new_has_ace = 1 if (has_ace or points == 1) else 0
+                row[points] = (hard_total + points) * 2 + new_has_ace
+        transitions.append(tuple(row))
+    return tuple(values), tuple(transitions)
+
+
+HAND_VALUES, HAND_TRANSITIONS = _build_hand_tables()
+
+
+class Hand(list):
+    """A list of cards that keeps its hand state up to date as cards are added
+    
+    append() advances the state in O(1); every other list method that
+    changes the cards recomputes it from scratch, so the state never goes
+    stale whichever way the hand is edited.
+    """
+    __slots__ = ('state',)
+    
+    def __init__(self, cards=()):
+        super().__init__()
+        self.state = EMPTY_HAND_STATE
+        for card in cards:
+            self.append(card)
+    
+    def append(self, card):
+        """Add a card and advance the hand state in O(1)"""
+        super().append(card)
+        self.state = HAND_TRANSITIONS[self.state][card.points]
+    
+    def clear(self):
+        """Remove all cards and reset the hand state"""
+        super().clear()
+        self.state = EMPTY_HAND_STATE
+    
+    def extend(self, cards):
+        """Add several cards, advancing the hand state for each"""
+        for card in list(cards):
+            self.append(card)
+    
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+    
+    def _recompute_state(self):
+        """Replay the cards from an empty hand (bust states are absorbing, so order matters)"""
+        state = EMPTY_HAND_STATE
+        for card in self:
+            state = HAND_TRANSITIONS[state][card.points]
+        self.state = state
+    
+    def insert(self, index, card):
+        super().insert(index, card)
+        self._recompute_state()
+    
+    def __setitem__(self, index, cards):
+        super().__setitem__(index, cards)
+        self._recompute_state()
+    
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._recompute_state()
+    
+    def __imul__(self, count):
+        super().__imul__(count)
+        self._recompute_state()
+        return self
+    
+    def pop(self, index=-1):
+        card = super().pop(index)
+        self._recompute_state()
+        return card
+    
+    def remove(self, card):
+        super().remove(card)
+        self._recompute_state()
+    
+    def reverse(self):
+        super().reverse()
+        self._recompute_state()
+    
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._recompute_state()
+    
+    def value(self):
+        """Return the best possible value of the hand"""
+        return HAND_VALUES[self.state]
+
+
 def calculate_hand_value(cards):
     """Calculate the best possible value of a hand considering Aces"""
+    if type(cards) is Hand:
+        return HAND_VALUES[cards.state]
+    
     total = 0
     aces = 0
     
@@ -28,3 +146,59 @@ def format_hand(cards):
     hand_str = ', '.join(str(card) for card in cards)
     value = calculate_hand_value(cards)
     return f"{hand_str} (Value: {value})"
+
+
+class RunningStats:
+    """Streaming mean and variance of a series (Welford), mergeable across runs"""
+    __slots__ = ('count', 'mean', 'm2')
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+    
+    def add(self, value):
+        """Add one observation in O(1)"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    def merge(self, other):
+        """Fold another RunningStats into this one (Chan et al. parallel update)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        return self
+    
+    @classmethod
+    def combine(cls, stats):
+        """Return a new RunningStats merging every item of an iterable"""
+        combined = cls()
+        for item in stats:
+            combined.merge(item)
+        return combined
+    
+    def variance(self):
+        """Sample variance (0 with fewer than two observations)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    def std_dev(self):
+        """Sample standard deviation"""
+        return math.sqrt(self.variance())
+    
+    def standard_error(self):
+        """Standard error of the mean"""
+        return math.sqrt(self.variance() / self.count) if self.count > 1 else 0.0
+    
+    def confidence_interval(self, z=1.96):
+        """Normal-approximation confidence interval of the mean (95% by default)"""
+        margin = z * self.standard_error()
+        return self.mean - margin, self.mean + margin
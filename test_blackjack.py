@@ -1,11 +1,37 @@
 # Test script to verify blackjack 3:2 payout functionality
+import asyncio
+import json
 import sys
 import os
+import random
+import statistics
+import pytest
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from deck import Card, Deck
-from game import Game, GameResult
-from strategy import AlwaysStandAt12Strategy
+from deck import CARD_TABLE, COUNT_SYSTEMS, RANK_INDEX, Card, Deck, CompactDeck
+from game import (PAIRED_METRICS, Game, GameResult, GameSimulator, GameStats, HandRecord, ScenarioSummary,
+                  paired_difference_stats)
+from parallel import create_executor, default_window, iter_family_scenarios, iter_scenarios, map_in_order
+from sinks import CSVHandSink, MemorySink, NullSink, hand_record_row
+from columnar import HAND_RECORD_STRUCT, NpyHandSink, check_npy_strategy
+from history import open_hand_history
+from rng import RandomStream
+from dealer_odds import dealer_outcome_table, simulate_dealer_outcomes
+from threshold_ev import threshold_strategy_ev
+from strategy import AlwaysStandAt12Strategy, AlwaysStandAt16Strategy, BasicStrategy, TableRules
+from betting import parse_betting_policy
+from ruin import progression_outcomes, threshold_progression_outcomes
+from cache import ResultCache
+from checkpoint import Checkpoint
+from service import SimulationService
+import batch
+import benchmark
+import dealer_odds
+import main
+import threshold_ev
+from main import DEFAULT_SETTINGS, BlackjackSimulator, build_settings_list, load_config, parse_args, validate_settings
+from utils import Hand, RunningStats, calculate_hand_value
 
 def test_blackjack_payout():
     """Test that blackjack pays 3:2 correctly"""
@@ -47,5 +73,620 @@ def test_blackjack_payout():
     print(f"Actual blackjack payout: ${blackjack_win.money_change}")
     print(f"Correct payout: {blackjack_win.money_change == expected_blackjack_payout}")
 
+def test_compact_deck_matches_object_deck():
+    """CompactDeck deals the same cards as Deck for the same random state"""
+    random.seed(1234)
+    object_deck = Deck(num_decks=2)
+    object_cards = [str(object_deck.deal_card()) for _ in range(500)]
+    
+    random.seed(1234)
+    compact_deck = CompactDeck(num_decks=2)
+    compact_cards = [str(compact_deck.deal_card()) for _ in range(500)]
+    
+    assert compact_cards == object_cards
+    assert compact_deck.get_deck_info() == object_deck.get_deck_info()
+    assert [str(card) for card in compact_deck.cards] == [str(card) for card in object_deck.cards]
+
+
+def test_compact_shoe_simulation_matches_object_shoe():
+    """Simulations give identical outcomes with either shoe for the same seed"""
+    summaries = []
+    for compact_shoe in (False, True):
+        random.seed(42)
+        simulator = GameSimulator(num_decks=6, compact_shoe=compact_shoe)
+        stats = simulator.simulate(AlwaysStandAt12Strategy(), 300)
+        summaries.append((
+            stats.get_summary("S12"),
+            [(r.player_cards, r.dealer_cards, r.result) for r in stats.hand_records]
+        ))
+    
+    assert summaries[0] == summaries[1]
+
+def test_hand_state_matches_full_rescan():
+    """The incremental hand value agrees with rescanning the cards"""
+    random.seed(7)
+    deck = Deck(num_decks=8)
+    for _ in range(2000):
+        hand = Hand()
+        cards = []
+        while calculate_hand_value(cards) <= 21:
+            card = deck.deal_card()
+            hand.append(card)
+            cards.append(card)
+            assert hand.value() == calculate_hand_value(cards)
+    
+    # Every other way of editing the cards keeps the state in step as well
+    ace, nine, five, king = Card('Hearts', 'A'), Card('Spades', '9'), Card('Clubs', '5'), Card('Clubs', 'K')
+    hand = Hand([ace])
+    hand.extend([nine])
+    assert hand.value() == 20
+    hand += [five]
+    assert hand.value() == 15
+    edits = [lambda h: h.insert(0, king), lambda h: h.__setitem__(0, nine), lambda h: h.pop(),
+             lambda h: h.remove(ace), lambda h: h.__delitem__(slice(0, 1)), lambda h: h.__imul__(3)]
+    for edit in edits:
+        edit(hand)
+        assert hand.value() == calculate_hand_value(list(hand))
+
+def test_parallel_scenarios_match_serial():
+    """Seeded scenarios give the same results for any worker count"""
+    def run(num_workers):
+        executor = create_executor(num_workers)
+        try:
+            results = iter_scenarios(AlwaysStandAt12Strategy(), 6, 200, num_decks=2,
+                                     executor=executor, seed=99, record_hands=False)
+            return [stats.get_summary("S12") for stats in results]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    
+    assert run(1) == run(3)
+
+def test_map_in_order_bounds_submitted_tasks():
+    """Only window tasks run ahead of the result being consumed"""
+    submitted = []
+    
+    def square(value):
+        submitted.append(value)
+        return value * value
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = map_in_order(executor, square, range(20), window=3)
+        for i, result in enumerate(results):
+            assert result == i * i
+            assert len(submitted) <= i + 3
+        assert sorted(submitted) == list(range(20))
+    
+    # Pools from create_executor record their worker count for the default window
+    executor = create_executor(3)
+    try:
+        assert executor.num_workers == 3 and default_window(3) == 6
+        assert list(map_in_order(executor, abs, range(-4, 0))) == [4, 3, 2, 1]
+    finally:
+        executor.shutdown()
+
+def test_hand_records_stream_to_sink():
+    """Records go to the sink instead of accumulating on GameStats"""
+    random.seed(5)
+    in_memory = GameSimulator(num_decks=6).simulate(AlwaysStandAt12Strategy(), 200)
+    
+    random.seed(5)
+    sink = MemorySink()
+    streamed = GameSimulator(num_decks=6).simulate(AlwaysStandAt12Strategy(), 200, sink=sink)
+    
+    assert streamed.hand_records == []
+    assert [r.player_cards for r in sink.records] == [r.player_cards for r in in_memory.hand_records]
+    
+    null_sink = NullSink()
+    GameSimulator(num_decks=6).simulate(AlwaysStandAt12Strategy(), 50, sink=null_sink)
+    assert null_sink.hands_written > 0
+
+def test_zero_bet_hand_is_counted_without_return():
+    """A hand played for nothing counts as a game but adds no return per unit bet"""
+    stats = GameStats()
+    stats.add_result(GameResult(False, False, True, False, False, 0.0, money_change=0.0, wagered=0.0))
+    stats.add_result(GameResult(True, False, False, False, False, 10.0))
+    assert (stats.total_games, stats.money_stats.count, stats.return_stats.count) == (2, 2, 1)
+    assert stats.return_stats.mean == 1.0
+
+def test_random_stream_reproducible():
+    """Seeded streams and their substreams reproduce the same simulation"""
+    master = RandomStream(2024)
+    assert master.spawn(0, 1).random() == RandomStream(2024).spawn(0, 1).random()
+    assert master.spawn(0, 1).random() != master.spawn(1, 1).random()
+    
+    summaries = []
+    for _ in range(2):
+        simulator = GameSimulator(num_decks=6)
+        stats = simulator.simulate(AlwaysStandAt12Strategy(), 300, rng=RandomStream(2024).spawn(0, 1))
+        summaries.append(stats.get_summary("S12"))
+    assert summaries[0] == summaries[1]
+
+def test_exact_dealer_outcomes():
+    """Exact dealer probabilities match published values and the simulator"""
+    infinite = dealer_outcome_table()
+    assert abs(infinite[6]['bust'] - 0.4232) < 0.0001
+    assert abs(infinite[1]['bust'] - 0.1153) < 0.0001
+    
+    exact = dealer_outcome_table(6)
+    for upcard in range(1, 11):
+        assert abs(sum(exact[upcard].values()) - 1.0) < 1e-9
+    
+    sampled = simulate_dealer_outcomes(6, 20000, RandomStream(11))
+    for upcard in (2, 6, 10):
+        assert abs(sampled[upcard]['bust'] - exact[upcard]['bust']) < 0.04
+
+def test_threshold_strategy_ev_matches_simulation():
+    """Exact threshold EV agrees with flat-bet play through Game.play_round"""
+    exact = threshold_strategy_ev(16)
+    total = exact['win'] + exact['blackjack'] + exact['push'] + exact['loss']
+    assert abs(total - 1.0) < 1e-9
+    # The memoized intermediate results do not outlive a solve
+    assert threshold_strategy_ev(14)['threshold'] == 14
+    assert threshold_ev._player_finish.cache_info().currsize == 0
+    assert dealer_odds._dealer_finish.cache_info().currsize == 0
+    
+    game = Game(num_decks=8, rng=RandomStream(3))
+    strategy = AlwaysStandAt16Strategy()
+    rounds = 20000
+    money = sum(game.play_round(strategy, 1.0).money_change for _ in range(rounds))
+    assert abs(money / rounds - exact['ev']) < 0.03
+
+def test_batch_simulator_matches_exact_ev():
+    """The NumPy batch engine reproduces the exact threshold results"""
+    pytest.importorskip("numpy")
+    from batch import simulate_threshold_batch
+    
+    stats = simulate_threshold_batch(AlwaysStandAt16Strategy(), 200000, num_decks=6,
+                                     bet_amount=1.0, num_lanes=4096, seed=8)
+    exact = threshold_strategy_ev(16)
+    assert stats.total_games == 200000
+    assert stats.player_wins + stats.dealer_wins + stats.draws == stats.total_games
+    assert abs((stats.current_bankroll - stats.starting_bankroll) / stats.total_games - exact['ev']) < 0.01
+    assert abs(stats.dealer_busts / stats.total_games - exact['dealer_bust']) < 0.005
+
+def test_hand_records_store_card_codes():
+    """Hand records keep cards as code bytes and format the same card strings on export"""
+    ten, ace, six = Card('Hearts', '10'), Card('Spades', 'A'), Card('Clubs', '6')
+    assert str(CARD_TABLE[ace.code]) == "A of Spades"
+    
+    record = HandRecord(3, 1, bytes([ten.code, ace.code]), bytes([six.code]), 21, 6, "Blackjack", 10.0, "Win",
+                        15.0, False, False, 1015.0, True)
+    assert not hasattr(record, '__dict__')
+    assert record.player_cards == ["10 of Hearts", "A of Spades"] and record.dealer_cards == ["6 of Clubs"]
+    assert record.cards_count == 3
+    row = hand_record_row('S16', record)
+    assert row[3:5] == ["10 of Hearts | A of Spades", "6 of Clubs"] and row[15] == 3
+    
+    sink = MemorySink()
+    game = Game(num_decks=1, rng=RandomStream(8))
+    for hand_number in range(1, 51):
+        game.play_round(AlwaysStandAt16Strategy(), 10.0, hand_number, 1, GameStats(), sink)
+    assert len(sink.records) == 50
+    for record in sink.records:
+        assert isinstance(record.player_codes, bytes) and isinstance(record.dealer_codes, bytes)
+        player_cards = [CARD_TABLE[code] for code in record.player_codes]
+        assert calculate_hand_value(player_cards) == record.player_total
+        assert record.cards_count == len(record.player_cards) + len(record.dealer_cards)
+
+def test_npy_sink_writes_fixed_width_records(tmp_path):
+    """Binary hand records round-trip the card codes and money changes"""
+    sink = MemorySink()
+    path = tmp_path / "hands.npy"
+    with NpyHandSink(str(path)) as npy_sink:
+        stats = GameSimulator(num_decks=6).simulate(AlwaysStandAt16Strategy(), 300, sink=sink, rng=RandomStream(6))
+        for hand_record in sink.records:
+            npy_sink.write(hand_record)
+    
+    data = path.read_bytes()
+    header_length = int.from_bytes(data[8:10], 'little')
+    assert f"'shape': ({stats.total_games},)" in data[10:10 + header_length].decode('latin1')
+    
+    rows = list(HAND_RECORD_STRUCT.iter_unpack(data[10 + header_length:]))
+    assert len(rows) == stats.total_games
+    first = rows[0]
+    assert first[2][:first[5]] == sink.records[0].player_codes
+    assert sum(row[-2] for row in rows) == stats.current_bankroll - stats.starting_bankroll
+
+def test_hand_history_queries_agree_across_formats(tmp_path):
+    """CSV and .npy histories give the same dealer bust rates"""
+    sink = MemorySink()
+    GameSimulator(num_decks=6).simulate(AlwaysStandAt16Strategy(), 500, 1e9, 10.0, 1e9, sink=sink, rng=RandomStream(9))
+    # Just below a bucket edge: CSV rounds it to "50.0%", the .npy file keeps float32
+    sink.records[0].deck_penetration = 49.96
+    
+    csv_path, npy_path = str(tmp_path / "hands.csv"), str(tmp_path / "hands.npy")
+    with CSVHandSink(csv_path, "S16") as csv_sink, NpyHandSink(npy_path) as npy_sink:
+        for hand_record in sink.records:
+            csv_sink.write(hand_record)
+            npy_sink.write(hand_record)
+    
+    by_upcard = open_hand_history(csv_path).bust_rate_by_upcard()
+    assert by_upcard == open_hand_history(npy_path).bust_rate_by_upcard()
+    assert sum(group['hands'] for group in by_upcard.values()) == len(sink.records)
+    assert sum(group['dealer_busts'] for group in by_upcard.values()) == sum(r.dealer_busted for r in sink.records)
+    
+    by_penetration = open_hand_history(csv_path).bust_rate_by_penetration()
+    assert by_penetration == open_hand_history(npy_path).bust_rate_by_penetration()
+    assert list(open_hand_history(csv_path)) == list(open_hand_history(npy_path))
+    
+    standing = open_hand_history(npy_path).bust_rate_by('bet', player_action='Stand')
+    assert sum(group['hands'] for group in standing.values()) == sum(r.player_action == 'Stand' for r in sink.records)
+
+def test_running_stats_merge_matches_single_pass():
+    """Merged per-scenario statistics equal one pass over every hand"""
+    results = list(iter_scenarios(AlwaysStandAt16Strategy(), 4, 300, 1e9, 10.0, 1e9, num_decks=2, seed=3))
+    money_changes = [r.money_change for stats in results for r in stats.hand_records]
+    
+    summary = ScenarioSummary(results, 1e9)
+    assert summary.money_stats.count == len(money_changes)
+    assert summary.money_stats.mean == pytest.approx(statistics.fmean(money_changes))
+    assert summary.money_stats.variance() == pytest.approx(statistics.variance(money_changes))
+    assert summary.dealer_bust_stats.mean * len(money_changes) == pytest.approx(sum(s.dealer_busts for s in results))
+    
+    low, high = summary.money_stats.confidence_interval()
+    assert low < summary.money_stats.mean < high
+    assert RunningStats.combine([]).standard_error() == 0.0
+
+def test_precision_target_stops_early():
+    """Runs stop once the standard error reaches the target, at the same point for any worker count"""
+    stats = GameSimulator(num_decks=6).simulate(AlwaysStandAt16Strategy(), 100000, 1e9, 10.0, 1e9, rng=RandomStream(2),
+                                                precision_target=0.01, check_interval=500)
+    assert stats.total_games < 100000 and stats.total_games % 500 == 0
+    assert stats.dealer_bust_stats.standard_error() <= 0.01
+    
+    def run(num_workers):
+        executor = create_executor(num_workers)
+        try:
+            return [s.total_games for s in iter_scenarios(AlwaysStandAt12Strategy(), 50, 300, 1e9, 10.0, 1e9,
+                                                          num_decks=2, executor=executor, seed=8, record_hands=False,
+                                                          precision_target=0.02, precision_metric='ev')]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    
+    assert 1 < len(run(1)) < 50
+    assert run(1) == run(2)
+
+def test_paired_scenarios_share_shoes():
+    """Strategies sharing a seed index are dealt the same first hands"""
+    def run(strategy):
+        return list(iter_scenarios(strategy, 5, 50, 1e9, 10.0, 1e9, num_decks=2, seed=21, strategy_index=0))
+    
+    s12, s16 = run(AlwaysStandAt12Strategy()), run(AlwaysStandAt16Strategy())
+    for a, b in zip(s12, s16):
+        assert a.hand_records[0].player_codes[:2] == b.hand_records[0].player_codes[:2]
+        assert a.hand_records[0].dealer_codes[0] == b.hand_records[0].dealer_codes[0]
+    
+    differences = paired_difference_stats(s16, s12, PAIRED_METRICS['Profit'])
+    assert differences.count == 5
+    assert differences.mean == pytest.approx(sum(b.current_bankroll - a.current_bankroll for a, b in zip(s12, s16)) / 5)
+
+def test_single_pass_family_matches_separate_runs():
+    """A family of one strategy plays exactly the hands of an ordinary run"""
+    separate = iter_scenarios(AlwaysStandAt16Strategy(), 3, 500, 1e9, 10.0, 1e9, num_decks=2, seed=6, record_hands=False)
+    family = iter_family_scenarios([AlwaysStandAt16Strategy()], 3, 500, 1e9, 10.0, 1e9, num_decks=2, seed=6)
+    assert [stats.get_summary("S16") for stats in separate] == [stats[0].get_summary("S16") for stats in family]
+    
+    for s12, s16 in iter_family_scenarios([AlwaysStandAt12Strategy(), AlwaysStandAt16Strategy()], 2, 500, 1e9, 10.0, 1e9, seed=6):
+        assert s12.total_games == s16.total_games == 500
+        assert s12.player_busts < s16.player_busts
+
+def test_phase_timing_does_not_change_results():
+    """Timed runs count every phase of every round and play the same hands"""
+    plain = GameSimulator(num_decks=6).simulate(AlwaysStandAt16Strategy(), 300, 1e9, 10.0, 1e9, rng=RandomStream(4))
+    timed = GameSimulator(num_decks=6, timing=True).simulate(AlwaysStandAt16Strategy(), 300, 1e9, 10.0, 1e9, rng=RandomStream(4))
+    
+    assert plain.phase_timer is None
+    assert timed.get_summary("S16") == plain.get_summary("S16")
+    assert timed.phase_timer.calls['player'] == timed.phase_timer.calls['record'] == 300
+    assert timed.phase_timer.calls['shuffle'] == 301  # Initial shuffle plus one check per round
+    assert ScenarioSummary([timed, timed], 1e9).phase_timer.calls['deal'] == 600
+
+def test_running_count_and_true_count_buckets():
+    """Both shoes keep the same running count, and every hand lands in one true count bucket"""
+    object_deck, compact_deck = Deck(2, RandomStream(12)), CompactDeck(2, RandomStream(12))
+    dealt = [object_deck.deal_card() for _ in range(60)]
+    for _ in range(60):
+        compact_deck.deal_card()
+    expected = sum(COUNT_SYSTEMS['hi-lo'][card.points] for card in dealt)
+    assert object_deck.running_count == compact_deck.running_count == expected
+    assert compact_deck.true_count() == pytest.approx(expected * 52 / 44)
+    
+    stats = GameSimulator(num_decks=2).simulate(AlwaysStandAt16Strategy(), 400, 1e9, 10.0, 1e9, rng=RandomStream(3))
+    table = ScenarioSummary([stats], 1e9).true_count_buckets
+    assert sum(counts[0] for counts in table.values()) == stats.total_games
+    assert sum(counts[2] for counts in table.values()) == stats.dealer_busts
+
+def test_betting_policies():
+    """Policies size bets as specified; the default is the x3 progression"""
+    def bets(spec, rounds=300):
+        policy = parse_betting_policy(spec) if spec else None
+        stats = GameSimulator(num_decks=6).simulate(AlwaysStandAt16Strategy(), rounds, 1e9, 10.0, 1e9,
+                                                    rng=RandomStream(7), betting=policy)
+        return [r.bet_amount for r in stats.hand_records]
+    
+    assert bets(None) == bets('martingale:3')
+    assert set(bets('flat')) == {10.0}
+    assert max(bets('martingale:2:8')) == 80.0
+    assert set(bets('spread:8')) <= {10.0, 27.5, 45.0, 62.5, 80.0}
+    assert min(bets('kelly:0.5')) == 10.0
+    with pytest.raises(ValueError):
+        parse_betting_policy('martingale:0.5')
+
+def test_progression_ruin_solver():
+    """The DP reproduces walks whose outcome is certain, including the round limit"""
+    # Always winning: 50 wins of $10 reach the $500 target, checked at the start of round 51
+    assert progression_outcomes(1.0, 0.0, 0.0, 0.0, 1000.0, 10.0, 0.5, 50)['unfinished'] == 1.0
+    assert progression_outcomes(1.0, 0.0, 0.0, 0.0, 1000.0, 10.0, 0.5, 51)['target'] == 1.0
+    # Always losing: $10 + $30 + $90 + $270 lost, then $600 cannot cover $810
+    losing = progression_outcomes(0.0, 0.0, 0.0, 1.0, 1000.0, 10.0, 0.5)
+    assert losing['ruin'] == 1.0 and losing['expected_hands'] == 4.0
+    
+    s16 = threshold_progression_outcomes(16)
+    assert s16['target'] + s16['ruin'] == pytest.approx(1.0)
+    assert 0.3 < s16['target'] < 0.4
+
+def test_result_cache_reuses_seeded_runs(tmp_path):
+    """Cached runs give the same results and leave the stream where a played run would"""
+    def run(cache):
+        rng = RandomStream(17)
+        simulator = GameSimulator(num_decks=6, cache=cache)
+        first = simulator.simulate(AlwaysStandAt16Strategy(), 200, 1e9, 10.0, 1e9, rng=rng, record_hands=False)
+        second = simulator.simulate(AlwaysStandAt16Strategy(), 200, 1e9, 10.0, 1e9, rng=rng, record_hands=False)
+        return first.get_summary("S16"), second.get_summary("S16"), rng.random()
+    
+    cache = ResultCache(str(tmp_path))
+    uncached = run(None)
+    assert run(cache) == uncached
+    assert len(list(tmp_path.iterdir())) == 2
+    assert run(cache) == uncached  # Served from the cache
+    
+    ResultCache(str(tmp_path), max_bytes=1).evict()
+    assert list(tmp_path.iterdir()) == []
+
+def test_checkpoint_resume_matches_uninterrupted_run(tmp_path):
+    """Scenarios resumed from a saved checkpoint continue the uninterrupted run exactly"""
+    def run(completed=()):
+        return list(iter_scenarios(AlwaysStandAt16Strategy(), 5, 100, 1e9, 10.0, 1e9, seed=11, record_hands=False,
+                                   completed=completed))
+    
+    full = run()
+    path = str(tmp_path / "run.ckpt")
+    checkpoint = Checkpoint(path)
+    checkpoint.settings_list = [{'scenarios': 5}]
+    checkpoint.progress(1)['results']['S16'] = full[:2]
+    checkpoint.save()
+    
+    loaded = Checkpoint.load(path)
+    assert loaded.settings_list == [{'scenarios': 5}]
+    completed = loaded.progress(1)['results']['S16']
+    resumed = completed + run(completed)
+    assert [stats.get_summary("S16") for stats in resumed] == [stats.get_summary("S16") for stats in full]
+    
+    (tmp_path / "bad.ckpt").write_bytes(b"not a checkpoint")
+    with pytest.raises(ValueError):
+        Checkpoint.load(str(tmp_path / "bad.ckpt"))
+
+def test_benchmark_suite_writes_and_compares_results(tmp_path, capsys):
+    """The benchmark CLI covers every hot-path case, saves JSON and compares against it"""
+    first, second = str(tmp_path / "first.json"), str(tmp_path / "second.json")
+    options = ['--decks', '1', '--rounds', '20', '--repeat', '1', '--no-memory']
+    benchmark.main(options + ['--output', first])
+    benchmark.main(options + ['--output', second, '--compare', first])
+    
+    with open(second, encoding='utf-8') as results_file:
+        results = json.load(results_file)['results']
+    assert [result['benchmark'] for result in results] == [
+        'deal_card', 'deal_card_object_shoe', 'calculate_hand_value', 'play_round', 'play_round_recorded',
+        'simulate', 'csv_export', 'simulate_flat'] + (['simulate_batch'] if batch.np is not None else [])
+    assert all(result['per_second'] > 0 and 'peak_memory_kb' not in result for result in results)
+    assert capsys.readouterr().out.count("x baseline)") == len(results)
+    
+    # The export benchmark writes only into the directory it is given (BlackjackSimulator.results_dir)
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    assert benchmark.bench_export(1, 20, str(export_dir)) > 0
+    assert sorted(path.name for path in export_dir.iterdir()) == [
+        'BJ_Combined_detail_benchmark.csv', 'BJ_Combined_summary_benchmark.csv', 'S12_hands.csv', 'S16_hands.csv']
+
+def test_settings_combine_config_and_flags(tmp_path):
+    """Config [[runs]] override shared keys, flags override both, and bad values are rejected"""
+    config = tmp_path / "runs.toml"
+    config.write_text('rounds = 500\nbet = 5\n\n[[runs]]\ndecks = 1\n\n[[runs]]\ndecks = 8\nrounds = 200\n')
+    assert load_config(str(config)) == [{'rounds': 500, 'bet': 5, 'decks': 1},
+                                        {'rounds': 200, 'bet': 5, 'decks': 8}]
+    
+    args = parse_args(['--config', str(config), '--rounds', '300', '--strategies', 'S12,BASIC', '--paired'])
+    first, second = build_settings_list(args)
+    assert (first['decks'], first['rounds'], first['bet']) == (1, 300, 5.0)
+    assert (second['decks'], second['rounds']) == (8, 300)
+    assert first['strategies'] == ['S12', 'BASIC'] and first['paired'] is True
+    assert (first['scenarios'], first['workers']) == (DEFAULT_SETTINGS['scenarios'], 1)
+    
+    for bad in ({'decks': True}, {'rounds': 0}, {'bet': False}, {'seed': True}, {'workers': -1},
+                {'bet': 2000.0}, {'precision': 0}, {'format': 'xml'}, {'paired': 1}, {'typo': 1}):
+        with pytest.raises(ValueError):
+            validate_settings({**DEFAULT_SETTINGS, **bad})
+
+@pytest.mark.parametrize('hand_format', ['csv', 'npy'])
+def test_resumed_run_continues_hand_record_files(tmp_path, monkeypatch, hand_format):
+    """Hand records of a resumed run go to the original files, which match an uninterrupted run"""
+    settings = validate_settings({**DEFAULT_SETTINGS, 'rounds': 100, 'scenarios': 3, 'seed': 5,
+                                  'strategies': ['S12', 'S16'], 'format': hand_format})
+    
+    def run(directory, checkpoint=None):
+        simulator = BlackjackSimulator(checkpoint=checkpoint)
+        simulator.results_dir = str(directory)
+        simulator.run_sweep([dict(settings)])
+        return sorted(path for path in directory.iterdir() if '_hands_' in path.name)
+    
+    expected = run(tmp_path / "full")
+    
+    # Interrupt S16 after its third scenario has written records but before it is checkpointed
+    iter_scenarios_unpatched = main.iter_scenarios
+    def interrupted(strategy, *args, **kwargs):
+        scenarios = iter_scenarios_unpatched(strategy, *args, **kwargs)
+        for number, stats in enumerate(scenarios, 1):
+            if strategy.short_name == 'S16' and number == 3:
+                raise KeyboardInterrupt
+            yield stats
+    monkeypatch.setattr(main, 'iter_scenarios', interrupted)
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    with pytest.raises(KeyboardInterrupt):
+        run(tmp_path / "resumed", Checkpoint(checkpoint_path))
+    monkeypatch.setattr(main, 'iter_scenarios', iter_scenarios_unpatched)
+    
+    resumed = run(tmp_path / "resumed", Checkpoint.load(checkpoint_path))
+    assert [path.name for path in resumed] == [path.name for path in expected]
+    assert [path.read_bytes() for path in resumed] == [path.read_bytes() for path in expected]
+
+def test_service_streams_progress_and_cancels():
+    """Service jobs stream per-scenario aggregates matching a CLI run and can be cancelled"""
+    async def request(port, method, path, payload=None):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), [json.loads(line) for line in body.splitlines()]
+    
+    async def run():
+        service = SimulationService(num_workers=1)
+        server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            status, (job,) = await request(port, 'POST', '/jobs', {'strategies': ['S16'], 'scenarios': 3,
+                                                                   'rounds': 100, 'seed': 7})
+            assert status == 202
+            _, events = await request(port, 'GET', f"/jobs/{job['id']}/events")
+            
+            status, (slow,) = await request(port, 'POST', '/jobs', {'scenarios': 1000, 'rounds': 1000})
+            assert (await request(port, 'DELETE', f"/jobs/{slow['id']}"))[0] == 200
+            _, slow_events = await request(port, 'GET', f"/jobs/{slow['id']}/events")
+            
+            assert (await request(port, 'POST', '/jobs', {'workers': 4}))[0] == 400
+            for bad in ({'strategies': [5]}, {'strategies': []}, {'strategies': 'S99'}, {'bet': 'ten'}, [1]):
+                status, (error,) = await request(port, 'POST', '/jobs', bad)
+                assert status == 400 and 'error' in error
+            assert (await request(port, 'GET', '/jobs/99'))[0] == 404
+            return events, slow_events
+        finally:
+            server.close()
+            service.close()
+    
+    events, slow_events = asyncio.run(run())
+    assert [event['event'] for event in events] == ['started', 'scenario', 'scenario', 'scenario', 'finished']
+    assert events[-1]['status'] == 'completed'
+    
+    expected = ScenarioSummary(iter_scenarios(AlwaysStandAt16Strategy(), 3, 100, seed=7, record_hands=False), 1000.0)
+    final = events[-1]['summaries']['S16']
+    assert final['scenarios'] == 3
+    assert final['average_profit'] == pytest.approx(expected.average_profit)
+    assert final['dealer_bust_rate'] == pytest.approx(expected.dealer_bust_stats.mean)
+    
+    assert slow_events[-1]['status'] == 'cancelled'
+    assert slow_events[-1]['summaries']['S12']['scenarios'] < 1000
+
+def test_long_resplit_round_is_recorded_per_hand(tmp_path):
+    """A round re-split into four hands keeps every card and total, also in .npy files"""
+    game = Game(num_decks=6, rng=RandomStream(1))
+    deck = game.deck
+    # 2,2 vs 7 re-splits into four hands of 2s, each hitting to 18 (nine cards): 36 player cards
+    ranks = ['2', '7', '2', '10'] + ['2'] * 34
+    deck._buffer[deck._cursor - len(ranks):deck._cursor] = bytes(RANK_INDEX[rank] for rank in reversed(ranks))
+    sink = MemorySink()
+    result = game.play_round(BasicStrategy(), 10.0, 1, 1, GameStats(), sink, bankroll=1000.0)
+    
+    (record,) = sink.records
+    assert result.money_change == 40.0 and record.player_action == "Split"
+    assert list(record.hand_sizes) == [9, 9, 9, 9] and record.cards_count == 38
+    assert record.player_totals == [18, 18, 18, 18] and record.player_total == 18
+    
+    path, csv_path = str(tmp_path / "hands.npy"), str(tmp_path / "hands.csv")
+    with NpyHandSink(path) as npy_sink, CSVHandSink(csv_path, "BASIC") as csv_sink:
+        npy_sink.write(record)
+        csv_sink.write(record)
+    assert hand_record_row("BASIC", record)[-2:] == ["9 | 9 | 9 | 9", "18 | 18 | 18 | 18"]
+    (row,) = open_hand_history(path)
+    assert (row.player_action, row.hands) == ("Split", 4)
+    assert list(open_hand_history(csv_path)) == [row]
+    assert open_hand_history(csv_path).bust_rate_by_upcard(hands=4) == {7: {'hands': 1, 'dealer_busts': 0,
+                                                                           'bust_rate': 0.0}}
+    # Rules allowing more hands than a record holds are refused before any round is played
+    check_npy_strategy(BasicStrategy())
+    simulator = BlackjackSimulator()
+    simulator.hand_record_format = 'npy'
+    simulator.strategies = [BasicStrategy(TableRules(max_hands=6))]
+    with pytest.raises(ValueError):
+        simulator.run_strategies({}, None, 1, 10, 1000.0, 10.0, 0.5)
+    
+    numpy = pytest.importorskip("numpy")
+    (row,) = numpy.load(path)
+    assert bytes(row['player_cards'][:row['num_player_cards']]) == record.player_codes
+    assert list(row['hand_sizes']) == [9, 9, 9, 9]
+
+def test_service_evicts_finished_jobs():
+    """Finished jobs are forgotten past the cap on kept jobs and after their time to live"""
+    async def run():
+        service = SimulationService(num_workers=1, max_finished_jobs=1)
+        try:
+            first = service.submit({'strategies': ['S16'], 'scenarios': 1, 'rounds': 10, 'seed': 1})
+            await first.task
+            second = service.submit({'strategies': ['S16'], 'scenarios': 1, 'rounds': 10, 'seed': 2})
+            await second.task
+            service.evict_jobs()
+            kept = list(service.jobs)
+            # A job cancelled before it starts running still finishes (and can be evicted)
+            unstarted = service.submit({'strategies': ['S16'], 'scenarios': 1, 'rounds': 10, 'seed': 3})
+            service.cancel(unstarted)
+            await unstarted.task
+            assert unstarted.status == 'cancelled' and unstarted.events[-1]['event'] == 'finished'
+            service.job_ttl = 0
+            service.evict_jobs()
+            return first, second, kept, list(service.jobs)
+        finally:
+            service.close()
+    
+    first, second, kept, remaining = asyncio.run(run())
+    assert kept == [second.id] and remaining == []
+    assert first.events[-1]['status'] == 'completed'  # Evicted jobs keep their events for followers
+
+def test_basic_strategy_doubles_splits_surrenders_and_insures():
+    """Table-driven rounds settle doubles, splits, surrender and insurance on stacked shoes"""
+    def play(ranks, rules=None):
+        game = Game(num_decks=6, rng=RandomStream(1))
+        deck = game.deck
+        # Cards are dealt from the end of the buffer: player, dealer, player, dealer, then draws
+        deck._buffer[deck._cursor - len(ranks):deck._cursor] = bytes(RANK_INDEX[rank] for rank in reversed(ranks))
+        return game.play_round(BasicStrategy(rules), 10.0, bankroll=1000.0)
+    
+    # 8,8 vs 6: split, the first hand doubles 8+3, both hands win when the dealer busts
+    result = play(['8', '6', '8', '10', '3', '10', '10', '10'])
+    assert (result.money_change, result.wagered, result.dealer_busted) == (30.0, 30.0, True)
+    
+    # Hard 16 vs 10 surrenders half the bet; dealer blackjack under an Ace takes the bet before any play
+    assert play(['10', '10', '6', '7']).money_change == -5.0
+    assert play(['10', 'A', '9', 'K']).money_change == -10.0
+    # Insurance pays 2:1 on the half bet, covering the loss
+    insured = play(['10', 'A', '9', 'K'], TableRules(insurance_true_count=-100))
+    assert (insured.money_change, insured.wagered) == (0.0, 15.0)
+    
+    # Hit/stand decisions depend on the upcard: hard 16 hits against a 7 and stands against a 6
+    sixteen = Hand([Card('Hearts', '10'), Card('Clubs', '6')])
+    assert (BasicStrategy().decide(sixteen, 7), BasicStrategy().decide(sixteen, 6)) == ('hit', 'stand')
+    # Hit/stand entry points pass the upcard to any strategy, table-driven or not
+    game = Game(num_decks=6, rng=RandomStream(2))
+    for strategy in (BasicStrategy(), AlwaysStandAt16Strategy()):
+        game.deal_initial_cards()
+        game.play_player_turn(strategy)
+        assert game.player.make_move(strategy, game.dealer.hand[0].points) in ('hit', 'stand')
+    
+    # Full runs stay close to the known basic strategy edge (about -0.5%)
+    stats = GameSimulator(num_decks=6).simulate(BasicStrategy(), 20000, 1e12, 10.0, 1e9, rng=RandomStream(3),
+                                                record_hands=False, betting=parse_betting_policy('flat'))
+    assert abs(stats.return_stats.mean + 0.005) < 4 * stats.return_stats.standard_error()
+
 if __name__ == "__main__":
     test_blackjack_payout()